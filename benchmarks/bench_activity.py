@@ -0,0 +1,70 @@
+"""
+Отметка активности: UPDATE на каждый запрос против буфера отложенной записи (ActivityBuffer).
+Запросы распределены по ACTIVE сессиям; считает SQL запросы, записанные строки и время.
+
+Run:
+    python -m benchmarks.bench_activity
+"""
+import asyncio
+import random
+import time
+from datetime import datetime
+
+from sqlalchemy import update
+
+from shared.database.write_behind import ActivityBuffer
+
+from .common import BenchItem, StatementCounter, setup_database, teardown_database, fill, print_table
+
+
+ACTIVE = 500
+REQUESTS = 20_000
+
+
+async def per_request(factory, ids):
+    for id in ids:
+        async with factory() as session:
+            await session.execute(
+                update(BenchItem).where(BenchItem.id == id).values(created_at=datetime.now())
+            )
+            await session.commit()
+    return len(ids)
+
+
+async def write_behind(factory, ids):
+    buffer = ActivityBuffer(factory, BenchItem, "created_at", max_staleness=0.05)
+    buffer.start()
+    for i, id in enumerate(ids):
+        buffer.touch(id)
+        if i % 100 == 0:
+            # Имитация остальной работы запроса
+            await asyncio.sleep(0)
+    await buffer.stop()
+    return buffer.stats.rows
+
+
+async def run(engine, factory, name, call, ids):
+    with StatementCounter(engine) as counter:
+        started = time.perf_counter()
+        rows = await call(factory, ids)
+        elapsed = time.perf_counter() - started
+    return [name, counter.count, rows, f"{rows / len(ids):.3f}", f"{elapsed * 1000:.1f}"]
+
+
+async def main():
+    engine, factory = await setup_database()
+    random.seed(1)
+    ids = [random.randint(1, ACTIVE) for _ in range(REQUESTS)]
+    try:
+        await fill(factory, ACTIVE)
+        rows = [
+            await run(engine, factory, "UPDATE per request", per_request, ids),
+            await run(engine, factory, "write-behind", write_behind, ids),
+        ]
+    finally:
+        await teardown_database(engine)
+    print_table(["strategy", "statements", "rows written", "rows/touch", "total ms"], rows)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,61 @@
+"""
+COUNT / EXISTS: подсчет в python (старая реализация) против SELECT count(*) / EXISTS.
+Память старой реализации растет вместе с таблицей, новой - не зависит от размера.
+
+Run:
+    python -m benchmarks.bench_count
+"""
+import asyncio
+
+from sqlalchemy import select
+
+from .common import (BenchItem, BenchItemRepository, setup_database, teardown_database,
+                     fill, measure, print_table)
+
+
+SIZES = (1_000, 10_000, 50_000, 100_000)
+
+
+async def main():
+    engine, factory = await setup_database()
+    rows = []
+    try:
+        filled = 0
+        for size in SIZES:
+            await fill(factory, size, start=filled)
+            filled = size
+            async with factory() as session:
+                repository = BenchItemRepository(session)
+
+                async def legacy_count():
+                    result = await session.execute(select(BenchItem))
+                    session.expunge_all()
+                    return len(result.scalars().all())
+
+                async def legacy_exists():
+                    result = await session.execute(select(BenchItem).where(BenchItem.group_id == 1))
+                    session.expunge_all()
+                    return len(result.scalars().all()) > 0
+
+                legacy_ms, legacy_mem = await measure(legacy_count, repeat=3)
+                count_ms, count_mem = await measure(repository.count)
+                exists_legacy_ms, exists_legacy_mem = await measure(legacy_exists, repeat=3)
+                exists_ms, exists_mem = await measure(lambda: repository.exists_by_field("group_id", 1))
+                rows.append([
+                    size,
+                    f"{legacy_ms:.1f}", f"{legacy_mem // 1024}",
+                    f"{count_ms:.1f}", f"{count_mem // 1024}",
+                    f"{exists_legacy_ms:.1f}", f"{exists_legacy_mem // 1024}",
+                    f"{exists_ms:.1f}", f"{exists_mem // 1024}",
+                ])
+    finally:
+        await teardown_database(engine)
+    print_table(
+        ["rows", "len ms", "len KiB", "count ms", "count KiB",
+         "load ms", "load KiB", "exists ms", "exists KiB"],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,90 @@
+"""
+Выпуск пары токенов при входе: jwt.encode на каждый токен (как раньше в
+_create_token - datetime, подготовка ключа и сериализация заголовка на каждый
+вызов) против TokenIssuer (ключ подготовлен и заголовок сериализован один раз).
+Память - средний пик tracemalloc на выпуск одной пары.
+
+Run:
+    python -m benchmarks.bench_issuer
+"""
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+
+import jwt
+
+from shared.tokens import KeyRing, TokenIssuer
+
+from .common import print_table
+
+
+SECRET = "bench-secret-key-bench-secret-key"
+PAIRS = {"HS256" : 20_000, "EdDSA" : 5_000, "RS256" : 300}
+PAIRS_ALLOC = 200
+
+
+def legacy_token(key, algorithm, kid, user_id, type, minutes):
+    jti = uuid.uuid4()
+    payload = {
+        "user_id" : user_id,
+        "jti" : str(jti),
+        "type" : type,
+        "exp" : datetime.now() + timedelta(minutes=minutes),
+        "iat" : datetime.now(),
+    }
+    return jti, jwt.encode(payload=payload, key=key, algorithm=algorithm, headers={"kid" : kid})
+
+
+def legacy_pair(key, algorithm, kid, user_id):
+    return (
+        legacy_token(key, algorithm, kid, user_id, "access", 15),
+        legacy_token(key, algorithm, kid, user_id, "refresh", 1440),
+    )
+
+
+def measure_pairs(call, pairs):
+    started = time.perf_counter()
+    for i in range(pairs):
+        call(i)
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    peak = 0
+    for i in range(PAIRS_ALLOC):
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        call(i)
+        peak += tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    return elapsed, peak / PAIRS_ALLOC
+
+
+def main():
+    rows = []
+    for algorithm, pairs in PAIRS.items():
+        if algorithm == "HS256":
+            key, kid = SECRET, "default"
+            issuer = TokenIssuer(900, 86400, secret=SECRET, algorithm=algorithm, kid=kid)
+        else:
+            ring = KeyRing(algorithm)
+            ring.rotate()
+            signing_key = ring.signing_key()
+            key, kid = signing_key.private_key, signing_key.kid
+            issuer = TokenIssuer(900, 86400, key_ring=ring)
+        for name, call in (
+            ("jwt.encode", lambda i: legacy_pair(key, algorithm, kid, i)),
+            ("TokenIssuer", lambda i: issuer.issue_pair(i)),
+        ):
+            elapsed, peak = measure_pairs(call, pairs)
+            rows.append([
+                algorithm,
+                name,
+                f"{pairs * 2 / elapsed:,.0f}",
+                f"{elapsed / pairs * 1_000_000:.1f}",
+                f"{peak:,.0f}",
+            ])
+    print_table(["alg", "mode", "tokens/s", "us/pair", "peak B/pair"], rows)
+
+
+if __name__ == "__main__":
+    main()
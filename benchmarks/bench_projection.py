@@ -0,0 +1,52 @@
+"""
+Чтение ORM-объектов против проекции колонок (columns=[...]).
+Считает строки в секунду и байты, выделенные на строку (tracemalloc, пик).
+
+Run:
+    python -m benchmarks.bench_projection
+"""
+import asyncio
+import time
+import tracemalloc
+
+from .common import BenchItemRepository, setup_database, teardown_database, fill, print_table
+
+
+ROWS = 20_000
+REPEAT = 5
+
+
+async def run(factory, name, columns):
+    async def call():
+        async with factory() as session:
+            return await BenchItemRepository(session).get_many_by_field("group_id", 0, limit=ROWS, columns=columns)
+
+    await call()
+    tracemalloc.start()
+    rows = await call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    for _ in range(REPEAT):
+        await call()
+    elapsed = (time.perf_counter() - started) / REPEAT
+    return [name, len(rows), f"{len(rows) / elapsed:,.0f}", f"{peak / len(rows):,.0f}"]
+
+
+async def main():
+    engine, factory = await setup_database()
+    try:
+        await fill(factory, ROWS, groups=1)
+        table = [
+            await run(factory, "ORM entities", None),
+            await run(factory, "columns=[id, name]", ["id", "name"]),
+            await run(factory, "columns=[id]", ["id"]),
+        ]
+    finally:
+        await teardown_database(engine)
+    print_table(["read path", "rows", "rows/sec", "bytes/row"], table)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
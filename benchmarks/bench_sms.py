@@ -0,0 +1,48 @@
+"""
+Пропускная способность очереди SMS на FakeSmsProvider (без сети): 
+провайдер отвечает за LATENCY на запрос, сравниваются число воркеров и размер пачки.
+Задержка - от постановки в очередь до приема провайдером.
+
+Run:
+    python -m benchmarks.bench_sms
+"""
+import asyncio
+import time
+
+from shared.sms import FakeSmsProvider, SmsOutbox
+
+from .common import print_table
+
+
+MESSAGES = 500
+LATENCY = 0.02
+CASES = [(1, 1), (4, 1), (16, 1), (1, 50), (4, 50)]
+
+
+async def run(workers, batch_size):
+    outbox = SmsOutbox(FakeSmsProvider(latency=LATENCY, max_batch=batch_size), workers=workers)
+    started = time.perf_counter()
+    outbox.start()
+    for i in range(MESSAGES):
+        outbox.enqueue(f"7999{i:07d}", "Код подтверждения: 1234")
+    await outbox.drain()
+    elapsed = time.perf_counter() - started
+    await outbox.stop()
+    report = outbox.report()
+    return [
+        workers,
+        batch_size,
+        f"{MESSAGES / elapsed:,.0f}",
+        report["batches"],
+        f"{report['latency_p50_ms']:.0f}",
+        f"{report['latency_p95_ms']:.0f}",
+    ]
+
+
+async def main():
+    rows = [await run(workers, batch_size) for workers, batch_size in CASES]
+    print_table(["workers", "batch", "msg/s", "requests", "p50 ms", "p95 ms"], rows)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
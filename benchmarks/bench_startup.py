@@ -0,0 +1,100 @@
+"""
+Время холодного старта сервисов: `python -X importtime -c "import main"`
+в каталоге сервиса (как uvicorn импортирует приложение в каждом воркере).
+Каждый сервис импортируется RUNS раз в новом процессе, берется медиана
+cumulative времени модуля main. Выход с кодом 1, если медиана больше бюджета.
+
+Импорт main не читает настройки (env / .env) - они читаются в lifespan,
+поэтому замер не требует окружения сервиса.
+
+Run:
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup auth=900 vpn=600   # свои бюджеты, мс
+"""
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from .common import print_table
+
+
+ROOT = Path(__file__).parent.parent
+RUNS = 5
+TOP = 3
+# Бюджет импорта main, мс
+BUDGETS_MS = {
+    "auth" : 1500,
+    "vpn" : 900,
+    "telegram_bot" : 3500,
+}
+
+
+def import_times(service : str) -> Tuple[float, List[Tuple[float, str]]]:
+    """
+    Один импорт main сервиса в новом процессе
+    Returns:
+        (total_ms, modules) : cumulative время main и self время модулей проекта
+    """
+    env = {**os.environ, "PYTHONPATH" : os.pathsep.join(filter(None, [str(ROOT), os.environ.get("PYTHONPATH")]))}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=ROOT / "services" / service,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import main ({service}) failed:\n{result.stderr[-2000:]}")
+    total, modules = 0.0, []
+    local = {path.stem for path in (ROOT / "services" / service).iterdir()} | {"shared"}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        if name == "main":
+            total = int(cumulative_us) / 1000
+        elif name.split(".")[0] in local:
+            modules.append((int(self_us) / 1000, name))
+    return total, modules
+
+
+def parse_budgets(args : List[str]) -> Dict[str, float]:
+    budgets = dict(BUDGETS_MS)
+    for arg in args:
+        service, _, budget = arg.partition("=")
+        budgets[service] = float(budget)
+    return budgets
+
+
+def main() -> int:
+    budgets = parse_budgets(sys.argv[1:])
+    rows, failed = [], []
+    for service, budget in budgets.items():
+        import_times(service)  # прогрев: компиляция .pyc
+        runs = [import_times(service) for _ in range(RUNS)]
+        median = statistics.median(total for total, _ in runs)
+        slowest = sorted(runs[-1][1], reverse=True)[:TOP]
+        ok = median <= budget
+        if not ok:
+            failed.append(service)
+        rows.append([
+            service,
+            f"{median:.0f}",
+            f"{min(total for total, _ in runs):.0f}",
+            f"{budget:.0f}",
+            "ok" if ok else "OVER",
+            ", ".join(f"{name} {ms:.1f}" for ms, name in slowest),
+        ])
+    print_table(["service", "median ms", "min ms", "budget ms", "status", "slowest own modules (self ms)"], rows)
+    if failed:
+        print(f"Import time over budget: {', '.join(failed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
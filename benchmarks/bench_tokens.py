@@ -0,0 +1,67 @@
+"""
+Проверка JWT на горячем пути /authorized: jwt.decode на каждый запрос (как раньше) 
+против кеша проверенных токенов (VerifiedTokenCache). 
+Холодный кеш - каждый токен проверяется впервые (decode + запись в кеш), 
+теплый - повторные проверки тех же токенов.
+
+Run:
+    python -m benchmarks.bench_tokens
+"""
+import time
+
+import jwt
+
+from shared.tokens import VerifiedTokenCache
+
+from .common import print_table
+
+
+SECRET = "bench-secret-key-bench-secret-key"
+TOKENS = 1_000
+CALLS = 100_000
+
+
+def decode(token):
+    return jwt.decode(token, SECRET, algorithms=["HS256"])
+
+
+def cached(cache, token):
+    claims = cache.get(token, namespace=SECRET)
+    if claims is None:
+        claims = decode(token)
+        cache.put(token, claims, namespace=SECRET)
+    return claims
+
+
+def run(name, call, tokens):
+    started = time.perf_counter()
+    for i in range(CALLS):
+        call(tokens[i % len(tokens)])
+    elapsed = time.perf_counter() - started
+    return [name, f"{CALLS / elapsed:,.0f}", f"{elapsed / CALLS * 1_000_000:.2f}"]
+
+
+def main():
+    exp = int(time.time()) + 3600
+    tokens = [
+        jwt.encode({"user_id" : i, "jti" : f"jti-{i}", "type" : "access", "exp" : exp}, SECRET, algorithm="HS256")
+        for i in range(TOKENS)
+    ]
+    unique = [
+        jwt.encode({"user_id" : i, "jti" : f"cold-{i}", "type" : "access", "exp" : exp}, SECRET, algorithm="HS256")
+        for i in range(CALLS)
+    ]
+    warm_cache = VerifiedTokenCache()
+    for token in tokens:
+        cached(warm_cache, token)
+    cold_cache = VerifiedTokenCache(maxsize=CALLS)
+    rows = [
+        run("jwt.decode", decode, tokens),
+        run("cache cold", lambda token: cached(cold_cache, token), unique),
+        run("cache warm", lambda token: cached(warm_cache, token), tokens),
+    ]
+    print_table(["verification", "verifications/s", "us/verification"], rows)
+
+
+if __name__ == "__main__":
+    main()
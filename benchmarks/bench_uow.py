@@ -0,0 +1,123 @@
+"""
+Накладные расходы входа/выхода BaseUnitOfWork без БД (сессия - заглушка).
+Сравнивает ленивые репозитории с прежним созданием всех репозиториев на каждый вход
+и кеш классов DisposableRepository с созданием класса на каждый get_repository().
+
+Run:
+    python -m benchmarks.bench_uow [запросов в секунду]
+"""
+import sys
+import time
+import asyncio
+import logging
+
+from shared.database.base import BaseUnitOfWork
+from shared.database.loader import EntityLoader
+
+from .common import BenchItemRepository, print_table
+
+
+REPOSITORIES = 10
+CALLS = 20_000
+
+
+class FakeSession:
+    def __init__(self):
+        self.info = {}
+
+    async def connection(self, **kwargs):
+        pass
+
+    async def begin(self):
+        pass
+
+    async def commit(self):
+        pass
+
+    async def aclose(self):
+        pass
+
+    def in_transaction(self):
+        return False
+
+
+class BenchUoW(BaseUnitOfWork):
+    def __init__(self):
+        super().__init__(session_factory=FakeSession)
+        for i in range(REPOSITORIES):
+            self.add_repo(f"r{i}", BenchItemRepository)
+
+
+class EagerBenchUoW(BenchUoW):
+    """Прежнее поведение: все репозитории создаются на входе и удаляются на выходе"""
+
+    async def _open_session(self, read_only=False):
+        session = await super()._open_session(read_only)
+        for name, repo_class in self._repos.items():
+            repository = repo_class(session)
+            repository.loader = EntityLoader(repository)
+            self.__dict__[name] = repository
+            self._active_repos.append(name)
+        return session
+
+
+def legacy_get_repository(uow, name):
+    repo_class = uow._repos[f"{name}_repository"]
+    temp_session = uow._session_factory()
+
+    class DisposableRepository(repo_class):
+        def __init__(self, session, cleanup_callback):
+            super().__init__(session)
+            self._cleanup_callback = cleanup_callback
+
+    async def cleanup():
+        await temp_session.aclose()
+
+    return DisposableRepository(temp_session, cleanup)
+
+
+async def per_call_us(call):
+    started = time.perf_counter()
+    for _ in range(CALLS):
+        await call()
+    return (time.perf_counter() - started) / CALLS * 1_000_000
+
+
+async def main(rate):
+    # debug-логи транзакций на каждой итерации исказят замер
+    logging.getLogger("app").setLevel(logging.WARNING)
+
+    async def enter_exit(uow_class, method):
+        async def call():
+            uow = uow_class()
+            async with getattr(uow, method)() as u:
+                u.r0_repository
+        return call
+
+    async def get_repository(legacy):
+        uow = BenchUoW()
+
+        async def call():
+            if legacy:
+                legacy_get_repository(uow, "r0")
+            else:
+                uow.get_repository("r0")
+        return call
+
+    rows = []
+    for name, call in (
+        ("readonly eager", await enter_exit(EagerBenchUoW, "readonly")),
+        ("readonly lazy", await enter_exit(BenchUoW, "readonly")),
+        ("transaction eager", await enter_exit(EagerBenchUoW, "transaction")),
+        ("transaction lazy", await enter_exit(BenchUoW, "transaction")),
+        ("get_repository new class", await get_repository(True)),
+        ("get_repository cached", await get_repository(False)),
+    ):
+        us = await per_call_us(call)
+        rows.append([name, f"{us:.1f}", f"{us * rate / 1000:.1f}"])
+    print(f"{REPOSITORIES} repositories, 1 used per unit of work, {rate} rps")
+    print_table(["operation", "us/call", f"CPU ms/s @ {rate} rps"], rows)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000))
@@ -0,0 +1,72 @@
+"""
+UPDATE / DELETE: старая реализация (SELECT + flush + refresh) против одного запроса с RETURNING.
+Считает SQL запросы на вызов и среднюю задержку.
+
+Run:
+    python -m benchmarks.bench_write
+"""
+import asyncio
+import time
+
+from sqlalchemy import select
+
+from .common import (BenchItem, BenchItemRepository, VersionedBenchItemRepository, StatementCounter,
+                     setup_database, teardown_database, fill, print_table)
+
+
+ROWS = 2_000
+CALLS = 500
+
+
+async def legacy_update(session, id, **kwargs):
+    result = await session.execute(select(BenchItem).where(BenchItem.id == id))
+    entity = result.scalar_one_or_none()
+    for field, value in kwargs.items():
+        setattr(entity, field, value)
+    await session.flush()
+    await session.refresh(entity)
+    return entity
+
+
+async def legacy_delete(session, id):
+    result = await session.execute(select(BenchItem).where(BenchItem.id == id))
+    entity = result.scalar_one_or_none()
+    await session.delete(entity)
+    await session.flush()
+    return True
+
+
+async def run(engine, factory, name, call):
+    async with factory() as session:
+        with StatementCounter(engine) as counter:
+            started = time.perf_counter()
+            for i in range(1, CALLS + 1):
+                await call(session, i)
+            elapsed = time.perf_counter() - started
+        await session.rollback()
+    return [name, f"{counter.count / CALLS:.1f}", f"{elapsed / CALLS * 1000:.3f}"]
+
+
+async def main():
+    engine, factory = await setup_database()
+    try:
+        await fill(factory, ROWS)
+        rows = [
+            await run(engine, factory, "legacy update",
+                      lambda s, i: legacy_update(s, i, name=f"u-{i}")),
+            await run(engine, factory, "update RETURNING",
+                      lambda s, i: BenchItemRepository(s).update(i, name=f"u-{i}")),
+            await run(engine, factory, "update + version",
+                      lambda s, i: VersionedBenchItemRepository(s).update(i, expected_version=1, name=f"u-{i}")),
+            await run(engine, factory, "legacy delete",
+                      lambda s, i: legacy_delete(s, i)),
+            await run(engine, factory, "delete RETURNING",
+                      lambda s, i: BenchItemRepository(s).delete(i)),
+        ]
+    finally:
+        await teardown_database(engine)
+    print_table(["operation", "statements/call", "ms/call"], rows)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -3,14 +3,23 @@ from fastapi.responses import JSONResponse, Response
 from fastapi.requests import Request
 
 from schema import UserRegisterRequest, ServiceUserRegisterRequest
-from depends import ServiceDep
+from depends import ServiceDep, get_rate_limiter
+from shared.config import config
 from shared.depends import errors
+from shared.ratelimit import rate_limit
 
 main_router = APIRouter(prefix="/api/v1/auth")
 
 
+def _rate_limit_enabled() -> bool:
+    return config.RATE_LIMIT_ENABLED
+
+
 @errors()
-@main_router.post("/register")
+@main_router.post(
+    "/register", 
+    dependencies=[rate_limit(get_rate_limiter, "register", lambda: config.RATE_LIMIT_REGISTER, _rate_limit_enabled)]
+    )
 async def login(
     request : Request,  
     data : UserRegisterRequest, 
@@ -32,7 +41,10 @@ async def login(
             )
 
 
-@main_router.post("/login")
+@main_router.post(
+    "/login", 
+    dependencies=[rate_limit(get_rate_limiter, "login", lambda: config.RATE_LIMIT_LOGIN, _rate_limit_enabled)]
+    )
 async def login(): 
     """Вход в систему"""
 
@@ -21,9 +21,11 @@ class AuthService(BaseService[AUoW]):
         super().__init__(uow_factory)
         self._user_serializer = user_serializer() or UserModelSerializer()
 
+    # retries/SERIALIZABLE (гонка двух регистраций одного телефона) - вместе с телом метода
     @BaseService.transactional()
     async def register(self, data : ServiceUserRegisterRequest):
         logger.debug(f"Попытка login {data.phone_number} - {data.password}")
+        # код подтверждения: start_verification(get_verification_store(), phone, ttl, get_sms_outbox())
         
     
     @BaseService.transactional()
@@ -36,7 +38,10 @@ class AuthService(BaseService[AUoW]):
         pass
 
     async def authorized(self):
+        # после проверки токена: get_session_activity().touch(session.id) - 
+        # last_activity пишется пачками, без UPDATE на каждый запрос
         pass
 
     async def refresh(self):
+        # как в authorized: get_session_activity().touch(session.id)
         pass
\ No newline at end of file
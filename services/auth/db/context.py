@@ -1,44 +1,57 @@
-from typing import AsyncGenerator
-from sqlalchemy import text
-from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
-from contextlib import asynccontextmanager
+from functools import lru_cache
+from sqlalchemy.ext.asyncio import AsyncEngine
 
 from shared.config import config
-from shared.logger.logger import logger
-
-
-engine = create_async_engine(
-    url=config.AsyncDataBaseUrl,
-    echo = False,
-    pool_size = 20,
-    max_overflow=10,        
-    pool_timeout=30,      
-#   pool_recycle=1800,      
-    pool_pre_ping=True,     
-    )
-
-session_factory = async_sessionmaker(
-    bind=engine,
-    expire_on_commit=False, 
-    class_=AsyncSession
-    )
+from shared.database.routing import EngineRouter
+from shared.database import instrumentation
+from shared.database.pool import PoolMonitor, build_engine
+
+
+# Движки, пулы и мониторы создаются при первом обращении (lifespan), а не при импорте:
+# импорт не читает настройки и не пишет в лог
+
+
+def _create_engine(url : str) -> AsyncEngine:
+    return instrumentation.instrument_engine(build_engine(
+        url,
+        pool_size=config.DB_POOL_SIZE,
+        max_overflow=config.DB_POOL_MAX_OVERFLOW,
+        pool_timeout=config.DB_POOL_TIMEOUT,
+        pool_recycle=config.DB_POOL_RECYCLE,
+        pre_ping=config.DB_POOL_PRE_PING,
+        statement_cache_size=config.DB_STATEMENT_CACHE_SIZE,
+        pgbouncer=config.DB_PGBOUNCER,
+        ))
+
+
+@lru_cache(maxsize=None)
+def get_router() -> EngineRouter:
+    """primary + реплики: readonly() читает из реплик, transaction() пишет в primary"""
+    instrumentation.configure(
+        slow_query_ms=config.DB_SLOW_QUERY_MS or None,
+        detect_n_plus_one=config.DB_NPLUSONE_DETECT,
+        n_plus_one_threshold=config.DB_NPLUSONE_THRESHOLD,
+        n_plus_one_raise=config.DB_NPLUSONE_RAISE,
+        )
+    return EngineRouter(
+        primary=_create_engine(config.AsyncDataBaseUrl),
+        replicas=[_create_engine(url) for url in config.AsyncReplicaDataBaseUrls],
+        strategy=config.DB_REPLICA_STRATEGY,
+        max_lag=config.DB_REPLICA_MAX_LAG,
+        expire_on_commit=False,
+        )
+
+
+@lru_cache(maxsize=None)
+def get_pool_monitor() -> PoolMonitor:
+    """Фоновая проверка живости соединений вместо pool_pre_ping"""
+    router = get_router()
+    return PoolMonitor(
+        {node.name : node.engine for node in [router.primary, *router.replicas]},
+        interval=config.DB_POOL_CHECK_INTERVAL,
+        )
 
 
 async def get_session():
-    async with session_factory() as session:
+    async with get_router()() as session:
         yield session
-
-
-
-async def db_health_check():
-    logger.debug("Тестируем подключение к бд")
-    try:
-        session = session_factory()
-        logger.debug("Установливаем сессию")
-        result = await session.execute(text("SELECT 1"))
-        logger.debug("Выполняем запрос")
-        return result.scalar()
-    except Exception  as e:
-        raise e
-    finally:
-        await session.aclose()
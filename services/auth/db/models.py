@@ -29,7 +29,9 @@ class User(AuthBase):
         "UserSession", 
         back_populates="user", 
         cascade="delete-orphan", 
-        lazy="selectin"
+        # У пользователя могут быть сотни сессий: грузим только явно
+        # (UserRepository.get_by_id(..., with_relations="with_sessions") или постранично)
+        lazy="raise"
         )
     
 
@@ -50,5 +52,6 @@ class UserSession(AuthBase):
         )
     user : Mapped["User"] = relationship(
         "User", 
-        back_populates="sessions"
+        back_populates="sessions",
+        lazy="raise_on_sql"
         )
\ No newline at end of file
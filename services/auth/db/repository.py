@@ -1,13 +1,68 @@
+from functools import lru_cache
+from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from .models import  User, UserSession
-from .context import session_factory
+from .context import get_router
 
+from shared.config import config
+from shared.cache import build_cache
 from shared.database.base import BaseRepository, BaseUnitOfWork
+from shared.database.cache import EntityCache
+from shared.database.pagination import Page
+from shared.database.write_behind import ActivityBuffer
+
+
+@lru_cache(maxsize=None)
+def get_user_cache() -> Optional[EntityCache]:
+    """
+    Пользователей читают намного чаще, чем меняют: кешируем по id, телефону и telegram_id.
+    None, если ENTITY_CACHE_ENABLED выключен
+    """
+    if not config.ENTITY_CACHE_ENABLED:
+        return None
+    cache = EntityCache(
+        build_cache(
+            maxsize=config.ENTITY_CACHE_SIZE,
+            ttl=config.ENTITY_CACHE_TTL,
+            redis_url=config.RedisUrl if config.ENTITY_CACHE_REDIS else None,
+            redis_ttl=config.ENTITY_CACHE_REDIS_TTL,
+            prefix="auth:entity:",
+            ),
+        fields=("phone_number", "telegram_id"),
+        # хеш пароля не должен лежать в Redis
+        exclude=("hash_password",),
+        )
+    cache.track(User)
+    return cache
+
+
+@lru_cache(maxsize=None)
+def get_session_activity() -> ActivityBuffer:
+    """
+    last_activity обновляется на каждый авторизованный запрос: копим отметки в памяти 
+    и пишем одним UPDATE ... FROM (VALUES ...) вместо UPDATE на запрос.
+    Отметки ставят AuthService.authorized/refresh (touch(session_id)) - пока эти 
+    методы не реализованы, буфер ничего не пишет и очистка сессий опирается 
+    на last_activity, записанный при создании сессии
+    """
+    return ActivityBuffer(
+        get_router(),
+        UserSession,
+        "last_activity",
+        max_staleness=config.SESSION_ACTIVITY_MAX_STALENESS,
+        max_pending=config.SESSION_ACTIVITY_MAX_PENDING,
+        )
 
 
 class UserRepository(BaseRepository[User]):
+    # None - кеш из настроек (get_user_cache), подкласс может задать свой
+    cache : Optional[EntityCache] = None
+    load_profiles = {"with_sessions" : ("sessions",)}
+
     def __init__(self, session : AsyncSession):
+        if self.cache is None:
+            self.cache = get_user_cache()
         super().__init__(session=session, model=User)
 
 
@@ -15,6 +70,23 @@ class UserSessionRepository(BaseRepository[UserSession]):
     def __init__(self, session : AsyncSession):
         super().__init__(session=session, model=UserSession)
 
+    async def get_user_sessions(
+            self, 
+            user_id : int, 
+            cursor : Optional[str] = None, 
+            limit : int = 50, 
+            order_by : str = "id"
+            ) -> Page[UserSession]:
+        """
+        Сессии пользователя постранично (keyset по индексу user_id)
+        Args:
+            user_id : id пользователя
+            cursor : next_cursor предыдущей страницы
+            limit : размер страницы
+            order_by : поле сортировки (id, last_activity)
+        """
+        return await self.get_page_by_field("user_id", user_id, cursor=cursor, limit=limit, order_by=order_by)
+
 
 class AUoW(BaseUnitOfWork):
     
@@ -24,7 +96,7 @@ class AUoW(BaseUnitOfWork):
     session_repository : 'UserSessionRepository'
 
     def __init__(self):
-        super().__init__(session_factory=session_factory, schema="auth")
+        super().__init__(session_factory=get_router(), schema="auth")
         self.add_repo("user", UserRepository)
         self.add_repo("session", UserSessionRepository)
 
@@ -1,3 +1,4 @@
+from functools import lru_cache
 from typing import Annotated
 from fastapi import Depends
 
@@ -5,13 +6,75 @@ from buisnes import AuthService
 from db.repository import AUoW
 from serializer import UserModelSerializer
 
+from shared.config import config
+from shared.ratelimit import BaseRateLimiter, build_rate_limiter, trust_proxies
+from shared.sms import FakeSmsProvider, SmsOutbox
+from shared.verification import BaseVerificationStore, build_verification_store
+
+
+# Сервис не хранит состояние запроса (UoW передается через contextvars) - 
+# один экземпляр на процесс
+auth_service = AuthService(
+    uow_factory=AUoW,
+    user_serializer=UserModelSerializer
+    )
+
 
 async def _get_service():
-    return AuthService(
-        uow_factory=AUoW,
-        user_serializer=UserModelSerializer
-        )
+    return auth_service
 
 ServiceDep = Annotated[AuthService, Depends(_get_service)]
 
 
+# Хранилище сессий, ограничитель и очередь SMS создаются при первом обращении 
+# (lifespan), а не при импорте: клиенты Redis и воркеры не нужны при импорте модуля
+
+
+@lru_cache(maxsize=None)
+def get_verification_store() -> BaseVerificationStore:
+    """
+    Сессии верификации по SMS: в Redis реплики видят сессии друг друга, 
+    проверка кода - один атомарный запрос
+    """
+    return build_verification_store(
+        redis_url=config.RedisUrl if config.SMS_SESSION_REDIS else None,
+        max_attempts=config.SMS_MAX_ATTEMPTS
+        )
+
+
+async def _get_verification_store():
+    return get_verification_store()
+
+VerificationStoreDep = Annotated[BaseVerificationStore, Depends(_get_verification_store)]
+
+
+@lru_cache(maxsize=None)
+def get_rate_limiter() -> BaseRateLimiter:
+    """
+    Лимиты регистрации и входа: повторы из одной реплики отсекаются локально, 
+    общий счетчик в Redis - одним атомарным запросом
+    """
+    # за nginx адрес соединения - адрес nginx, клиент приходит в X-Real-IP
+    trust_proxies(config.RATE_LIMIT_TRUSTED_PROXIES)
+    return build_rate_limiter(
+        maxsize=config.RATE_LIMIT_LOCAL_SIZE,
+        redis_url=config.RedisUrl if config.RATE_LIMIT_REDIS else None
+        )
+
+
+@lru_cache(maxsize=None)
+def get_sms_outbox() -> SmsOutbox:
+    """
+    Отправка SMS не блокирует запрос: сообщения уходят через очередь с пулом воркеров.
+    Реального провайдера пока нет - FakeSmsProvider, lifespan пишет об этом critical в лог.
+    Сообщения ставит utils.sms.start_verification(..., outbox=get_sms_outbox()) - 
+    у нее пока нет вызовов: AuthService.register не реализован, очередь пуста
+    """
+    return SmsOutbox(
+        provider=FakeSmsProvider(),
+        workers=config.SMS_WORKERS,
+        batch_size=config.SMS_BATCH_SIZE or None,
+        max_queue=config.SMS_QUEUE_SIZE,
+        max_attempts=config.SMS_SEND_ATTEMPTS,
+        backoff=config.SMS_RETRY_BACKOFF
+        )
@@ -0,0 +1,45 @@
+import httpx
+from redis.asyncio import Redis
+
+from functools import lru_cache
+
+from db.context import get_pool_monitor
+from shared.config import config
+from shared.health import HealthMonitor, http_probe, redis_probe
+
+
+@lru_cache(maxsize=None)
+def get_health_monitor() -> HealthMonitor:
+    return HealthMonitor(
+        interval=config.HEALTH_INTERVAL,
+        timeout=config.HEALTH_TIMEOUT,
+        history=config.HEALTH_HISTORY,
+        )
+
+# Клиенты проверок создаются в lifespan (register_dependencies), а не при импорте:
+# httpx.AsyncClient при создании строит SSL контекст
+redis_client : Redis | None = None
+http_client : httpx.AsyncClient | None = None
+
+
+def register_dependencies() -> None:
+    """Зависимости опрашиваются раз в HEALTH_INTERVAL, сколько бы раз ни опрашивали эндпоинты"""
+    global redis_client, http_client
+    if redis_client is not None:
+        return
+    redis_client = Redis.from_url(config.RedisUrl, socket_timeout=config.HEALTH_TIMEOUT)
+    http_client = httpx.AsyncClient(timeout=config.HEALTH_TIMEOUT)
+    health_monitor = get_health_monitor()
+    # тот же SELECT 1, что у PoolMonitor: primary проверяется один раз за раунд
+    health_monitor.add("postgres", get_pool_monitor().probe("primary"))
+    health_monitor.add("redis", redis_probe(redis_client), critical=config.ENTITY_CACHE_REDIS or config.SMS_SESSION_REDIS)
+    for name, url in config.HealthSiblings.items():
+        health_monitor.add(name, http_probe(http_client, url), critical=False)
+
+
+async def close_health_clients() -> None:
+    global redis_client, http_client
+    if redis_client is not None:
+        await redis_client.aclose()
+        await http_client.aclose()
+    redis_client = http_client = None
@@ -4,18 +4,58 @@ from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 
 from api import main_router
-from db.context import db_health_check
+from db.context import get_router, get_pool_monitor
+from db.repository import get_user_cache, get_session_activity
+from health import get_health_monitor, register_dependencies, close_health_clients
+from depends import get_verification_store, get_rate_limiter, get_sms_outbox
+from maintenance import get_session_purge, get_key_rotation
+from utils.jwt import get_key_ring
 
+from shared.database.retry import retry_stats
+from shared.database.instrumentation import QueryStatsMiddleware
+from shared.sms import FakeSmsProvider
+from shared.config import config
 from shared.logger.logger import logger
 
 @asynccontextmanager
 async def lifespan(app : FastAPI):
     logger.info("Start auth service")
+    # Движки, клиенты Redis и фоновые задачи создаются здесь, а не при импорте модулей
+    key_ring = get_key_ring()
+    router, pool_monitor = get_router(), get_pool_monitor()
+    health_monitor, session_activity = get_health_monitor(), get_session_activity()
+    session_purge, key_rotation = get_session_purge(), get_key_rotation()
+    verification_store, rate_limiter, sms_outbox = get_verification_store(), get_rate_limiter(), get_sms_outbox()
+    warmed = await router.warmup(config.DB_POOL_WARMUP)
+    logger.info(f"Прогрев пулов соединений: {warmed}")
+    pool_monitor.start()
+    router.start()
+    register_dependencies()
+    await health_monitor.start()
+    session_activity.start()
+    session_purge.start()
+    sms_outbox.start()
+    if isinstance(sms_outbox.provider, FakeSmsProvider):
+        logger.critical("SMS провайдер не настроен (FakeSmsProvider): коды подтверждения никуда не отправляются")
+    if key_ring is not None:
+        key_ring.rotate()
+        key_rotation.start()
     yield
+    await key_rotation.stop()
+    await sms_outbox.stop()
+    await session_purge.stop()
+    await session_activity.stop()
+    await health_monitor.stop()
+    await close_health_clients()
+    await verification_store.aclose()
+    await rate_limiter.aclose()
+    await pool_monitor.stop()
+    await router.dispose()
     logger.info("Shutdown auth service")
 
 
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(QueryStatsMiddleware)
 
 @app.get("/health")
 async def health():
@@ -24,26 +64,98 @@ async def health():
         status_code=status.HTTP_200_OK
         )
 
+@app.get("/health/live")
+async def health_live():
+    """Liveness: процесс жив, зависимости не учитываются"""
+    liveness = get_health_monitor().liveness()
+    return JSONResponse(
+        content=liveness, 
+        status_code=status.HTTP_200_OK if liveness["alive"] else status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+
+
+@app.get("/health/ready")
+async def health_ready():
+    """Readiness: доступны критичные зависимости (последняя фоновая проверка)"""
+    readiness = get_health_monitor().readiness()
+    return JSONResponse(
+        content=readiness, 
+        status_code=status.HTTP_200_OK if readiness["ready"] else status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+
+
+@app.get("/health/dependencies")
+async def health_dependencies():
+    """Состояние зависимостей с историей задержек"""
+    return JSONResponse(content=get_health_monitor().report(), status_code=status.HTTP_200_OK)
+
+
 @app.get("/db/health")
 async def db_health():
-    try:
-        result = await db_health_check()
-        if result == 1:
-            return  JSONResponse(
-            content={"detail" : "Auth service the connection to the database is established"}, 
-            status_code=status.HTTP_200_OK
-            )
-        logger.warn(f"Ошибка подключения к бд : {result}")
+    """Состояние БД по последней фоновой проверке, без запроса к БД"""
+    result = get_health_monitor().status("postgres")
+    if result is not None and result.ok:
         return JSONResponse(
-            content={"detail" : "Auth service the connection to the database is failed !"}, 
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE
-            )
-    except Exception as e:
-        logger.warn(f"Ошибка подключения к бд {str(e)}")
-        return JSONResponse(
-            content={"detail" : "Auth service the connection to the database ian unforeseen event!"}, 
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+            content={"detail" : "Auth service the connection to the database is established", "latency_ms" : result.latency_ms}, 
+            status_code=status.HTTP_200_OK
             )
+    return JSONResponse(
+        content={"detail" : "Auth service the connection to the database is failed !", "error" : result.error if result else None}, 
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+
+
+@app.get("/db/pools")
+async def db_pools():
+    """Состояние пулов соединений primary и реплик, счетчики повторов транзакций"""
+    return JSONResponse(
+        content={**get_router().pool_stats(), "liveness" : get_pool_monitor().state, "session_activity" : get_session_activity().stats.as_dict(), "retries" : retry_stats.as_dict()}, 
+        status_code=status.HTTP_200_OK
+        )
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Счетчики кеша сущностей"""
+    user_cache = get_user_cache()
+    return JSONResponse(
+        content={"users" : user_cache.stats.as_dict() if user_cache is not None else None}, 
+        status_code=status.HTTP_200_OK
+        )
+
+
+@app.get("/.well-known/jwks.json")
+async def jwks():
+    """Открытые ключи подписи токенов для локальной проверки в других сервисах"""
+    key_ring = get_key_ring()
+    return JSONResponse(
+        content=key_ring.jwks() if key_ring is not None else {"keys" : []}, 
+        status_code=status.HTTP_200_OK,
+        headers={"Cache-Control" : "public, max-age=300"}
+        )
+
+
+@app.get("/maintenance/stats")
+async def maintenance_stats():
+    """Последний запуск очистки истекших сессий"""
+    session_purge = get_session_purge()
+    report = session_purge.last_result
+    return JSONResponse(
+        content={"sessions_purge" : {"runs" : session_purge.runs, "last" : report.as_dict() if report else None}}, 
+        status_code=status.HTTP_200_OK
+        )
+
+
+@app.get("/sms/stats")
+async def sms_stats():
+    """Очередь отправки SMS: глубина, повторы, задержка от постановки до отправки"""
+    return JSONResponse(content=get_sms_outbox().report(), status_code=status.HTTP_200_OK)
+
+
+@app.get("/ratelimit/stats")
+async def ratelimit_stats():
+    """Пропущенные и отклоненные запросы по группам лимитов"""
+    return JSONResponse(content=get_rate_limiter().stats.as_dict(), status_code=status.HTTP_200_OK)
 
 
 app.include_router(main_router)
@@ -0,0 +1,51 @@
+from datetime import timedelta
+from functools import lru_cache
+
+from sqlalchemy import DateTime, cast, func
+
+from db.context import get_router
+from db.models import UserSession
+from db.repository import UserSessionRepository
+from utils.jwt import get_key_ring
+
+from shared.config import config
+from shared.database.maintenance import PeriodicTask, PurgeReport, purge_in_batches
+
+
+async def purge_expired_sessions() -> PurgeReport:
+    """
+    Удалить сессии, refresh токен которых истек: 
+    last_activity обновляется при каждом обновлении токенов, 
+    сессия без активности дольше срока жизни refresh токена уже не может быть продлена.
+    Сессий без пользователя не бывает - user_id с ON DELETE CASCADE.
+    Граница считается в БД: last_activity пишется по ее часам (now()).
+    """
+    expired_before = cast(func.now(), DateTime) - timedelta(minutes=config.JWT_REFRESH_EXPIRE_MINETS)
+    return await purge_in_batches(
+        get_router(),
+        UserSessionRepository,
+        [UserSession.last_activity < expired_before],
+        name="auth.purge_expired_sessions",
+        batch_size=config.SESSION_PURGE_BATCH_SIZE,
+        pause=config.SESSION_PURGE_PAUSE,
+        )
+
+
+@lru_cache(maxsize=None)
+def get_session_purge() -> PeriodicTask:
+    return PeriodicTask(
+        "auth.purge_expired_sessions", 
+        purge_expired_sessions, 
+        interval=config.SESSION_PURGE_INTERVAL,
+        )
+
+
+async def rotate_signing_keys() -> bool:
+    """Ротация ключей подписи по сроку и подхват ключей, созданных другими репликами"""
+    key_ring = get_key_ring()
+    return key_ring.rotate() if key_ring is not None else False
+
+
+@lru_cache(maxsize=None)
+def get_key_rotation() -> PeriodicTask:
+    return PeriodicTask("auth.rotate_signing_keys", rotate_signing_keys, interval=3600)
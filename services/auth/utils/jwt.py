@@ -1,57 +1,70 @@
 import jwt
 import uuid
-from datetime import datetime, timedelta
-from typing import Literal
+from functools import lru_cache
+from typing import Optional
 
 from shared.logger.logger import logger
 from shared.config import config 
+from shared.tokens import ASYMMETRIC_ALGORITHMS, KeyRing, TokenIssuer, TokenPair, VerifiedTokenCache
 
 
-def _create_token(
-        kid: str, 
-        user_id: int, 
-        type: Literal["access", "refresh"], 
-        expire_minutes: int,
-        **kwargs
-        ) -> str:
-    
+# Кеш, кольцо ключей и издатель создаются при первом обращении, а не при импорте
+
+
+@lru_cache(maxsize=None)
+def get_token_cache() -> VerifiedTokenCache:
     """
-    Созданеие JWT токена 
-    Args:
-        kid (str): id ключа.
-        user_id (int): id владельца токена.
-        jti (UUID) : id токена
-        type (str): тип токена access || refresh
-        expire_minutes (int): время жизни токена
-    Returns:
-        str: JWT токен.
+    nginx проверяет через /authorized каждый защищенный запрос: один и тот же 
+    access токен приходит много раз за время жизни, проверяем подпись один раз
     """
-    
-    exp = datetime.now() + timedelta(minutes=expire_minutes)
-    jti = uuid.uuid4()
-    payload = {
-        "user_id": user_id,
-        "jti" : str(jti),
-        "type": type,
-        "exp": exp,
-        "iat": datetime.now()
-    }
-    payload.update(kwargs)
-    headers = {"kid": str(kid)}
-    token = jwt.encode(
-        payload=payload,
-        key=config.JWT_SECRET_KEY, 
-        algorithm=config.JWT_ALGORITM,  
-        headers=headers
-    )
-    return jti,  token
+    return VerifiedTokenCache(maxsize=config.JWT_CACHE_SIZE)
+
+
+@lru_cache(maxsize=None)
+def get_key_ring() -> Optional[KeyRing]:
+    """
+    EdDSA / RS256: подпись ключами из KeyRing, открытые ключи публикуются в JWKS 
+    и другие сервисы проверяют токены сами. HS256 (None) - общий секрет JWT_SECRET_KEY
+    """
+    if config.JWT_ALGORITM not in ASYMMETRIC_ALGORITHMS:
+        return None
+    if not config.JWT_KEYS_DIR:
+        # без общего каталога каждая реплика подписывала бы своим ключом, а после 
+        # перезапуска ключи терялись бы вместе с выданными токенами
+        raise RuntimeError(f"JWT_KEYS_DIR is required for {config.JWT_ALGORITM}")
+    return KeyRing(
+        algorithm=config.JWT_ALGORITM,
+        rotation_interval=config.JWT_KEY_ROTATION_DAYS * 86400,
+        retire_after=config.JWT_REFRESH_EXPIRE_MINETS * 60,
+        directory=config.JWT_KEYS_DIR,
+        )
+
+
+@lru_cache(maxsize=None)
+def get_issuer() -> TokenIssuer:
+    """Создается один раз: ключ подготовлен, заголовок сериализован заранее"""
+    return TokenIssuer(
+        access_ttl=config.JWT_ACCESS_EXPIRE_MINETS * 60,
+        refresh_ttl=config.JWT_REFRESH_EXPIRE_MINETS * 60,
+        key_ring=get_key_ring(),
+        secret=config.JWT_SECRET_KEY,
+        algorithm=config.JWT_ALGORITM,
+        kid=config.JWT_KID,
+        )
 
 
+def _ensure_signing_key() -> TokenIssuer:
+    """Издатель токенов; первый ключ кольца создается при первом выпуске токена"""
+    issuer = get_issuer()
+    if issuer.key_ring is not None and not len(issuer.key_ring):
+        issuer.key_ring.rotate()
+    return issuer
+
 
 def create_access_token(
         user_id: int, 
         **kwargs
-        ) -> str:
+        ) -> tuple[uuid.UUID, str]:
     
     """
     Создание access токена 
@@ -59,16 +72,10 @@ def create_access_token(
         user_id : id пользователя
         **kwargs : дополнителные данные для pyload
     Returns:
-        token : токен
+        (jti, token) : id и токен
     """
 
-    jti, token = _create_token(
-        kid=config.JWT_KID,
-        user_id=user_id, 
-        type="access", 
-        expire_minutes=config.JWT_ACCESS_EXPIRE_MINETS, 
-        **kwargs
-        )
+    jti, token, _ = _ensure_signing_key().issue(user_id, "access", **kwargs)
     return jti, token
     
 
@@ -76,7 +83,7 @@ def create_access_token(
 def create_refresh_token(    
         user_id: int, 
         **kwargs
-        ) -> str:
+        ) -> tuple[uuid.UUID, str]:
     
     """
     Создание refresh токена
@@ -84,40 +91,65 @@ def create_refresh_token(
         user_id : id пользователя
         **kwargs : дополнителные данные для pyload
     Returns:
-        token : токен
+        (jti, token) : id и токен
     """
 
-    jti, token = _create_token(
-        kid=config.JWT_KID,
-        user_id=user_id, 
-        type="refresh", 
-        expire_minutes=config.JWT_REFRESH_EXPIRE_MINETS, 
-        **kwargs
-        )
+    jti, token, _ = _ensure_signing_key().issue(user_id, "refresh", **kwargs)
     return jti, token
 
 
+def create_token_pair(
+        user_id: int, 
+        **kwargs
+        ) -> TokenPair:
+    
+    """
+    access и refresh токены одним вызовом (login, refresh)
+    Args:
+        user_id : id пользователя
+        **kwargs : дополнителные данные для pyload
+    Returns:
+        TokenPair : токены, их jti и exp
+    """
+
+    return _ensure_signing_key().issue_pair(user_id, **kwargs)
+
+
 def verefy_token(
         token : str, 
-        key : str
+        key : str | None = None
         ) -> dict | None:
     
     """
-    Валидация JWT токена
+    Валидация JWT токена (через кеш проверенных токенов)
     Args:
         token : токен
-        key : секретный ключ
+        key : секретный ключ HS256 (по умолчанию JWT_SECRET_KEY), 
+            с KeyRing ключ выбирается по kid токена
     Returns:
-        pyload : если токен валиден
+        pyload : если токен валиден и не отозван
     """
     
+    namespace = key or config.JWT_SECRET_KEY
+    token_cache = get_token_cache()
+    key_ring = get_key_ring()
+    pyload = token_cache.get(token, namespace=namespace)
+    if pyload is not None:
+        return pyload
     try:
+        if key_ring is not None:
+            signing_key = key_ring.get(jwt.get_unverified_header(token).get("kid"))
+            if signing_key is None:
+                logger.warn("Неизвестный kid токена!")
+                return None
+            verify_key, algorithm = signing_key.public_key, signing_key.algorithm
+        else:
+            verify_key, algorithm = namespace, config.JWT_ALGORITM
         pyload = jwt.decode(
             jwt=token, 
-            key=key, 
-            algorithms=[config.JWT_ALGORITM]
+            key=verify_key, 
+            algorithms=[algorithm]
             )
-        return pyload
     except jwt.InvalidSignatureError:
         logger.warn("Подпись недействительна!")
         return None
@@ -129,4 +161,20 @@ def verefy_token(
         return None
     except Exception as e:
         logger.warn(f"Ошибка проверки токена: {e}")
-        return None
\ No newline at end of file
+        return None
+    if token_cache.is_revoked(pyload.get("jti")):
+        logger.warn("Токен отозван!")
+        return None
+    token_cache.put(token, pyload, namespace=namespace)
+    return pyload
+
+
+def revoke_token(jti : str, exp : float | None = None) -> None:
+    """
+    Отозвать токен по jti: logout, ротация refresh токена.
+    Токен сразу перестает проходить verefy_token, даже если он уже в кеше.
+    Args:
+        jti : id токена
+        exp : exp токена - до этого времени jti помнится как отозванный
+    """
+    get_token_cache().revoke(jti, exp)
@@ -4,6 +4,9 @@ import uuid
 import hashlib
 from datetime import datetime, timedelta
 
+from shared.sms import SmsOutbox
+from shared.verification import BaseVerificationStore, VerifyResult
+
 
 secret_key = b"scrt"
 
@@ -65,6 +68,48 @@ def verify_session(input_session_data : dict, original_session_data : dict) -> b
         return False
 
 
+async def start_verification(
+        store : BaseVerificationStore, 
+        phone : str, 
+        ttl : int, 
+        outbox : SmsOutbox | None = None
+        ) -> dict:
+
+    """
+    Создание сессии верификации и сохранение ее в хранилище
+    Args:
+        store : хранилище сессий
+        phone : номер телефона
+        ttl : время жизни сессии в минутах
+        outbox : очередь отправки SMS, если задана - код ставится в нее (без ожидания провайдера)
+    Returns:
+        response : id сессии, телефон и код для отправки по SMS
+    """
+
+    session, response = generate_session_pair(phone, ttl)
+    await store.save(session, ttl=ttl * 60)
+    if outbox is not None:
+        outbox.enqueue(phone, f"Код подтверждения: {response['code']}")
+    return response
+
+
+async def check_verification(store : BaseVerificationStore, input_session_data : dict) -> VerifyResult:
+
+    """
+    Проверка введенного кода за одно обращение к хранилищу: подпись 
+    считается здесь, сверка и погашение сессии - атомарно в хранилище
+    Args:
+        store : хранилище сессий
+        input_session_data : id, phone и code из запроса
+    Returns:
+        result : статус проверки (result.ok - код верный, сессия погашена)
+    """
+
+    hash_code = _hash_code(input_session_data["code"])
+    sign = _sign_session(input_session_data["id"], input_session_data["phone"], hash_code)
+    return await store.check_and_consume(input_session_data["id"], sign)
+
+
 def _generate_verification_code(length : int = 4) -> str:
 
     """
@@ -132,6 +177,3 @@ def _verefy_sign(session_data : dict, sign : str) -> bool:
         )
     is_valid = hmac.compare_digest(expected_signature, sign)
     return is_valid
-    
-r, u = generate_session_pair("79185447361", 10)
-print(verify_session(u, r))
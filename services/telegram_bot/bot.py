@@ -3,6 +3,7 @@ import sys
 import asyncio
 import logging
 import json
+from functools import lru_cache
 from typing import Any, Callable, Dict, Awaitable
 from aiogram import Bot, Dispatcher, types, F, BaseMiddleware
 
@@ -11,26 +12,37 @@ from shared.logger.logger import logger
 
 
 
-WEBHOOK_PATH = f"/bot/{config.TOKEN_BOT}"
-WEBHOOK_URL = f"{config.WEBHOOK_TUNNEL_URL}{WEBHOOK_PATH}"
+# Токен бота - часть пути вебхука; путь объявлен с параметром, 
+# чтобы импорт не читал настройки (токен сверяется в обработчике)
+WEBHOOK_PATH = "/bot/{token}"
+
+
+def webhook_url() -> str:
+    return f"{config.WEBHOOK_TUNNEL_URL}{WEBHOOK_PATH.format(token=config.TOKEN_BOT)}"
+
+
+@lru_cache(maxsize=None)
+def get_bot() -> Bot:
+    """Клиент бота создается при первом обращении (lifespan), а не при импорте"""
+    return Bot(token=config.TOKEN_BOT)
 
 
-bot = Bot(token=config.TOKEN_BOT)
 dp = Dispatcher()
 
 
 async def set_webhook():
     """Установка вебхука"""
-    await bot.set_webhook(
-        url=WEBHOOK_URL,
+    url = webhook_url()
+    await get_bot().set_webhook(
+        url=url,
         secret_token=config.WEBHOOK_SECRET_KEY,
         drop_pending_updates=True,
         allowed_updates=["message", "callback_query", "web_app_data"]
     )
-    logger.info(f"Вебхук установлен: {WEBHOOK_URL}")
+    logger.info(f"Вебхук установлен: {url}")
 
 
 async def delete_webhook():
     """Удаление вебхука"""
-    await bot.delete_webhook(drop_pending_updates=True)
+    await get_bot().delete_webhook(drop_pending_updates=True)
     logger.info("Вебхук удален")
\ No newline at end of file
@@ -1,3 +1,4 @@
+import hmac
 import uvicorn
 from fastapi import FastAPI, status
 from fastapi.responses import JSONResponse
@@ -5,8 +6,9 @@ from fastapi.requests import Request
 from aiogram.types import Update
 from contextlib import asynccontextmanager
 
-from bot import bot, dp, WEBHOOK_PATH, set_webhook, delete_webhook
+from bot import get_bot, dp, WEBHOOK_PATH, set_webhook, delete_webhook
 
+from shared.config import config
 from shared.logger.logger import logger
 
 
@@ -19,7 +21,7 @@ async def lifespan(app : FastAPI):
     logger.info("Start telegram_bot service")
     yield
     await delete_webhook()
-    await bot.session.close()
+    await get_bot().session.close()
     logger.info("Shutdown telegram_bot service")
     
 
@@ -36,12 +38,14 @@ async def health():
 
 
 @app.post(WEBHOOK_PATH)
-async def bot_webhook(request : Request, update: dict):
+async def bot_webhook(request : Request, token : str, update: dict):
     """Обработка всех событий бота"""
+    if not hmac.compare_digest(token, config.TOKEN_BOT):
+        return JSONResponse(content={"detail" : "Not Found"}, status_code=status.HTTP_404_NOT_FOUND)
     try:
         logger.info("ОБрабатываю запрос бот...")
         telegram_update = Update(**update)
-        await dp.feed_webhook_update(bot, telegram_update)
+        await dp.feed_webhook_update(get_bot(), telegram_update)
         return {"status": "ok"}
     except Exception as e:
         return JSONResponse(content={"details" : str(e)}, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,6 @@
+from .base import BaseCache, CacheStats
+from .memory import MemoryCache
+from .tiered import TieredCache
+from .factory import build_cache
+
+__all__ = ['BaseCache', 'CacheStats', 'MemoryCache', 'TieredCache', 'build_cache']
@@ -0,0 +1,56 @@
+import abc
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Iterable, List, Optional
+
+
+@dataclass
+class CacheStats:
+    """Счетчики кеша"""
+    hits : int = 0
+    misses : int = 0
+    evictions : int = 0
+    invalidations : int = 0
+    errors : int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "hit_ratio": round(self.hit_ratio, 4)}
+
+
+class BaseCache(abc.ABC):
+    """
+    Абстрактный кеш ключ -> значение с TTL.
+    Значения - json-совместимые данные (dict, list, str, int, ...)
+    """
+
+    def __init__(self):
+        self.stats = CacheStats()
+
+    @abc.abstractmethod
+    async def get(self, key : str) -> Optional[Any]:
+        """Значение по ключу, None если ключа нет или он истек"""
+
+    @abc.abstractmethod
+    async def get_many(self, keys : List[str]) -> List[Optional[Any]]:
+        """Значения по списку ключей (None для отсутствующих)"""
+
+    @abc.abstractmethod
+    async def set_many(self, items : Dict[str, Any], ttl : Optional[float] = None) -> None:
+        """Записать несколько ключей"""
+
+    @abc.abstractmethod
+    async def delete_many(self, keys : Iterable[str]) -> None:
+        """Удалить ключи"""
+
+    def invalidate_local(self, keys : Iterable[str]) -> None:
+        """Синхронно удалить ключи из уровня в памяти процесса (если он есть)"""
+
+    async def set(self, key : str, value : Any, ttl : Optional[float] = None) -> None:
+        await self.set_many({key: value}, ttl)
+
+    async def delete(self, key : str) -> None:
+        await self.delete_many([key])
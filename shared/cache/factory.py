@@ -0,0 +1,34 @@
+from typing import Optional
+
+from .base import BaseCache
+from .memory import MemoryCache
+from .tiered import TieredCache
+
+
+def build_cache(
+        maxsize : int = 10_000, 
+        ttl : float = 30.0, 
+        redis_url : Optional[str] = None, 
+        redis_ttl : float = 300.0, 
+        prefix : str = "cache:"
+        ) -> BaseCache:
+    
+    """
+    Сборка кеша из настроек
+    Args:
+        maxsize : размер локального LRU
+        ttl : TTL локального уровня
+        redis_url : адрес Redis, если задан - добавляется общий уровень
+        redis_ttl : TTL общего уровня
+        prefix : префикс ключей в Redis
+    Returns:
+        cache : MemoryCache или TieredCache(MemoryCache, RedisCache)
+    """
+
+    local = MemoryCache(maxsize=maxsize, ttl=ttl)
+    if not redis_url:
+        return local
+    from redis.asyncio import Redis
+    from .redis import RedisCache
+    remote = RedisCache(Redis.from_url(redis_url), ttl=redis_ttl, prefix=prefix)
+    return TieredCache(local, remote)
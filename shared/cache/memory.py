@@ -0,0 +1,75 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .base import BaseCache
+
+
+class MemoryCache(BaseCache):
+    """
+    In-process LRU кеш с TTL. Не потокобезопасен - рассчитан на один event loop.
+
+    Args:
+        maxsize : максимальное количество ключей, при переполнении вытесняется самый старый по доступу
+        ttl : время жизни ключа в секундах по умолчанию
+    """
+
+    def __init__(self, maxsize : int = 10_000, ttl : float = 60.0):
+        super().__init__()
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data : "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get_nowait(self, key : str) -> Optional[Any]:
+        """Синхронное чтение (без await) для горячих путей"""
+        item = self._data.get(key)
+        if item is None:
+            self.stats.misses += 1
+            return None
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.stats.evictions += 1
+            self.stats.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.stats.hits += 1
+        return value
+
+    def set_nowait(self, key : str, value : Any, ttl : Optional[float] = None) -> None:
+        """Синхронная запись (без await) для горячих путей"""
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.stats.evictions += 1
+
+    def delete_nowait(self, key : str) -> None:
+        if self._data.pop(key, None) is not None:
+            self.stats.invalidations += 1
+
+    def invalidate_local(self, keys : Iterable[str]) -> None:
+        for key in keys:
+            self.delete_nowait(key)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    async def get(self, key : str) -> Optional[Any]:
+        return self.get_nowait(key)
+
+    async def get_many(self, keys : List[str]) -> List[Optional[Any]]:
+        return [self.get_nowait(key) for key in keys]
+
+    async def set_many(self, items : Dict[str, Any], ttl : Optional[float] = None) -> None:
+        for key, value in items.items():
+            self.set_nowait(key, value, ttl)
+
+    async def delete_many(self, keys : Iterable[str]) -> None:
+        for key in keys:
+            self.delete_nowait(key)
@@ -0,0 +1,72 @@
+import json
+from typing import Any, Dict, Iterable, List, Optional
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from .base import BaseCache
+from ..logger.logger import logger
+
+
+class RedisCache(BaseCache):
+    """
+    Кеш в Redis, общий для всех реплик сервиса.
+    Ошибки Redis не пробрасываются: чтение считается промахом, запись пропускается.
+
+    Args:
+        client : клиент redis.asyncio
+        ttl : время жизни ключа в секундах по умолчанию
+        prefix : префикс ключей
+    """
+
+    def __init__(self, client : Redis, ttl : float = 300.0, prefix : str = "cache:"):
+        super().__init__()
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    async def get(self, key : str) -> Optional[Any]:
+        return (await self.get_many([key]))[0]
+
+    async def get_many(self, keys : List[str]) -> List[Optional[Any]]:
+        if not keys:
+            return []
+        try:
+            raw = await self.client.mget([self.prefix + key for key in keys])
+        except RedisError as e:
+            logger.warn(f"Redis кеш недоступен: {e}")
+            self.stats.errors += 1
+            self.stats.misses += len(keys)
+            return [None] * len(keys)
+        values = []
+        for item in raw:
+            if item is None:
+                self.stats.misses += 1
+                values.append(None)
+            else:
+                self.stats.hits += 1
+                values.append(json.loads(item))
+        return values
+
+    async def set_many(self, items : Dict[str, Any], ttl : Optional[float] = None) -> None:
+        if not items:
+            return
+        expire_ms = int((self.ttl if ttl is None else ttl) * 1000)
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                for key, value in items.items():
+                    pipe.set(self.prefix + key, json.dumps(value, separators=(",", ":")), px=expire_ms)
+                await pipe.execute()
+        except RedisError as e:
+            logger.warn(f"Redis кеш недоступен: {e}")
+            self.stats.errors += 1
+
+    async def delete_many(self, keys : Iterable[str]) -> None:
+        keys = [self.prefix + key for key in keys]
+        if not keys:
+            return
+        try:
+            self.stats.invalidations += await self.client.delete(*keys)
+        except RedisError as e:
+            logger.warn(f"Redis кеш недоступен: {e}")
+            self.stats.errors += 1
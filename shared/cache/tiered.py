@@ -0,0 +1,56 @@
+from typing import Any, Dict, Iterable, List, Optional
+
+from .base import BaseCache
+from .memory import MemoryCache
+
+
+class TieredCache(BaseCache):
+    """
+    Двухуровневый кеш: локальный in-process уровень перед общим (обычно Redis).
+    Промах локального уровня читается из общего и дозаписывается в локальный.
+
+    Args:
+        local : локальный кеш (короткий TTL - ограничивает рассинхрон между репликами)
+        remote : общий кеш
+
+    Вытеснения происходят только в локальном уровне - stats.evictions берется из local.stats
+    """
+
+    def __init__(self, local : MemoryCache, remote : BaseCache):
+        super().__init__()
+        self.local = local
+        self.remote = remote
+
+    async def get(self, key : str) -> Optional[Any]:
+        return (await self.get_many([key]))[0]
+
+    async def get_many(self, keys : List[str]) -> List[Optional[Any]]:
+        values = await self.local.get_many(keys)
+        missing = [key for key, value in zip(keys, values) if value is None]
+        if missing:
+            remote_values = dict(zip(missing, await self.remote.get_many(missing)))
+            found = {key: value for key, value in remote_values.items() if value is not None}
+            await self.local.set_many(found)
+            values = [remote_values.get(key) if value is None else value for key, value in zip(keys, values)]
+        self.stats.evictions = self.local.stats.evictions
+        for value in values:
+            if value is None:
+                self.stats.misses += 1
+            else:
+                self.stats.hits += 1
+        return values
+
+    async def set_many(self, items : Dict[str, Any], ttl : Optional[float] = None) -> None:
+        # локальная запись не должна пережить TTL, заданный вызывающим
+        await self.local.set_many(items, self.local.ttl if ttl is None else min(ttl, self.local.ttl))
+        self.stats.evictions = self.local.stats.evictions
+        await self.remote.set_many(items, ttl)
+
+    def invalidate_local(self, keys : Iterable[str]) -> None:
+        self.local.invalidate_local(keys)
+
+    async def delete_many(self, keys : Iterable[str]) -> None:
+        keys = list(keys)
+        self.stats.invalidations += len(keys)
+        await self.local.delete_many(keys)
+        await self.remote.delete_many(keys)
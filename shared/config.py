@@ -5,7 +5,6 @@ from shared.logger.logger import logger
 
 BASE_DIR = Path(__file__).parent.parent  # shared/ -> backend/
 ENV_PATH = BASE_DIR/".env"
-print(ENV_PATH)
 
 
 class Settings(BaseSettings):
@@ -17,15 +16,88 @@ class Settings(BaseSettings):
     DB_NAME : str
     DB_PORT : int 
     DB_CONTAINER_NAME : str
+    # Реплики только для чтения: "host[:port],host[:port]"
+    DB_REPLICA_HOSTS : str = ""
+    DB_REPLICA_STRATEGY : str = "round_robin"
+    DB_REPLICA_MAX_LAG : float = 5.0
+
+    # Пул соединений. DB_POOL_PRE_PING - проверка на каждой выдаче, 
+    # по умолчанию живость проверяется в фоне раз в DB_POOL_CHECK_INTERVAL секунд
+    DB_POOL_SIZE : int = 20
+    DB_POOL_MAX_OVERFLOW : int = 10
+    DB_POOL_TIMEOUT : float = 30
+    DB_POOL_RECYCLE : int = 1800
+    DB_POOL_WARMUP : int = 5
+    DB_POOL_PRE_PING : bool = False
+    DB_POOL_CHECK_INTERVAL : float = 30
+    # Кеш подготовленных запросов asyncpg; DB_PGBOUNCER выключает его для PgBouncer (transaction pooling)
+    DB_STATEMENT_CACHE_SIZE : int = 100
+    DB_PGBOUNCER : bool = False
+
+    # Инструментирование запросов: slow query лог (0 - выключен) и детектор N+1 (dev/test)
+    DB_SLOW_QUERY_MS : float = 200
+    DB_NPLUSONE_DETECT : bool = False
+    DB_NPLUSONE_THRESHOLD : int = 5
+    DB_NPLUSONE_RAISE : bool = False
 
     REDIS_HOST : str
     REDIS_PORT : str
 
+    ENTITY_CACHE_ENABLED : bool = True
+    ENTITY_CACHE_SIZE : int = 10_000
+    ENTITY_CACHE_TTL : int = 30
+    ENTITY_CACHE_REDIS : bool = False
+    ENTITY_CACHE_REDIS_TTL : int = 300
+
+    # Отметки активности сессий пишутся в БД пачками: не реже раза в 
+    # SESSION_ACTIVITY_MAX_STALENESS секунд или при SESSION_ACTIVITY_MAX_PENDING ожидающих сессиях
+    SESSION_ACTIVITY_MAX_STALENESS : float = 5
+    SESSION_ACTIVITY_MAX_PENDING : int = 1000
+
+    # Очистка сессий с истекшим refresh токеном: раз в SESSION_PURGE_INTERVAL секунд, 
+    # пачками по SESSION_PURGE_BATCH_SIZE с паузой SESSION_PURGE_PAUSE секунд
+    SESSION_PURGE_INTERVAL : float = 3600
+    SESSION_PURGE_BATCH_SIZE : int = 1000
+    SESSION_PURGE_PAUSE : float = 0.1
+
+    # Фоновые проверки зависимостей; соседние сервисы: "name=http://host:port/health,..."
+    HEALTH_INTERVAL : float = 10
+    HEALTH_TIMEOUT : float = 2
+    HEALTH_HISTORY : int = 60
+    HEALTH_SIBLINGS : str = ""
+
+    # Сессии верификации по SMS: в Redis (общие для реплик) или в памяти процесса
+    SMS_SESSION_REDIS : bool = True
+    SMS_SESSION_TTL : int = 5
+    SMS_MAX_ATTEMPTS : int = 5
+    # Очередь отправки SMS: воркеров (одновременных запросов к провайдеру), сообщений в запросе 
+    # (0 - сколько принимает провайдер), предел очереди, попыток и задержка первого повтора
+    SMS_WORKERS : int = 4
+    SMS_BATCH_SIZE : int = 0
+    SMS_QUEUE_SIZE : int = 10_000
+    SMS_SEND_ATTEMPTS : int = 5
+    SMS_RETRY_BACKOFF : float = 0.5
+
+    # Лимиты запросов: "ключ=лимит/окно в секундах", ключи - ip, device (X-Device-ID), phone (phone_number тела).
+    # Счетчики в памяти процесса и, при RATE_LIMIT_REDIS, общие в Redis
+    RATE_LIMIT_ENABLED : bool = True
+    RATE_LIMIT_REDIS : bool = True
+    RATE_LIMIT_LOCAL_SIZE : int = 100_000
+    RATE_LIMIT_REGISTER : str = "ip=10/60,device=5/60,phone=3/600"
+    RATE_LIMIT_LOGIN : str = "ip=20/60,device=10/60,phone=5/300"
+    # Прокси, от которых берется X-Real-IP (nginx в сети docker); остальным - адрес соединения
+    RATE_LIMIT_TRUSTED_PROXIES : str = "127.0.0.1,10.0.0.0/8,172.16.0.0/12,192.168.0.0/16"
+
     JWT_SECRET_KEY : str
     JWT_ACCESS_EXPIRE_MINETS : int
     JWT_REFRESH_EXPIRE_MINETS : int
     JWT_ALGORITM : str
     JWT_KID : str
+    # EdDSA / RS256: ключи подписи в JWT_KEYS_DIR (общий для реплик auth), ротация раз в JWT_KEY_ROTATION_DAYS
+    JWT_KEYS_DIR : str = ""
+    JWT_KEY_ROTATION_DAYS : float = 30
+    # Кеш проверенных токенов (ключ - digest токена, запись живет до exp)
+    JWT_CACHE_SIZE : int = 100_000
 
     TOKEN_BOT : str
     WEBHOOK_TUNNEL_URL : str
@@ -34,14 +106,36 @@ class Settings(BaseSettings):
     @property
     def AsyncDataBaseUrl(self):
         """Url для подключения к базе данных"""
-        uri = None
-        if self.DB_CONTAINER_NAME:
-            uri = f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASS}@{self.DB_CONTAINER_NAME}:{self.DB_PORT}/{self.DB_NAME}"
-        else:
-            uri = f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASS}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
-        logger.debug(f"Uri подключения к дб {uri}")
+        host = self.DB_CONTAINER_NAME or self.DB_HOST
+        uri = f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASS}@{host}:{self.DB_PORT}/{self.DB_NAME}"
+        # пароль в лог не пишем
+        logger.debug(f"Uri подключения к дб postgresql+asyncpg://{self.DB_USER}:***@{host}:{self.DB_PORT}/{self.DB_NAME}")
         return uri
 
+    @property
+    def AsyncReplicaDataBaseUrls(self):
+        """Url для подключения к репликам"""
+        uris = []
+        for host in filter(None, (item.strip() for item in self.DB_REPLICA_HOSTS.split(","))):
+            if ":" not in host:
+                host = f"{host}:{self.DB_PORT}"
+            uris.append(f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASS}@{host}/{self.DB_NAME}")
+        return uris
+
+    @property
+    def RedisUrl(self):
+        """Url для подключения к Redis"""
+        return f"redis://{self.REDIS_HOST}:{self.REDIS_PORT}/0"
+
+    @property
+    def HealthSiblings(self):
+        """Соседние сервисы для проверки: имя -> url health эндпоинта"""
+        siblings = {}
+        for item in filter(None, (item.strip() for item in self.HEALTH_SIBLINGS.split(","))):
+            name, _, url = item.partition("=")
+            siblings[name.strip()] = url.strip()
+        return siblings
+
     model_config = SettingsConfigDict(
         env_file=ENV_PATH,
         env_file_encoding="utf-8",
@@ -49,4 +143,26 @@ class Settings(BaseSettings):
         extra="ignore"
     )
 
-config = Settings()
\ No newline at end of file
+class LazySettings:
+    """
+    Настройки читаются (env, .env) и проверяются при первом обращении 
+    к атрибуту, а не при импорте модуля: импорт shared.config ничего не стоит 
+    процессам и тестам, которым настройки не нужны.
+
+    Usage:
+        from shared.config import config
+        config.DB_HOST  # здесь создается Settings()
+    """
+
+    def __init__(self):
+        self._settings : Settings | None = None
+
+    def __getattr__(self, name : str):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        if self._settings is None:
+            self._settings = Settings()
+        return getattr(self._settings, name)
+
+
+config : Settings = LazySettings()
\ No newline at end of file
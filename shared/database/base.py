@@ -1,8 +1,12 @@
 from datetime import datetime
+from collections import Counter
 from contextlib import asynccontextmanager
-from typing import List, Optional, TypeVar, Generic, Type, Any, Annotated, Dict, AsyncGenerator
-from sqlalchemy import select, update, delete, BigInteger, func
-from sqlalchemy.orm import mapped_column, Mapped
+from functools import lru_cache
+from typing import List, Optional, TypeVar, Generic, Type, Any, Annotated, Dict, AsyncGenerator, AsyncIterator, Sequence, Union
+from sqlalchemy import inspect, select, update, delete, exists, text, tuple_, literal, literal_column, any_, BigInteger, func, Select
+from sqlalchemy.dialects.postgresql import insert, ARRAY
+from sqlalchemy.orm import mapped_column, Mapped, raiseload, selectinload
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import  DeclarativeBase, declared_attr
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, AsyncEngine, AsyncAttrs
 from sqlalchemy.exc import IntegrityError
@@ -10,6 +14,13 @@ from fastapi import HTTPException
 
 
 from ..logger.logger import logger
+from .pagination import Page, encode_cursor, decode_cursor
+from .bulk import BulkResult, bind_safe_chunk_size, chunked, row_key
+from .cache import TRACKED_DML, EntityCache, commit_invalidations, discard_invalidations
+from .loader import EntityLoader
+from .routing import EngineRouter
+from .retry import transient_sqlstate
+from .instrumentation import QueryStats, query_scope
 
 
 class Base(AsyncAttrs, DeclarativeBase):
@@ -51,47 +62,309 @@ class BaseRepository(Generic[T]):
     
     """
 
+    # Колонка версии для оптимистичной блокировки (update/delete с expected_version)
+    version_field: Optional[str] = None
+    # Read-through кеш get_by_id/get_by_field, сбрасывается после коммита любой сессии
+    cache: Optional[EntityCache] = None
+    # Именованные наборы связей для with_relations: {"with_sessions": ("sessions",)}
+    # Связи вне набора не загружаются: обращение к ним - ошибка, а не скрытый запрос
+    load_profiles: Dict[str, Sequence[str]] = {}
+
     def __init__(self, session: AsyncSession, model: Type[T]):
         self.session = session
         self.model = model
+        if self.cache is not None:
+            self.cache.track(model)
+        # Склейка конкурентных get_by_id, задается unit of work
+        self.loader: Optional[EntityLoader] = None
 
     # READ operations
-    async def get_by_id(self, id: int) -> Optional[T]:
-        """Получить объект по его ID"""
+    async def get_by_id(
+            self, 
+            id: int, 
+            columns: Optional[Sequence[str]] = None, 
+            with_relations: Optional[Union[str, Sequence[str]]] = None
+            ) -> Union[T, Row, None]:
+        """
+        Получить объект по его ID (через кеш, если он задан).
+        Внутри unit of work конкурентные вызовы склеиваются в один запрос.
+
+        Args:
+            id : id объекта
+            columns : вернуть только эти колонки строкой Row (см. _projection)
+            with_relations : загрузить связи - профиль из load_profiles или имена связей (см. _loader_options)
+        """
+        if columns is not None:
+            result = await self.session.execute(self._projection(columns).where(self.model.id == id))
+            return result.one_or_none()
+        if with_relations is not None:
+            result = await self.session.execute(self._select(with_relations).where(self.model.id == id))
+            return result.scalar_one_or_none()
+        if self.loader is not None:
+            return await self.loader.load(id)
+        return await self._fetch_by_id(id)
+
+    async def _fetch_by_id(self, id: int) -> Optional[T]:
+        if self.cache is not None:
+            entity = await self.cache.get(self.session, self.model, "id", id)
+            if entity is not None:
+                return entity
         result = await self.session.execute(
-            select(self.model).where(self.model.id == id)
+            self._select().where(self.model.id == id)
         )
-        return result.scalar_one_or_none()
+        entity = result.scalar_one_or_none()
+        if entity is not None and self.cache is not None:
+            await self.cache.put(self.session, entity)
+        return entity
 
-    async def get_all(self, skip: int = 0, limit: int = 100) -> List[T]:
-        """Получить все объекты с пагинацией"""
+    async def get_many_by_ids(
+            self, 
+            ids: Sequence[int], 
+            with_relations: Optional[Union[str, Sequence[str]]] = None
+            ) -> List[T]:
+        """
+        Получить объекты по списку ID одним запросом: WHERE id = ANY(:ids)
+        Args:
+            ids : id объектов (повторы игнорируются)
+            with_relations : загрузить связи (кеш не используется)
+        Returns:
+            найденные объекты в порядке ids, отсутствующие пропускаются
+        """
+        ids = list(dict.fromkeys(ids))
+        found: Dict[int, T] = {}
+        cached = self.cache is not None and with_relations is None
+        if cached:
+            found = await self.cache.get_many(self.session, self.model, ids)
+        missing = [id for id in ids if id not in found]
+        if missing:
+            id_type = self.model.__table__.c.id.type
+            result = await self.session.execute(
+                self._select(with_relations).where(self.model.id == any_(literal(missing, ARRAY(id_type))))
+            )
+            for entity in result.scalars().all():
+                found[entity.id] = entity
+                if cached:
+                    await self.cache.put(self.session, entity)
+        return [found[id] for id in ids if id in found]
+
+    async def get_all(
+            self, 
+            skip: int = 0, 
+            limit: int = 100, 
+            columns: Optional[Sequence[str]] = None, 
+            with_relations: Optional[Union[str, Sequence[str]]] = None
+            ) -> List[Union[T, Row]]:
+        """Получить все объекты с пагинацией (OFFSET, для глубоких страниц - get_page)"""
+        if columns is not None:
+            result = await self.session.execute(
+                self._projection(columns).order_by(self.model.id).offset(skip).limit(limit)
+            )
+            return result.all()
         result = await self.session.execute(
-            select(self.model).offset(skip).limit(limit)
+            self._select(with_relations).offset(skip).limit(limit)
         )
         return result.scalars().all()
 
-    async def get_by_field(self, field_name: str, value: Any) -> Optional[T]:
-        """Получить объект по значению поля"""
+    async def get_by_field(
+            self, 
+            field_name: str, 
+            value: Any, 
+            columns: Optional[Sequence[str]] = None, 
+            with_relations: Optional[Union[str, Sequence[str]]] = None
+            ) -> Union[T, Row, None]:
+        """
+        Получить объект по значению поля (через кеш для полей из cache.fields)
+
+        Args:
+            field_name : поле
+            value : значение
+            columns : вернуть только эти колонки строкой Row (см. _projection)
+            with_relations : загрузить связи (кеш не используется)
+
+        Example:
+            row = await repository.get_by_field("phone_number", phone, columns=["id", "hash_password"])
+            row.id, row.hash_password
+        """
         if not hasattr(self.model, field_name):
             raise ValueError(f"Field {field_name} does not exist in {self.model.__name__}")
-        
+        if columns is not None:
+            result = await self.session.execute(
+                self._projection(columns).where(getattr(self.model, field_name) == value)
+            )
+            return result.one_or_none()
+        cached = self.cache is not None and with_relations is None and self.cache.is_cached_field(field_name)
+        if cached:
+            entity = await self.cache.get(self.session, self.model, field_name, value)
+            if entity is not None:
+                return entity
         result = await self.session.execute(
-            select(self.model).where(getattr(self.model, field_name) == value)
+            self._select(with_relations).where(getattr(self.model, field_name) == value)
         )
-        return result.scalar_one_or_none()
+        entity = result.scalar_one_or_none()
+        if entity is not None and cached:
+            await self.cache.put(self.session, entity)
+        return entity
 
-    async def get_many_by_field(self, field_name: str, value: Any, skip: int = 0, limit: int = 100) -> List[T]:
-        """Получить несколько объектов по значению поля с пагинацией"""
+    async def get_many_by_field(
+            self, 
+            field_name: str, 
+            value: Any, 
+            skip: int = 0, 
+            limit: int = 100, 
+            columns: Optional[Sequence[str]] = None, 
+            with_relations: Optional[Union[str, Sequence[str]]] = None
+            ) -> List[Union[T, Row]]:
+        """Получить несколько объектов по значению поля с пагинацией (OFFSET, для глубоких страниц - get_page_by_field)"""
         if not hasattr(self.model, field_name):
             raise ValueError(f"Field {field_name} does not exist in {self.model.__name__}")
+        if columns is not None:
+            result = await self.session.execute(
+                self._projection(columns)
+                .where(getattr(self.model, field_name) == value)
+                .order_by(self.model.id)
+                .offset(skip)
+                .limit(limit)
+            )
+            return result.all()
         result = await self.session.execute(
-            select(self.model)
+            self._select(with_relations)
             .where(getattr(self.model, field_name) == value)
             .offset(skip)
             .limit(limit)
         )
         return result.scalars().all()
 
+    def _projection(self, columns: Sequence[str]) -> Select:
+        """
+        SELECT только указанных колонок.
+        Результат - строки Row (именованные кортежи): без ORM-объектов, 
+        регистрации в identity map, загрузки связей и кеша сущностей. 
+        Для горячих путей, которым нужны 2-3 поля.
+        """
+        column_attrs = inspect(self.model).column_attrs
+        for name in columns:
+            if name not in column_attrs:
+                raise ValueError(f"Column {name} does not exist in {self.model.__name__}")
+        return select(*(getattr(self.model, name) for name in columns))
+
+    def _select(self, with_relations: Optional[Union[str, Sequence[str]]] = None) -> Select:
+        """SELECT объектов модели с опциями загрузки связей"""
+        return select(self.model).options(*self._loader_options(with_relations))
+
+    def _loader_options(self, with_relations: Optional[Union[str, Sequence[str]]] = None) -> list:
+        """
+        Опции загрузки связей.
+        Запрошенные связи грузятся selectinload (один доп. запрос на связь, а не на объект), 
+        остальные - raiseload: случайное обращение к незагруженной связи падает сразу, 
+        а не превращается в N+1 или незаметную загрузку сотен строк.
+
+        Args:
+            with_relations : имя профиля из load_profiles или список имен связей, None - без связей
+        """
+        if isinstance(with_relations, str):
+            if with_relations not in self.load_profiles:
+                raise ValueError(f"Load profile {with_relations} does not exist in {type(self).__name__}")
+            with_relations = self.load_profiles[with_relations]
+        relationships = inspect(self.model).relationships
+        options = []
+        for name in with_relations or ():
+            if name not in relationships:
+                raise ValueError(f"Relationship {name} does not exist in {self.model.__name__}")
+            options.append(selectinload(getattr(self.model, name)))
+        options.append(raiseload("*"))
+        return options
+
+    # KEYSET pagination
+
+    async def get_page(
+            self, 
+            cursor: Optional[str] = None, 
+            limit: int = 100, 
+            order_by: str = "id", 
+            with_relations: Optional[Union[str, Sequence[str]]] = None
+            ) -> Page[T]:
+        """
+        Получить страницу объектов по курсору (keyset-пагинация).
+        В отличие от get_all(skip, limit) стоимость не растет с глубиной страницы:
+        WHERE (order_by, id) > (:value, :id) ORDER BY order_by, id LIMIT n
+
+        Args:
+            cursor : next_cursor предыдущей страницы, None - первая страница
+            limit : размер страницы
+            order_by : поле сортировки (id, created_at, ...)
+            with_relations : загрузить связи (см. _loader_options)
+        Returns:
+            Page : объекты и токен следующей страницы
+        """
+        return await self._get_page(self._select(with_relations), cursor, limit, order_by)
+
+    async def get_page_by_field(
+            self, 
+            field_name: str, 
+            value: Any, 
+            cursor: Optional[str] = None, 
+            limit: int = 100, 
+            order_by: str = "id", 
+            with_relations: Optional[Union[str, Sequence[str]]] = None
+            ) -> Page[T]:
+        """Получить страницу объектов по значению поля (keyset-пагинация)"""
+        column = self._get_column(field_name)
+        return await self._get_page(self._select(with_relations).where(column == value), cursor, limit, order_by)
+
+    async def _get_page(self, stmt: Select, cursor: Optional[str], limit: int, order_by: str) -> Page[T]:
+        order_column = self._get_column(order_by)
+        if order_by == "id":
+            if cursor is not None:
+                _, last_id = decode_cursor(cursor, order_by)
+                stmt = stmt.where(self.model.id > last_id)
+            stmt = stmt.order_by(self.model.id)
+        else:
+            if any(column.nullable for column in order_column.property.columns):
+                # (NULL, id) > (:value, :id) - не true и не false: строки с NULL пропадут из выдачи
+                raise ValueError(f"Keyset pagination needs a NOT NULL sort column, {order_by} is nullable")
+            if cursor is not None:
+                last_value, last_id = decode_cursor(cursor, order_by)
+                stmt = stmt.where(tuple_(order_column, self.model.id) > tuple_(last_value, last_id))
+            stmt = stmt.order_by(order_column, self.model.id)
+        # Берем на одну строку больше, чтобы понять есть ли следующая страница без COUNT
+        result = await self.session.execute(stmt.limit(limit + 1))
+        items = list(result.scalars().all())
+        if len(items) <= limit:
+            return Page(items=items)
+        items = items[:limit]
+        last = items[-1]
+        return Page(items=items, next_cursor=encode_cursor(order_by, getattr(last, order_by), last.id))
+
+    # STREAM operations
+
+    async def stream(self, batch_size: int = 1000) -> AsyncIterator[T]:
+        """
+        Потоково перебрать все объекты через серверный курсор.
+        Из БД строки забираются пачками по batch_size, память не зависит от размера таблицы.
+
+        Usage:
+            async for user in repository.stream(batch_size=500):
+                ...
+        """
+        async for entity in self._stream(self._select(), batch_size):
+            yield entity
+
+    async def stream_by_field(self, field_name: str, value: Any, batch_size: int = 1000) -> AsyncIterator[T]:
+        """Потоково перебрать объекты по значению поля через серверный курсор"""
+        column = self._get_column(field_name)
+        async for entity in self._stream(self._select().where(column == value), batch_size):
+            yield entity
+
+    async def _stream(self, stmt: Select, batch_size: int) -> AsyncIterator[T]:
+        result = await self.session.stream(
+            stmt.order_by(self.model.id).execution_options(yield_per=batch_size)
+        )
+        try:
+            async for entity in result.scalars():
+                yield entity
+        finally:
+            await result.close()
+
     # CREATE operations
     
     async def create(self, **kwargs) -> T:
@@ -101,37 +374,202 @@ class BaseRepository(Generic[T]):
         try:
             await self.session.flush()
             await self.session.refresh(entity)
+            self._invalidate([entity.id])
             return entity
         except IntegrityError as e:
+            if transient_sqlstate(e):
+                raise
             await self.session.rollback()
             raise HTTPException(
                 status_code=400,
                 detail="Entity already exists or constraint violation"
             )
 
+    async def bulk_create(
+            self, 
+            rows: Sequence[Dict[str, Any]], 
+            conflict_on: Optional[Sequence[str]] = None, 
+            chunk_size: int = 1000
+            ) -> BulkResult[T]:
+        """
+        Создать много объектов многострочным INSERT ... ON CONFLICT DO NOTHING RETURNING.
+        Один запрос на пачку из chunk_size строк. Строки, нарушающие уникальность, 
+        не валят всю пачку, а возвращаются в BulkResult.conflicts.
+
+        Args:
+            rows : данные объектов
+            conflict_on : колонки уникального ключа (ON CONFLICT (...)). 
+                По умолчанию - любое нарушение уникальности, конфликтные строки 
+                определяются по уникальным колонкам модели
+            chunk_size : размер пачки
+        Returns:
+            BulkResult : созданные объекты и пропущенные строки
+        """
+        key_columns = list(conflict_on) if conflict_on else self._unique_columns(rows)
+        bulk_result = BulkResult()
+        for chunk in chunked(rows, self._bulk_chunk_size(chunk_size)):
+            stmt = (
+                insert(self.model)
+                .values(list(chunk))
+                .on_conflict_do_nothing(index_elements=conflict_on)
+                .returning(self.model)
+            )
+            result = await self._execute_bulk(stmt)
+            created = list(result.scalars().all())
+            bulk_result.created.extend(created)
+            self._invalidate(entity.id for entity in created)
+            if len(created) < len(chunk):
+                bulk_result.conflicts.extend(self._missing_rows(chunk, created, key_columns))
+        return bulk_result
+
+    @staticmethod
+    def _missing_rows(chunk: Sequence[Dict[str, Any]], returned: Sequence[T], key_columns: Sequence[str]) -> List[Dict[str, Any]]:
+        """Входные строки, которых нет в RETURNING (пропущены ON CONFLICT DO NOTHING)"""
+        if not key_columns:
+            # без ключа строки RETURNING не сопоставить со входными - не угадываем по позиции
+            raise ValueError("Cannot match skipped rows: rows have no unique columns, pass conflict_on")
+        # Повторы ключа внутри пачки: вставлена первая строка, остальные - конфликты
+        returned_keys = Counter(row_key(entity, key_columns) for entity in returned)
+        missing = []
+        for row in chunk:
+            key = row_key(row, key_columns)
+            if returned_keys[key] > 0:
+                returned_keys[key] -= 1
+            else:
+                missing.append(row)
+        return missing
+
+    def _bulk_chunk_size(self, chunk_size: int) -> int:
+        """chunk_size, урезанный так, чтобы пачка уложилась в лимит параметров запроса"""
+        return bind_safe_chunk_size(chunk_size, len(self.model.__table__.columns))
+
+    async def bulk_upsert(
+            self, 
+            rows: Sequence[Dict[str, Any]], 
+            conflict_on: Sequence[str], 
+            update_fields: Optional[Sequence[str]] = None, 
+            chunk_size: int = 1000
+            ) -> BulkResult[T]:
+        """
+        Создать или обновить много объектов: INSERT ... ON CONFLICT (...) DO UPDATE RETURNING.
+        Повторы ключа внутри входных данных схлопываются (побеждает последняя строка), 
+        отброшенные повторы попадают в BulkResult.conflicts.
+
+        Args:
+            rows : данные объектов
+            conflict_on : колонки уникального ключа
+            update_fields : поля, обновляемые при конфликте (по умолчанию все поля строки кроме ключа). 
+                Если обновлять нечего - ON CONFLICT DO NOTHING, существующие строки попадают в conflicts
+            chunk_size : размер пачки (урезается до лимита параметров запроса по числу колонок)
+        Returns:
+            BulkResult : созданные и обновленные объекты
+        """
+        for column in conflict_on:
+            self._get_column(column)
+        bulk_result = BulkResult()
+        unique_rows: Dict[tuple, Dict[str, Any]] = {}
+        for row in rows:
+            key = row_key(row, conflict_on)
+            if key in unique_rows:
+                bulk_result.conflicts.append(unique_rows[key])
+            unique_rows[key] = row
+        deduplicated = list(unique_rows.values())
+
+        for chunk in chunked(deduplicated, self._bulk_chunk_size(chunk_size)):
+            stmt = insert(self.model).values(list(chunk))
+            fields = update_fields or [name for name in chunk[0] if name not in conflict_on]
+            if fields:
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=conflict_on,
+                    set_={name: stmt.excluded[name] for name in fields},
+                )
+            else:
+                stmt = stmt.on_conflict_do_nothing(index_elements=conflict_on)
+            # xmax = 0 только у только что вставленных строк
+            stmt = stmt.returning(self.model, (literal_column("xmax") == 0).label("inserted"))
+            result = await self._execute_bulk(stmt)
+            returned = []
+            for entity, inserted in result.all():
+                (bulk_result.created if inserted else bulk_result.updated).append(entity)
+                returned.append(entity)
+                self._invalidate([entity.id])
+            if not fields and len(returned) < len(chunk):
+                # DO NOTHING не возвращает существующие строки - это конфликты
+                bulk_result.conflicts.extend(self._missing_rows(chunk, returned, conflict_on))
+        return bulk_result
+
+    async def _execute_bulk(self, stmt):
+        try:
+            return await self.session.execute(stmt, execution_options={"populate_existing": True})
+        except IntegrityError as e:
+            if transient_sqlstate(e):
+                raise
+            await self.session.rollback()
+            raise HTTPException(
+                status_code=400,
+                detail="Bulk operation violates constraints"
+            )
+
+    def _unique_columns(self, rows: Sequence[Dict[str, Any]]) -> List[str]:
+        """Уникальные колонки модели, которые заданы во входных данных"""
+        if not rows:
+            return []
+        present = set(rows[0])
+        return [
+            column.name for column in self.model.__table__.columns
+            if (column.unique or column.primary_key) and column.name in present
+        ]
+
     # UPDATE operations
     
-    async def update(self, id: int, **kwargs) -> Optional[T]:
-        """Обновить объект по ID"""
-        result = await self.session.execute(
-            select(self.model).where(self.model.id == id)
-        )
-        entity = result.scalar_one_or_none()
-        if not entity:
-            return None 
-        for field, value in kwargs.items():
-            if hasattr(entity, field):
-                setattr(entity, field, value)
+    async def update(self, id: int, expected_version: Optional[int] = None, **kwargs) -> Optional[T]:
+        """
+        Обновить объект по ID одним запросом: UPDATE ... WHERE id = :id RETURNING *.
+        Поля, которых нет в модели, игнорируются.
+
+        Если в репозитории задан version_field, версия увеличивается при каждом обновлении.
+        С expected_version обновление применяется только к этой версии (оптимистичная блокировка).
+
+        Args:
+            id : id объекта
+            expected_version : версия, которую видел клиент
+            **kwargs : новые значения полей
+        Returns:
+            entity : обновленный объект, None если объект не найден
+        Raises:
+            HTTPException(409) : объект уже изменен другой транзакцией
+        """
+        values = {field: value for field, value in kwargs.items() if hasattr(self.model, field)}
+        stmt = update(self.model).execution_options(**TRACKED_DML).where(self.model.id == id)
+        if self.version_field is not None:
+            version_column = self._get_column(self.version_field)
+            values[self.version_field] = version_column + 1
+            if expected_version is not None:
+                stmt = stmt.where(version_column == expected_version)
+        elif expected_version is not None:
+            raise ValueError(f"{self.__class__.__name__} has no version_field")
+        if not values:
+            return await self.get_by_id(id)
+        stmt = stmt.values(**values).returning(self.model)
         try:
-            await self.session.flush()
-            await self.session.refresh(entity)
-            return entity
-        except IntegrityError:
+            result = await self.session.execute(stmt, execution_options={"populate_existing": True})
+        except IntegrityError as e:
+            if transient_sqlstate(e):
+                raise
             await self.session.rollback()
             raise HTTPException(
                 status_code=400,
                 detail="Update violates constraints"
             )
+        entity = result.scalar_one_or_none()
+        if entity is not None:
+            self._invalidate([id])
+        if entity is None and expected_version is not None and await self.exists(id):
+            raise HTTPException(
+                status_code=409,
+                detail="Entity was modified concurrently"
+            )
+        return entity
 
     async def update_by_field(self, field_name: str, field_value: Any, **kwargs) -> bool:
         """Обновить объекты по значению поля"""
@@ -141,12 +579,13 @@ class BaseRepository(Generic[T]):
             update(self.model)
             .where(getattr(self.model, field_name) == field_value)
             .values(**kwargs)
+            .execution_options(**TRACKED_DML)
         )
         try:
-            result = await self.session.execute(stmt)
-            await self.session.flush()
-            return result.rowcount > 0
-        except IntegrityError:
+            return await self._execute_returning_ids(stmt)
+        except IntegrityError as e:
+            if transient_sqlstate(e):
+                raise
             await self.session.rollback()
             raise HTTPException(
                 status_code=400,
@@ -155,73 +594,168 @@ class BaseRepository(Generic[T]):
 
     # DELETE operations
     
-    async def delete(self, id: int) -> bool:
-        """Удалить объект по ID"""
-        result = await self.session.execute(
-            select(self.model).where(self.model.id == id)
-        )
-        entity = result.scalar_one_or_none()
-        if not entity:
-            return False
-        await self.session.delete(entity)
-        await self.session.flush()
-        return True
+    async def delete(self, id: int, expected_version: Optional[int] = None) -> bool:
+        """
+        Удалить объект по ID одним запросом: DELETE ... WHERE id = :id RETURNING id
+
+        Args:
+            id : id объекта
+            expected_version : удалить только эту версию (нужен version_field)
+        Raises:
+            HTTPException(409) : объект уже изменен другой транзакцией
+        """
+        stmt = delete(self.model).execution_options(**TRACKED_DML).where(self.model.id == id)
+        if expected_version is not None:
+            if self.version_field is None:
+                raise ValueError(f"{self.__class__.__name__} has no version_field")
+            stmt = stmt.where(self._get_column(self.version_field) == expected_version)
+        result = await self.session.execute(stmt.returning(self.model.id))
+        if result.scalar_one_or_none() is not None:
+            self._invalidate([id])
+            return True
+        if expected_version is not None and await self.exists(id):
+            raise HTTPException(
+                status_code=409,
+                detail="Entity was modified concurrently"
+            )
+        return False
 
     async def delete_by_field(self, field_name: str, value: Any) -> bool:
         """Удалить объекты по значению поля"""
         if not hasattr(self.model, field_name):
             raise ValueError(f"Field {field_name} does not exist in {self.model.__name__}")
-        stmt = delete(self.model).where(getattr(self.model, field_name) == value)
-        result = await self.session.execute(stmt)
+        stmt = delete(self.model).execution_options(**TRACKED_DML).where(getattr(self.model, field_name) == value)
+        return await self._execute_returning_ids(stmt)
+
+    async def delete_batch(self, *conditions, limit: int = 1000) -> int:
+        """
+        Удалить не больше limit объектов по условию одним ограниченным запросом:
+        DELETE ... WHERE id IN (SELECT id ... WHERE cond LIMIT n FOR UPDATE SKIP LOCKED)
+        Строки, заблокированные другими транзакциями, пропускаются - удаление 
+        не ждет и не конфликтует с рабочей нагрузкой. Для больших объемов 
+        вызывается в цикле с коммитом после каждой пачки (см. maintenance.purge_in_batches).
+
+        Args:
+            *conditions : условия WHERE (выражения SQLAlchemy)
+            limit : размер пачки
+        Returns:
+            количество удаленных строк
+        """
+        batch = (
+            select(self.model.id)
+            .where(*conditions)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = delete(self.model).execution_options(**TRACKED_DML).where(self.model.id.in_(batch))
+        if self.cache is None:
+            result = await self.session.execute(stmt)
+            return result.rowcount
+        result = await self.session.execute(stmt.returning(self.model.id))
+        ids = result.scalars().all()
+        self._invalidate(ids)
+        return len(ids)
+
+    async def _execute_returning_ids(self, stmt) -> bool:
+        """
+        UPDATE/DELETE по условию. С кешем забираем id затронутых строк через RETURNING,
+        чтобы сбросить их после коммита.
+        """
+        if self.cache is None:
+            result = await self.session.execute(stmt)
+            await self.session.flush()
+            return result.rowcount > 0
+        result = await self.session.execute(stmt.returning(self.model.id))
+        ids = result.scalars().all()
+        self._invalidate(ids)
         await self.session.flush()
-        return result.rowcount > 0
+        return len(ids) > 0
+
+    def _invalidate(self, ids) -> None:
+        """Пометить измененные id для сброса кеша после коммита"""
+        if self.cache is not None:
+            self.cache.invalidate(self.session, self.model, ids)
 
     # COUNT operations
     
-    async def count(self) -> int:
-        """Получить общее количество объектов"""
-        result = await self.session.execute(select(self.model))
-        return len(result.scalars().all())
+    async def count(self, approximate: bool = False) -> int:
+        """
+        Получить общее количество объектов.
+        Считает на стороне БД через SELECT count(*), строки в python не загружаются.
+
+        Args:
+            approximate : вернуть оценку из статистики планировщика (pg_class.reltuples)
+                вместо точного подсчета. Подходит для дашбордов, O(1) на любой таблице.
+                Если статистика еще не собрана (ANALYZE не выполнялся) - точный подсчет.
+        """
+        if approximate:
+            estimate = await self._estimate_count()
+            if estimate is not None:
+                return estimate
+        result = await self.session.execute(
+            select(func.count()).select_from(self.model)
+        )
+        return result.scalar_one()
 
     async def count_by_field(self, field_name: str, value: Any) -> int:
-        """Получить количество объектов по значению поля"""
-        if not hasattr(self.model, field_name):
-            raise ValueError(f"Field {field_name} does not exist in {self.model.__name__}")
+        """Получить количество объектов по значению поля (SELECT count(*) ... WHERE)"""
+        column = self._get_column(field_name)
         result = await self.session.execute(
-            select(self.model).where(getattr(self.model, field_name) == value)
+            select(func.count()).select_from(self.model).where(column == value)
         )
-        return len(result.scalars().all())
+        return result.scalar_one()
+
+    async def _estimate_count(self) -> Optional[int]:
+        """
+        Оценка количества строк из pg_class.reltuples.
+        Returns:
+            None : если таблица не найдена или статистика не собрана
+        """
+        result = await self.session.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table)"),
+            {"table": self.model.__table__.fullname},
+        )
+        estimate = result.scalar_one_or_none()
+        if estimate is None or estimate < 0:
+            return None
+        return estimate
 
     # EXISTS operations
     
     async def exists(self, id: int) -> bool:
-        """Проверить существование объекта по ID"""
+        """Проверить существование объекта по ID (SELECT EXISTS(...))"""
         result = await self.session.execute(
-            select(self.model).where(self.model.id == id)
+            select(exists().where(self.model.id == id))
         )
-        return result.scalar_one_or_none() is not None
+        return result.scalar_one()
 
     async def exists_by_field(self, field_name: str, value: Any) -> bool:
-        """Проверить существование объекта по значению поля"""
-        if not hasattr(self.model, field_name):
-            raise ValueError(f"Field {field_name} does not exist in {self.model.__name__}")
+        """
+        Проверить существование объекта по значению поля (SELECT EXISTS(...)).
+        Несколько совпадений - не ошибка, БД останавливается на первой строке.
+        """
+        column = self._get_column(field_name)
         result = await self.session.execute(
-            select(self.model).where(getattr(self.model, field_name) == value)
+            select(exists().where(column == value))
         )
-        return result.scalar_one_or_none() is not None
+        return result.scalar_one()
+
+    def _get_column(self, field_name: str) -> Any:
+        """Атрибут модели по имени поля"""
+        if not hasattr(self.model, field_name):
+            raise ValueError(f"Field {field_name} does not exist in {self.model.__name__}")
+        return getattr(self.model, field_name)
     
 
 class AnnotationTypeUow(type):
 
     def __new__(mcs, name, bases, nameplace):
-        print(f"Вызов __new__ meta")
         cls = super().__new__(mcs, name, bases, nameplace)
         if not hasattr(cls, '__annotations__'):
             cls.__annotations__ = {}
         return cls
     
     def __init__(cls, name, bases, nameplace):
-        print(f"Вызов __init__ meta")
         super().__init__(name, bases, nameplace)
         if "add_repository" in nameplace:
             original_add_repository = cls.add_repository
@@ -234,12 +768,55 @@ class AnnotationTypeUow(type):
             cls.add_repo = patch_add_repository
     
 
+class LazyRepository:
+    """
+    Дескриптор репозитория unit of work.
+    Репозиторий создается при первом обращении внутри readonly()/transaction() 
+    и кладется в __dict__ экземпляра UoW: следующие обращения - обычный атрибут. 
+    Незатронутые репозитории не создаются вовсе.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __get__(self, uow: Optional["BaseUnitOfWork"], owner: Optional[type] = None) -> Any:
+        if uow is None:
+            return self
+        repo_class = uow._repos.get(self.name)
+        if repo_class is None:
+            raise AttributeError(f"Репозиторий '{self.name}' не зарегистрирован")
+        if uow._session is None:
+            raise AttributeError(f"'{self.name}' доступен только внутри readonly() или transaction()")
+        repository = repo_class(uow._session)
+        repository.loader = EntityLoader(repository)
+        uow.__dict__[self.name] = repository
+        uow._active_repos.append(self.name)
+        return repository
+
+
+@lru_cache(maxsize=None)
+def _disposable_repository_class(repo_class: Type[BaseRepository]) -> Type[BaseRepository]:
+    """Обертка репозитория с временной сессией (одна на класс репозитория)"""
+
+    class DisposableRepository(repo_class):
+        def __init__(self, session, cleanup_callback):
+            super().__init__(session)
+            self._cleanup_callback = cleanup_callback
+        
+        async def __adel__(self):
+            await self._cleanup_callback()
+
+    DisposableRepository.__name__ = f"Disposable{repo_class.__name__}"
+    DisposableRepository.__qualname__ = DisposableRepository.__name__
+    return DisposableRepository
+
+
 class BaseUnitOfWork():
     """
     BaseUnitOfWork read/write.
     
     Args:
-        session_factory: Фабрика сессий
+        session_factory: Фабрика сессий или EngineRouter (primary + реплики)
         schema: схема (опционально)
     
     Основные изменения:
@@ -253,7 +830,7 @@ class BaseUnitOfWork():
         async with uow.transaction() as u:
             await u.user_repository.create(...)
         
-        # Read операции (без транзакции)
+        # Read операции (READ ONLY транзакция)
         uow = AUoW(session_factory)
         async with uow.readonly() as u:
             user = await u.user_repository.get_by_id(...)
@@ -271,8 +848,10 @@ class BaseUnitOfWork():
         self._session: Optional[AsyncSession] = None
         self._session_factory = session_factory
         self._repos: dict[str, Type[BaseRepository]] = {}
+        self._active_repos: List[str] = []  # Репозитории, созданные в текущем скоупе
         self._in_transaction: bool = False
         self._session_owner: Optional[str] = None  # Кто создал сессию
+        self.query_stats: Optional[QueryStats] = None  # Статистика запросов последнего скоупа
 
     def add_repo(self, name: str, repository_cls: Type[BaseRepository]) -> None:
         """
@@ -284,6 +863,9 @@ class BaseUnitOfWork():
         """
         repo_name = f"{name}_repository"
         self._repos[repo_name] = repository_cls
+        cls = type(self)
+        if not isinstance(getattr(cls, repo_name, None), LazyRepository):
+            setattr(cls, repo_name, LazyRepository(repo_name))
 
     def add_repository(self, name: str, repository_cls: Type[BaseRepository]) -> None:
         self.add_repo(name, repository_cls)
@@ -304,65 +886,116 @@ class BaseUnitOfWork():
                 "Сессия уже используется. Используйте readonly() или transaction() "
                 "для групповых операций или создайте новый UoW."
             )
-        temp_session = self._session_factory()
         repo_name = f"{name}_repository"
         repo_class = self._repos.get(repo_name)
         if not repo_class:
             raise ValueError(f"Репозиторий '{name}' не зарегистрирован")
-        
-        class DisposableRepository(repo_class):
-            def __init__(self, session, cleanup_callback):
-                super().__init__(session)
-                self._cleanup_callback = cleanup_callback
-            
-            async def __adel__(self):
-                await self._cleanup_callback()
+        temp_session = self._session_factory()
         
         async def cleanup():
             await temp_session.aclose()
         
-        return DisposableRepository(temp_session, cleanup)
-
-    def _setup_repositories(self, session: AsyncSession) -> None:
-        """Инициализирует все зарегистрированные репозитории."""
-        for repo_name, repo_class in self._repos.items():
-            repo_instance = repo_class(session)
-            setattr(self, repo_name, repo_instance)
+        return _disposable_repository_class(repo_class)(temp_session, cleanup)
 
     def _cleanup_repositories(self) -> None:
-        """Очищает репозитории из атрибутов."""
-        for repo_name in self._repos.keys():
-            if hasattr(self, repo_name):
-                delattr(self, repo_name)
+        """Очищает репозитории, созданные в текущем скоупе."""
+        for repo_name in self._active_repos:
+            self.__dict__.pop(repo_name, None)
+        self._active_repos.clear()
+
+    async def _open_session(self, read_only: bool = False) -> AsyncSession:
+        """
+        Новая сессия. С EngineRouter чтение уходит в реплику, 
+        запись и ручное управление - всегда в primary.
+        """
+        if read_only and isinstance(self._session_factory, EngineRouter):
+            return await self._session_factory.read_session()
+        return self._session_factory()
+
+    async def _apply_timeouts(
+            self, 
+            statement_timeout: Optional[float] = None, 
+            lock_timeout: Optional[float] = None
+            ) -> None:
+        """
+        Таймауты текущей транзакции (SET LOCAL через set_config - один запрос на оба)
+        Args:
+            statement_timeout : максимальное время одного запроса, секунды
+            lock_timeout : максимальное ожидание блокировки, секунды
+        """
+        settings = {
+            name: f"{int(value * 1000)}ms"
+            for name, value in (("statement_timeout", statement_timeout), ("lock_timeout", lock_timeout))
+            if value is not None
+        }
+        if not settings:
+            return
+        columns = ", ".join(f"set_config('{name}', :{name}, true)" for name in settings)
+        await self._session.execute(text(f"SELECT {columns}"), settings)
 
     @asynccontextmanager
-    async def readonly(self) -> AsyncGenerator["BaseUnitOfWork", None]:
+    async def readonly(
+            self, 
+            statement_timeout: Optional[float] = None, 
+            lock_timeout: Optional[float] = None, 
+            deferrable: bool = False,
+            isolation_level: Optional[str] = None
+            ) -> AsyncGenerator["BaseUnitOfWork", None]:
         """
         Контекстный менеджер для операций ТОЛЬКО чтения.
-        НЕ открывает транзакцию!
+        Транзакция открывается как BEGIN READ ONLY (без лишнего запроса):
+        Postgres не ведет учет записи, попытка записи - ошибка.
+        Если session_factory - EngineRouter, читает из реплики.
+
+        Args:
+            statement_timeout : максимальное время одного запроса, секунды
+            lock_timeout : максимальное ожидание блокировки, секунды
+            deferrable : SERIALIZABLE READ ONLY DEFERRABLE - для долгих отчетов, 
+                ждет безопасный снимок и не может быть прерван конфликтом сериализации. 
+                Реплика не поддерживает SERIALIZABLE: такие чтения идут в primary
+            isolation_level : уровень изоляции (REPEATABLE READ, SERIALIZABLE, ...)
         
         Usage:
-            async with uow.readonly() as u:
+            async with uow.readonly(statement_timeout=2) as u:
                 user = await u.user_repository.get_by_id(...)
         """
         if self._session is not None:
             raise RuntimeError("Сессия уже используется")
-        self._session = self._session_factory()
+        # hot standby отклоняет SERIALIZABLE транзакции - такие чтения идут в primary
+        serializable = deferrable or (isolation_level or "").upper() == "SERIALIZABLE"
+        self._session = await self._open_session(read_only=not serializable)
         self._session_owner = "readonly"
-        try:
-            self._setup_repositories(self._session)
-            yield self
-        finally:
-            self._cleanup_repositories()
-            await self._session.aclose()
-            self._session = None
-            self._session_owner = None
+        with query_scope(f"{type(self).__name__}.readonly") as self.query_stats:
+            try:
+                options = {"postgresql_readonly": True}
+                if isolation_level is not None:
+                    options["isolation_level"] = isolation_level
+                if deferrable:
+                    options.update(isolation_level="SERIALIZABLE", postgresql_deferrable=True)
+                await self._session.connection(execution_options=options)
+                await self._apply_timeouts(statement_timeout, lock_timeout)
+                yield self
+            finally:
+                self._cleanup_repositories()
+                await self._session.aclose()
+                self._session = None
+                self._session_owner = None
 
     @asynccontextmanager
-    async def transaction(self) -> AsyncGenerator["BaseUnitOfWork", None]:
+    async def transaction(
+            self, 
+            statement_timeout: Optional[float] = None, 
+            lock_timeout: Optional[float] = None,
+            isolation_level: Optional[str] = None
+            ) -> AsyncGenerator["BaseUnitOfWork", None]:
         """
         Контекстный менеджер для операций записи.
         Открывает транзакцию.
+
+        Args:
+            statement_timeout : максимальное время одного запроса, секунды
+            lock_timeout : максимальное ожидание блокировки, секунды
+            isolation_level : уровень изоляции (REPEATABLE READ, SERIALIZABLE, ...)
         
         Usage:
             async with uow.transaction() as u:
@@ -371,33 +1004,54 @@ class BaseUnitOfWork():
         logger.debug("Открвываем транзакцию")
         if self._session is not None:
             raise RuntimeError("Сессия уже используется")
-        self._session = self._session_factory()
+        self._session = await self._open_session()
         self._session_owner = "transaction"
         self._in_transaction = True
-        try:
-            self._setup_repositories(self._session)
-            await self._session.begin()
+        with query_scope(f"{type(self).__name__}.transaction") as self.query_stats:
+            try:
+                await self._session.begin()
+                if isolation_level is not None:
+                    await self._session.connection(execution_options={"isolation_level": isolation_level})
+                await self._apply_timeouts(statement_timeout, lock_timeout)
+                yield self
+                await self._session.commit()
+                logger.debug("Успешный коммит")
+                await commit_invalidations(self._session)
+            except Exception:
+                discard_invalidations(self._session)
+                if self._session.in_transaction():
+                    await self._session.rollback()
+                logger.warn("Ошибка откат транзакции")
+                raise
+            finally:
+                logger.debug("Закрываем транзакцию")
+                self._cleanup_repositories()
+                self._in_transaction = False
+                await self._session.aclose()
+                self._session = None
+                self._session_owner = None
+
+    @asynccontextmanager
+    async def savepoint(self) -> AsyncGenerator["BaseUnitOfWork", None]:
+        """
+        Вложенная транзакция (SAVEPOINT) внутри transaction().
+        Ошибка откатывает только изменения внутри savepoint.
+
+        Usage:
+            async with uow.transaction() as u:
+                async with u.savepoint():
+                    ...
+        """
+        if self._session is None or self._session_owner != "transaction":
+            raise RuntimeError("Savepoint доступен только внутри transaction()")
+        async with self._session.begin_nested():
             yield self
-            await self._session.commit()
-            logger.debug("Успешный коммит")
-        except Exception:
-            if self._session.in_transaction():
-                await self._session.rollback()
-            logger.warn("Ошибка откат транзакции")
-            raise
-        finally:
-            logger.debug("Закрываем транзакцию")
-            self._cleanup_repositories()
-            self._in_transaction = False
-            await self._session.aclose()
-            self._session = None
-            self._session_owner = None
 
     # Для обратной совместимости
     @asynccontextmanager
-    async def begin(self) -> AsyncGenerator["BaseUnitOfWork", None]:
+    async def begin(self, **kwargs) -> AsyncGenerator["BaseUnitOfWork", None]:
         """Алиас для transaction() (обратная совместимость)."""
-        async with self.transaction() as uow:
+        async with self.transaction(**kwargs) as uow:
             yield uow
 
     async def __adel__(self):
@@ -0,0 +1,48 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, Generic, Iterable, Iterator, List, Sequence, Tuple, TypeVar
+
+
+T = TypeVar('T')
+
+# Предел параметров одного запроса в протоколе Postgres (asyncpg): int16
+MAX_BIND_PARAMS = 32767
+
+
+@dataclass
+class BulkResult(Generic[T]):
+    """
+    Результат bulk_create / bulk_upsert
+
+    Args:
+        created : вставленные объекты
+        updated : объекты, обновленные при конфликте (только bulk_upsert)
+        conflicts : входные строки, пропущенные из-за конфликта уникальности
+    """
+    created : List[T] = field(default_factory=list)
+    updated : List[T] = field(default_factory=list)
+    conflicts : List[Dict[str, Any]] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.created) + len(self.updated)
+
+
+def chunked(rows : Sequence[Dict[str, Any]], size : int) -> Iterator[Sequence[Dict[str, Any]]]:
+    """Разбиение входных строк на пачки по size"""
+    if size <= 0:
+        raise ValueError("chunk_size must be positive")
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def bind_safe_chunk_size(chunk_size : int, columns : int) -> int:
+    """Размер пачки многострочного VALUES, при котором параметров не больше MAX_BIND_PARAMS"""
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    return max(1, min(chunk_size, MAX_BIND_PARAMS // max(1, columns)))
+
+
+def row_key(row : Any, columns : Iterable[str]) -> Tuple:
+    """Ключ строки (dict) или объекта по колонкам конфликта"""
+    if isinstance(row, dict):
+        return tuple(row.get(column) for column in columns)
+    return tuple(getattr(row, column) for column in columns)
@@ -0,0 +1,276 @@
+import asyncio
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from itertools import chain
+from typing import Any, Dict, Iterable, Optional, Sequence, Set, Type
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import ORMExecuteState, Session, make_transient_to_detached
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..cache.base import BaseCache, CacheStats
+from ..logger.logger import logger
+from .routing import REPLICA_KEY
+
+
+# Ключ session.info: {EntityCache: {ключи, которые нужно сбросить после коммита}}
+PENDING_KEY = "entity_cache_pending"
+# Ключ session.info: задача сброса общего уровня кеша после коммита
+COMMITTED_KEY = "entity_cache_committed"
+# execution_options UPDATE/DELETE, затронутые id которых репозиторий отмечает сам (RETURNING)
+TRACKED_DML = {"entity_cache_tracked": True}
+
+# Модель -> кеш ее сущностей (EntityCache.track)
+_tracked : Dict[Type, "EntityCache"] = {}
+_background : Set[asyncio.Task] = set()
+
+
+class EntityCache:
+    """
+    Read-through кеш сущностей для BaseRepository.
+
+    Хранит значения колонок под ключом <схема.таблица>:id:<id>, 
+    а для уникальных полей - указатель <схема.таблица>:<поле>:<значение> -> id. 
+    Поэтому для инвалидации достаточно id: устаревший указатель 
+    отбрасывается при чтении, если поле у сущности уже другое.
+
+    Любая запись в отслеживаемую модель (track) помечает id как грязный 
+    в сессии - через репозиторий, flush ORM объектов или UPDATE/DELETE 
+    через session.execute: такие id читаются мимо кеша до конца транзакции 
+    и сбрасываются из кеша после коммита сессии (событие after_commit), 
+    с unit of work, get_repository() или голой сессией.
+
+    Колонки exclude (хеши паролей, секреты) в кеш не попадают: у сущности 
+    из кеша они не загружены - await entity.awaitable_attrs.<колонка> 
+    или чтение мимо кеша.
+
+    Сущность из кеша присоединяется к сессии без запроса, связи не загружены:
+    await entity.awaitable_attrs.<связь>
+
+    Args:
+        backend : хранилище (MemoryCache, TieredCache, ...)
+        fields : уникальные поля, по которым кешируется get_by_field (id кешируется всегда)
+        ttl : TTL записей, по умолчанию TTL хранилища
+        exclude : колонки, которые не кладутся в кеш
+
+    Example:
+        class UserRepository(BaseRepository[User]):
+            cache = EntityCache(MemoryCache(ttl=30), fields=("phone_number",), exclude=("hash_password",))
+    """
+
+    def __init__(
+            self, 
+            backend : BaseCache, 
+            fields : Sequence[str] = (), 
+            ttl : Optional[float] = None, 
+            exclude : Sequence[str] = ()
+            ):
+        self.backend = backend
+        self.exclude = frozenset(exclude)
+        self.fields = tuple(field for field in fields if field not in self.exclude)
+        self.ttl = ttl
+
+    def track(self, model : Type) -> None:
+        """Сбрасывать кеш при любой записи в модель (события сессии)"""
+        if _tracked.get(model) is not self:
+            _tracked[model] = self
+            _install_listeners()
+
+    @property
+    def stats(self) -> CacheStats:
+        return self.backend.stats
+
+    def key(self, model : Type, field : str, value : Any) -> str:
+        return f"{model.__table__.fullname}:{field}:{value}"
+
+    def is_cached_field(self, field : str) -> bool:
+        return field == "id" or field in self.fields
+
+    async def get(self, session : AsyncSession, model : Type, field : str, value : Any) -> Optional[Any]:
+        """Сущность из кеша, присоединенная к сессии, или None"""
+        pending = self._pending(session)
+        if field == "id":
+            id = value
+        else:
+            id = await self.backend.get(self.key(model, field, value))
+            if id is None:
+                return None
+        id_key = self.key(model, "id", id)
+        if id_key in pending:
+            return None
+        data = await self.backend.get(id_key)
+        if data is None:
+            return None
+        data = {name: _load(item) for name, item in data.items()}
+        if field != "id" and data.get(field) != value:
+            return None
+        return self._attach(session, model, data)
+
+    async def get_many(self, session : AsyncSession, model : Type, ids : Sequence[Any]) -> Dict[Any, Any]:
+        """Сущности из кеша по списку id: {id: сущность} только для найденных"""
+        pending = self._pending(session)
+        keys = [self.key(model, "id", id) for id in ids]
+        lookup = [(id, key) for id, key in zip(ids, keys) if key not in pending]
+        if not lookup:
+            return {}
+        values = await self.backend.get_many([key for _, key in lookup])
+        found = {}
+        for (id, _), data in zip(lookup, values):
+            if data is not None:
+                found[id] = self._attach(session, model, {name: _load(item) for name, item in data.items()})
+        return found
+
+    async def put(self, session : AsyncSession, entity : Any) -> None:
+        """Положить загруженную из БД сущность в кеш (кроме прочитанной из реплики)"""
+        # реплика может отставать: старая версия вернулась бы в кеш после сброса
+        if session.info.get(REPLICA_KEY):
+            return
+        state = inspect(entity)
+        model = type(entity)
+        loaded = state.dict
+        data = {}
+        for attr in state.mapper.column_attrs:
+            if attr.key in self.exclude:
+                continue
+            if attr.key not in loaded:
+                return
+            data[attr.key] = _dump(loaded[attr.key])
+        id_key = self.key(model, "id", entity.id)
+        if id_key in self._pending(session):
+            return
+        items = {id_key: data}
+        for field in self.fields:
+            value = loaded.get(field)
+            if value is not None:
+                items[self.key(model, field, value)] = entity.id
+        await self.backend.set_many(items, self.ttl)
+
+    def invalidate(self, session : AsyncSession, model : Type, ids : Iterable[Any]) -> None:
+        """Пометить id как измененные в текущей транзакции"""
+        self._pending(session).update(self.key(model, "id", id) for id in ids)
+
+    def _pending(self, session : AsyncSession) -> Set[str]:
+        return session.info.setdefault(PENDING_KEY, {}).setdefault(self, set())
+
+    @staticmethod
+    def _attach(session : AsyncSession, model : Type, data : Dict[str, Any]) -> Any:
+        identity = inspect(model).identity_key_from_primary_key((data["id"],))
+        existing = session.identity_map.get(identity)
+        if existing is not None:
+            return existing
+        entity = model(**data)
+        make_transient_to_detached(entity)
+        session.add(entity)
+        return entity
+
+
+async def commit_invalidations(session : AsyncSession) -> None:
+    """
+    Дождаться сброса кеша после коммита (сам сброс запускает after_commit). 
+    BaseUnitOfWork.transaction() ждет его, чтобы после выхода из транзакции 
+    ни одна реплика не прочитала из общего кеша старые данные.
+    """
+    task = session.info.pop(COMMITTED_KEY, None)
+    if task is not None:
+        await task
+
+
+def discard_invalidations(session : AsyncSession) -> None:
+    """Забыть изменения откаченной транзакции - кеш содержит закоммиченные данные"""
+    session.info.pop(PENDING_KEY, None)
+
+
+async def _delete_committed(pending : Dict["EntityCache", Set[str]]) -> None:
+    for cache, keys in pending.items():
+        try:
+            await cache.backend.delete_many(keys)
+        except Exception as e:
+            logger.error(f"Не удалось сбросить кеш сущностей: {e}")
+
+
+def _mark(session : Session, model : Type, ids : Iterable[Any]) -> None:
+    cache = _tracked.get(model)
+    if cache is not None:
+        cache.invalidate(session, model, ids)
+
+
+def _after_flush(session : Session, flush_context) -> None:
+    for entity in chain(session.new, session.dirty, session.deleted):
+        id = getattr(entity, "id", None)
+        if id is not None:
+            _mark(session, type(entity), [id])
+
+
+def _do_orm_execute(state : ORMExecuteState) -> None:
+    """UPDATE/DELETE мимо репозитория: id затронутых строк выбираются тем же WHERE"""
+    if not (state.is_update or state.is_delete) or state.execution_options.get("entity_cache_tracked"):
+        return
+    for mapper in state.all_mappers:
+        if mapper.class_ not in _tracked:
+            continue
+        if isinstance(state.parameters, (list, tuple)):
+            # UPDATE по первичному ключу списком словарей
+            _mark(state.session, mapper.class_, [params["id"] for params in state.parameters if "id" in params])
+            continue
+        stmt = select(mapper.class_.id)
+        if state.statement.whereclause is not None:
+            stmt = stmt.where(state.statement.whereclause)
+        _mark(state.session, mapper.class_, state.session.execute(stmt).scalars().all())
+
+
+def _after_commit(session : Session) -> None:
+    pending = {cache : keys for cache, keys in session.info.pop(PENDING_KEY, {}).items() if keys}
+    if not pending:
+        return
+    # локальный уровень - сразу, общий (Redis) - задачей в том же event loop
+    for cache, keys in pending.items():
+        cache.backend.invalidate_local(keys)
+    try:
+        task = asyncio.get_running_loop().create_task(_delete_committed(pending))
+    except RuntimeError:
+        return
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+    session.info[COMMITTED_KEY] = task
+
+
+def _after_soft_rollback(session : Session, previous_transaction) -> None:
+    # откат SAVEPOINT не отменяет изменений внешней транзакции - их сброс нужен после коммита
+    if previous_transaction.parent is None:
+        session.info.pop(PENDING_KEY, None)
+
+
+def _install_listeners() -> None:
+    if event.contains(Session, "after_commit", _after_commit):
+        return
+    event.listen(Session, "after_flush", _after_flush)
+    event.listen(Session, "do_orm_execute", _do_orm_execute)
+    event.listen(Session, "after_commit", _after_commit)
+    event.listen(Session, "after_soft_rollback", _after_soft_rollback)
+
+
+def _dump(value : Any) -> Any:
+    if isinstance(value, datetime):
+        return {"__dt__": value.isoformat()}
+    if isinstance(value, date):
+        return {"__d__": value.isoformat()}
+    if isinstance(value, uuid.UUID):
+        return {"__uuid__": str(value)}
+    if isinstance(value, Decimal):
+        return {"__dec__": str(value)}
+    return value
+
+
+def _load(value : Any) -> Any:
+    if isinstance(value, dict) and len(value) == 1:
+        (tag, raw), = value.items()
+        if tag == "__dt__":
+            return datetime.fromisoformat(raw)
+        if tag == "__d__":
+            return date.fromisoformat(raw)
+        if tag == "__uuid__":
+            return uuid.UUID(raw)
+        if tag == "__dec__":
+            return Decimal(raw)
+    return value
@@ -0,0 +1,206 @@
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from ..logger.logger import logger
+
+
+class NPlusOneError(RuntimeError):
+    """Один и тот же запрос повторяется в скоупе больше порога (строгий режим детектора)"""
+
+
+@dataclass
+class QueryStats:
+    """
+    Статистика SQL запросов одного скоупа (unit of work или HTTP запрос)
+
+    Args:
+        name : имя скоупа
+        statements : количество запросов
+        total_time : суммарное время в БД, секунды
+        rows : строк получено (SELECT / RETURNING)
+        slowest_time : время самого медленного запроса, секунды
+        slowest_statement : самый медленный запрос
+        repeated : нормализованный запрос -> количество повторов (только с детектором N+1)
+        n_plus_one : запросы, превысившие порог детектора N+1
+    """
+    name : str = ""
+    statements : int = 0
+    total_time : float = 0.0
+    rows : int = 0
+    slowest_time : float = 0.0
+    slowest_statement : Optional[str] = None
+    repeated : Counter = field(default_factory=Counter)
+    n_plus_one : List[str] = field(default_factory=list)
+
+    def record(self, statement : str, normalized : Optional[str], duration : float, rows : int) -> int:
+        self.statements += 1
+        self.total_time += duration
+        self.rows += rows
+        if duration > self.slowest_time:
+            self.slowest_time = duration
+            self.slowest_statement = statement
+        if normalized is None:
+            return 0
+        self.repeated[normalized] += 1
+        return self.repeated[normalized]
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "name" : self.name,
+            "statements" : self.statements,
+            "total_time_ms" : round(self.total_time * 1000, 3),
+            "rows" : self.rows,
+            "slowest_time_ms" : round(self.slowest_time * 1000, 3),
+            "slowest_statement" : self.slowest_statement,
+            "n_plus_one" : self.n_plus_one,
+        }
+
+
+@dataclass
+class InstrumentationSettings:
+    """
+    Настройки инструментирования
+
+    Args:
+        slow_query_ms : порог медленного запроса для лога, None - не логировать
+        detect_n_plus_one : включить детектор N+1 (dev/test)
+        n_plus_one_threshold : сколько повторов одного запроса в скоупе допустимо
+        n_plus_one_raise : бросать NPlusOneError вместо предупреждения в лог
+    """
+    slow_query_ms : Optional[float] = None
+    detect_n_plus_one : bool = False
+    n_plus_one_threshold : int = 5
+    n_plus_one_raise : bool = False
+
+
+settings = InstrumentationSettings()
+
+# Активные скоупы текущей задачи: запрос записывается во все (HTTP запрос + unit of work)
+_scopes : ContextVar[Tuple[QueryStats, ...]] = ContextVar("query_scopes", default=())
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|(?<![$\w])\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r"\(\s*(?:\?|%\(\w+\)s|\$\d+|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|\$\d+|:\w+))*\s*\)")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_statement(statement : str) -> str:
+    """Запрос без литералов и с одинаковой формой списков параметров - ключ детектора N+1"""
+    statement = _LITERALS.sub("?", statement)
+    statement = _IN_LISTS.sub("(?)", statement)
+    return _SPACES.sub(" ", statement).strip()
+
+
+@contextmanager
+def query_scope(name : str) -> Iterator[QueryStats]:
+    """
+    Скоуп сбора статистики запросов.
+    Usage:
+        with query_scope("report") as stats:
+            ...
+        stats.statements
+    """
+    stats = QueryStats(name=name)
+    token = _scopes.set(_scopes.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _scopes.reset(token)
+
+
+def current_scopes() -> Tuple[QueryStats, ...]:
+    return _scopes.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info["query_started_at"].pop()
+    if settings.slow_query_ms is not None and duration * 1000 >= settings.slow_query_ms:
+        logger.warn(f"Медленный запрос {duration * 1000:.1f}ms: {_SPACES.sub(' ', statement)[:1000]}")
+    scopes = _scopes.get()
+    if not scopes:
+        return
+    rows = cursor.rowcount if cursor.description is not None and cursor.rowcount > 0 else 0
+    # регулярки на каждый запрос нужны только детектору N+1
+    normalized = normalize_statement(statement) if settings.detect_n_plus_one else None
+    for stats in scopes:
+        repeats = stats.record(statement, normalized, duration, rows)
+        if settings.detect_n_plus_one and repeats == settings.n_plus_one_threshold + 1:
+            stats.n_plus_one.append(normalized)
+            message = f"N+1 в скоупе {stats.name}: запрос повторен больше {settings.n_plus_one_threshold} раз: {normalized[:500]}"
+            if settings.n_plus_one_raise:
+                raise NPlusOneError(message)
+            logger.warn(message)
+
+
+def _on_error(exception_context):
+    started = exception_context.connection.info.get("query_started_at") if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+def instrument_engine(engine : AsyncEngine) -> AsyncEngine:
+    """Подключить сбор статистики к движку (повторный вызов ничего не делает)"""
+    sync_engine = engine.sync_engine
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(sync_engine, "handle_error", _on_error)
+    return engine
+
+
+def configure(
+        slow_query_ms : Optional[float] = None, 
+        detect_n_plus_one : bool = False, 
+        n_plus_one_threshold : int = 5, 
+        n_plus_one_raise : bool = False
+        ) -> None:
+    """Настроить slow query лог и детектор N+1"""
+    settings.slow_query_ms = slow_query_ms
+    settings.detect_n_plus_one = detect_n_plus_one
+    settings.n_plus_one_threshold = n_plus_one_threshold
+    settings.n_plus_one_raise = n_plus_one_raise
+
+
+class QueryStatsMiddleware:
+    """
+    ASGI middleware: статистика запросов к БД на каждый HTTP запрос.
+    Добавляет заголовки X-DB-Queries и X-DB-Time-Ms, итог пишет в debug лог.
+
+    Usage:
+        app.add_middleware(QueryStatsMiddleware)
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        with query_scope(f"{scope['method']} {scope['path']}") as stats:
+
+            async def send_with_stats(message):
+                if message["type"] == "http.response.start":
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-db-queries", str(stats.statements).encode()))
+                    headers.append((b"x-db-time-ms", f"{stats.total_time * 1000:.2f}".encode()))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            await self.app(scope, receive, send_with_stats)
+        if stats.statements:
+            logger.debug(
+                f"{stats.name}: запросов {stats.statements}, "
+                f"{stats.total_time * 1000:.1f}ms, строк {stats.rows}, "
+                f"самый медленный {stats.slowest_time * 1000:.1f}ms"
+            )
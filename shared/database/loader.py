@@ -0,0 +1,74 @@
+import asyncio
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set
+
+if TYPE_CHECKING:
+    from .base import BaseRepository
+
+
+class EntityLoader:
+    """
+    Загрузчик по id в рамках одного unit of work (DataLoader).
+    Конкурентные get_by_id, запущенные в одном тике event loop, 
+    склеиваются в один запрос WHERE id = ANY(:ids).
+
+    Запросы пачек выполняются по очереди: AsyncSession не допускает 
+    параллельных запросов в одной сессии.
+
+    Example:
+        # Один запрос вместо трех
+        users = await asyncio.gather(*(repository.get_by_id(id) for id in (1, 2, 3)))
+    """
+
+    def __init__(self, repository: "BaseRepository"):
+        self._repository = repository
+        self._pending: Dict[Any, List[asyncio.Future]] = {}
+        self._scheduled = False
+        # ссылки на задачи пачек: иначе задачу может собрать GC посреди запроса
+        self._tasks: Set[asyncio.Task] = set()
+        self._lock = asyncio.Lock()
+        self.batches = 0
+
+    async def load(self, id: Any) -> Optional[Any]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.setdefault(id, []).append(future)
+        if not self._scheduled:
+            self._scheduled = True
+            loop.call_soon(self._dispatch)
+        return await future
+
+    def _dispatch(self) -> None:
+        batch, self._pending = self._pending, {}
+        self._scheduled = False
+        task = asyncio.ensure_future(self._load_batch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _load_batch(self, batch: Dict[Any, List[asyncio.Future]]) -> None:
+        try:
+            async with self._lock:
+                self.batches += 1
+                if len(batch) == 1:
+                    (id,) = batch
+                    entity = await self._repository._fetch_by_id(id)
+                    found = {id: entity} if entity is not None else {}
+                else:
+                    entities = await self._repository.get_many_by_ids(list(batch))
+                    found = {entity.id: entity for entity in entities}
+        except BaseException as e:
+            # отмена задачи пачки отменяет и ожидающих, иначе get_by_id зависнет
+            for futures in batch.values():
+                for future in futures:
+                    if future.done():
+                        continue
+                    if isinstance(e, Exception):
+                        future.set_exception(e)
+                    else:
+                        future.cancel()
+            if not isinstance(e, Exception):
+                raise
+            return
+        for id, futures in batch.items():
+            for future in futures:
+                if not future.done():
+                    future.set_result(found.get(id))
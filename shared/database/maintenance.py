@@ -0,0 +1,163 @@
+import asyncio
+import hashlib
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Type
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..logger.logger import logger
+from .base import BaseRepository
+
+
+def advisory_lock_key(name : str) -> int:
+    """Стабильный 64-битный ключ advisory lock по имени задачи"""
+    return int.from_bytes(hashlib.blake2b(name.encode(), digest_size=8).digest(), "big", signed=True)
+
+
+@dataclass
+class PurgeBatch:
+    rows : int
+    duration_ms : float
+
+
+@dataclass
+class PurgeReport:
+    """
+    Итог очистки
+
+    Args:
+        name : имя задачи
+        locked : advisory lock получен (False - задачу выполняет другая реплика)
+        batches : удалено строк и время по каждой пачке
+        elapsed_ms : общее время, включая паузы
+    """
+    name : str
+    locked : bool = True
+    batches : List[PurgeBatch] = field(default_factory=list)
+    elapsed_ms : float = 0.0
+
+    @property
+    def rows(self) -> int:
+        return sum(batch.rows for batch in self.batches)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "name" : self.name,
+            "locked" : self.locked,
+            "rows" : self.rows,
+            "batches" : len(self.batches),
+            "elapsed_ms" : round(self.elapsed_ms, 3),
+            "max_batch_ms" : max((batch.duration_ms for batch in self.batches), default=0.0),
+            "batch_rows" : [batch.rows for batch in self.batches],
+            "batch_ms" : [batch.duration_ms for batch in self.batches],
+        }
+
+
+async def purge_in_batches(
+        session_factory : Callable[[], AsyncSession],
+        repository_cls : Type[BaseRepository],
+        conditions : Sequence[Any],
+        name : str,
+        batch_size : int = 1000,
+        pause : float = 0.1,
+        max_batches : Optional[int] = None,
+        ) -> PurgeReport:
+    """
+    Удаление по условию ограниченными пачками, каждая в своей транзакции.
+
+    Задача выполняется одной репликой: на время работы держится 
+    pg_try_advisory_xact_lock в отдельной транзакции. Если блокировку 
+    держит другой процесс, очистка пропускается (locked=False). 
+    Блокировка транзакционная - при падении процесса Postgres снимет ее сам.
+
+    Args:
+        session_factory : фабрика сессий primary
+        repository_cls : класс репозитория (конструктор от сессии)
+        conditions : условия WHERE
+        name : имя задачи (ключ advisory lock и логов)
+        batch_size : строк в пачке
+        pause : пауза между пачками, секунды - ограничивает нагрузку на БД и WAL
+        max_batches : ограничение числа пачек за запуск
+    """
+    report = PurgeReport(name=name)
+    started = time.perf_counter()
+    async with session_factory() as lock_session:
+        async with lock_session.begin():
+            locked = await lock_session.scalar(
+                text("SELECT pg_try_advisory_xact_lock(:key)"), {"key" : advisory_lock_key(name)}
+            )
+            if not locked:
+                report.locked = False
+                logger.debug(f"{name}: очистку выполняет другой процесс")
+                return report
+            while max_batches is None or len(report.batches) < max_batches:
+                batch_started = time.perf_counter()
+                async with session_factory() as session:
+                    async with session.begin():
+                        rows = await repository_cls(session).delete_batch(*conditions, limit=batch_size)
+                report.batches.append(PurgeBatch(rows, round((time.perf_counter() - batch_started) * 1000, 3)))
+                if rows < batch_size:
+                    break
+                await asyncio.sleep(pause)
+    report.elapsed_ms = (time.perf_counter() - started) * 1000
+    if report.rows:
+        logger.info(
+            f"{name}: удалено {report.rows} строк за {len(report.batches)} пачек, "
+            f"{report.elapsed_ms:.1f}ms"
+        )
+    return report
+
+
+class PeriodicTask:
+    """
+    Периодический запуск корутины в фоне (обслуживающие задачи).
+    Ошибки запуска логируются и не останавливают расписание.
+
+    Args:
+        name : имя задачи
+        func : корутина без аргументов
+        interval : период, секунды
+
+    Usage:
+        task = PeriodicTask("purge", purge, interval=3600)
+        task.start()
+        ...
+        await task.stop()
+    """
+
+    def __init__(self, name : str, func : Callable[[], Any], interval : float):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.runs = 0
+        self.last_result : Any = None
+        self._task : Optional[asyncio.Task] = None
+
+    async def run_once(self) -> Any:
+        try:
+            self.last_result = await self.func()
+        except Exception as e:
+            logger.error(f"Задача {self.name} завершилась ошибкой: {e}")
+        self.runs += 1
+        return self.last_result
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.run_once()
+
+    def start(self) -> None:
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
@@ -0,0 +1,100 @@
+import json
+import uuid
+import base64
+import binascii
+from dataclasses import dataclass, field
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Generic, List, Optional, Tuple, TypeVar
+
+
+T = TypeVar('T')
+
+
+@dataclass(frozen=True)
+class Page(Generic[T]):
+    """
+    Страница keyset-пагинации
+
+    Args:
+        items : объекты страницы
+        next_cursor : токен следующей страницы, None если страница последняя
+    """
+    items : List[T] = field(default_factory=list)
+    next_cursor : Optional[str] = None
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+
+# Типы значений сортировки, которых нет в JSON: тег -> (тип, разбор строки)
+_TAGGED = {
+    "dt" : (datetime, datetime.fromisoformat),
+    "d" : (date, date.fromisoformat),
+    "t" : (time, time.fromisoformat),
+    "uuid" : (uuid.UUID, uuid.UUID),
+    "dec" : (Decimal, Decimal),
+}
+
+
+def _encode_value(value : Any) -> Any:
+    if value is None:
+        raise ValueError("Keyset pagination does not support NULL sort values")
+    # datetime - подкласс date, проверяется раньше
+    for tag, (type_, _) in _TAGGED.items():
+        if isinstance(value, type_):
+            return {tag : value.isoformat() if hasattr(value, "isoformat") else str(value)}
+    if isinstance(value, (str, int, float, bool)):
+        return value
+    raise ValueError(f"Unsupported cursor value type {type(value).__name__}")
+
+
+def _decode_value(value : Any) -> Any:
+    if isinstance(value, dict):
+        if len(value) != 1:
+            raise ValueError("Invalid pagination cursor")
+        (tag, raw), = value.items()
+        if tag not in _TAGGED:
+            raise ValueError("Invalid pagination cursor")
+        return _TAGGED[tag][1](raw)
+    return value
+
+
+def encode_cursor(order_by : str, value : Any, id : int) -> str:
+    """
+    Упаковка позиции последней строки страницы в непрозрачный токен
+    Args:
+        order_by : поле сортировки
+        value : значение поля сортировки у последней строки 
+            (datetime, date, time, UUID и Decimal сохраняются с тегом типа)
+        id : id последней строки (разрешает одинаковые value)
+    Returns:
+        cursor : url-safe base64 токен
+    Raises:
+        ValueError : value - NULL или неподдерживаемый тип
+    """
+    raw = json.dumps([order_by, _encode_value(value), id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor : str, order_by : str) -> Tuple[Any, int]:
+    """
+    Распаковка токена
+    Args:
+        cursor : токен из encode_cursor
+        order_by : ожидаемое поле сортировки
+    Returns:
+        (value, id) : позиция последней строки предыдущей страницы
+    Raises:
+        ValueError : токен поврежден или выдан для другой сортировки
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_order_by, value, id = json.loads(raw)
+        value = _decode_value(value)
+    except (binascii.Error, ValueError, TypeError) as e:
+        raise ValueError("Invalid pagination cursor") from e
+    if cursor_order_by != order_by or not isinstance(id, int):
+        raise ValueError("Invalid pagination cursor")
+    return value, id
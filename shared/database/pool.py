@@ -0,0 +1,248 @@
+import asyncio
+import time
+from contextlib import AsyncExitStack
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Set
+from uuid import uuid4
+
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.util.queue import AsyncAdaptedQueue
+
+from ..logger.logger import logger
+
+
+@dataclass
+class PoolMetrics:
+    """
+    Счетчики ожидания соединений пула
+
+    Args:
+        checkouts : выдано соединений
+        waits : выдач, которым пришлось ждать свободное соединение
+        wait_time : суммарное ожидание, секунды
+        max_wait : самое долгое ожидание, секунды
+        timeouts : ожиданий, закончившихся pool_timeout
+    """
+    checkouts : int = 0
+    waits : int = 0
+    wait_time : float = 0.0
+    max_wait : float = 0.0
+    timeouts : int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "checkouts" : self.checkouts,
+            "waits" : self.waits,
+            "wait_time_ms" : round(self.wait_time * 1000, 3),
+            "max_wait_ms" : round(self.max_wait * 1000, 3),
+            "avg_wait_ms" : round(self.wait_time * 1000 / self.waits, 3) if self.waits else 0.0,
+            "timeouts" : self.timeouts,
+        }
+
+
+class _MeteredQueue(AsyncAdaptedQueue):
+    """Очередь пула: считается только ожидание свободного соединения, без создания нового"""
+
+    metrics : Optional[PoolMetrics] = None
+    threshold : float = 0.0
+
+    def get(self, block : bool = True, timeout : Optional[float] = None):
+        started = time.perf_counter()
+        try:
+            return super().get(block, timeout)
+        finally:
+            waited = time.perf_counter() - started
+            if self.metrics is not None and waited >= self.threshold:
+                self.metrics.waits += 1
+                self.metrics.wait_time += waited
+                self.metrics.max_wait = max(self.metrics.max_wait, waited)
+
+
+class MeteredQueuePool(AsyncAdaptedQueuePool):
+    """
+    AsyncAdaptedQueuePool, который считает ожидание свободного соединения.
+    Подключение нового соединения (overflow) в ожидание не входит - 
+    метрика показывает насыщение пула, а не задержку connect/TLS
+    """
+
+    _queue_class = _MeteredQueue
+    # Быстрее этого выдача соединения считается выдачей без ожидания
+    WAIT_THRESHOLD = 0.001
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+        self._pool.metrics = self.metrics
+        self._pool.threshold = self.WAIT_THRESHOLD
+
+    def _do_get(self):
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        finally:
+            self.metrics.checkouts += 1
+
+
+def build_engine(
+        url : str,
+        pool_size : int = 20,
+        max_overflow : int = 10,
+        pool_timeout : float = 30,
+        pool_recycle : int = 1800,
+        pre_ping : bool = False,
+        statement_cache_size : int = 100,
+        pgbouncer : bool = False,
+        **kwargs
+        ) -> AsyncEngine:
+    """
+    Движок asyncpg с MeteredQueuePool.
+
+    Args:
+        url : строка подключения
+        pool_size, max_overflow, pool_timeout, pool_recycle : параметры пула
+        pre_ping : проверка соединения на каждой выдаче (лишний round trip),
+            по умолчанию выключена - живость проверяет PoolMonitor в фоне
+        statement_cache_size : размер кеша подготовленных запросов на соединение
+        pgbouncer : совместимость с PgBouncer в режиме transaction/statement - 
+            кеши подготовленных запросов выключены, имена запросов уникальны
+        **kwargs : остальные параметры create_async_engine
+    """
+    connect_args = dict(kwargs.pop("connect_args", {}))
+    if pgbouncer:
+        connect_args.update(
+            statement_cache_size=0,
+            prepared_statement_cache_size=0,
+            prepared_statement_name_func=lambda: f"__asyncpg_{uuid4()}__",
+        )
+    else:
+        connect_args.update(
+            statement_cache_size=statement_cache_size,
+            prepared_statement_cache_size=statement_cache_size,
+        )
+    return create_async_engine(
+        url,
+        poolclass=MeteredQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=pool_timeout,
+        pool_recycle=pool_recycle,
+        pool_pre_ping=pre_ping,
+        connect_args=connect_args,
+        **kwargs
+    )
+
+
+async def warmup_pool(engine : AsyncEngine, connections : int) -> int:
+    """
+    Заранее открыть соединения пула, чтобы первые запросы после деплоя 
+    не платили за установку соединения.
+
+    Args:
+        engine : движок
+        connections : сколько соединений открыть (не больше размера пула)
+    Returns:
+        количество открытых соединений
+    """
+    size = getattr(engine.pool, "size", None)
+    if size is not None:
+        connections = min(connections, size())
+    if connections <= 0:
+        return 0
+    async with AsyncExitStack() as stack:
+        # Держим все соединения одновременно, иначе пул отдаст одно и то же.
+        # Открываем по одному: при ошибке в gather соединения, открытые 
+        # параллельно, оказались бы вне стека и не вернулись бы в пул
+        for _ in range(connections):
+            conn = await stack.enter_async_context(engine.connect())
+            await conn.execute(text("SELECT 1"))
+    return connections
+
+
+class PoolMonitor:
+    """
+    Фоновая проверка живости соединений вместо pool_pre_ping.
+
+    Раз в interval секунд выполняет SELECT 1 на каждом движке. 
+    Если соединение оборвано, SQLAlchemy инвалидирует весь пул 
+    и следующие выдачи получают новые соединения.
+
+    Движок, проверку которого забрал HealthMonitor (probe), в фоне 
+    не проверяется - один SELECT 1 обновляет оба отчета.
+
+    Args:
+        engines : движки по имени
+        interval : период проверки, секунды
+    
+    Usage:
+        monitor = PoolMonitor({"primary" : engine}, interval=30)
+        health_monitor.add("postgres", monitor.probe("primary"))
+        monitor.start()
+        ...
+        await monitor.stop()
+    """
+
+    def __init__(self, engines : Dict[str, AsyncEngine], interval : float = 30):
+        self.engines = engines
+        self.interval = interval
+        self.state : Dict[str, Dict[str, Any]] = {
+            name : {"alive" : None, "latency_ms" : None, "failures" : 0} for name in engines
+        }
+        self._task : Optional[asyncio.Task] = None
+        self._shared : Set[str] = set()
+
+    async def check(self, skip : Iterable[str] = ()) -> Dict[str, Dict[str, Any]]:
+        """Проверить все движки (кроме skip) один раз"""
+        skip = set(skip)
+        await asyncio.gather(*(
+            self._ping(name, engine) for name, engine in self.engines.items() if name not in skip
+        ))
+        return self.state
+
+    def probe(self, name : str) -> Callable[[], Awaitable[None]]:
+        """
+        Проверка движка для HealthMonitor: обновляет state этого монитора, 
+        ошибка пробрасывается. Фоновый цикл монитора движок больше не проверяет.
+        """
+        engine = self.engines[name]
+        self._shared.add(name)
+
+        async def probe() -> None:
+            await self._ping(name, engine, reraise=True)
+        return probe
+
+    async def _ping(self, name : str, engine : AsyncEngine, reraise : bool = False) -> None:
+        state = self.state[name]
+        started = time.perf_counter()
+        try:
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+        except Exception as e:
+            state.update(alive=False, latency_ms=None, failures=state["failures"] + 1)
+            logger.warn(f"Пул {name}: проверка соединения не прошла: {e}")
+            if reraise:
+                raise
+            return
+        state.update(alive=True, latency_ms=round((time.perf_counter() - started) * 1000, 3))
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.check(skip=self._shared)
+
+    def start(self) -> None:
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
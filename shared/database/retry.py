@@ -0,0 +1,58 @@
+import random
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, Optional
+
+from sqlalchemy.exc import DBAPIError
+
+
+# SQLSTATE временных ошибок: транзакцию можно безопасно повторить целиком
+TRANSIENT_SQLSTATES = {
+    "40001": "serialization_failure",
+    "40P01": "deadlock_detected",
+}
+
+
+def transient_sqlstate(error : BaseException) -> Optional[str]:
+    """
+    SQLSTATE, если ошибка временная (конфликт сериализации, deadlock), иначе None.
+    Смотрит на исходную ошибку драйвера, в том числе обернутую в цепочку __cause__.
+    """
+    while error is not None:
+        if isinstance(error, DBAPIError):
+            orig = error.orig
+            sqlstate = getattr(orig, "sqlstate", None) or getattr(orig, "pgcode", None)
+            if sqlstate in TRANSIENT_SQLSTATES:
+                return sqlstate
+        error = error.__cause__
+    return None
+
+
+def backoff_delay(attempt : int, base : float = 0.02, cap : float = 1.0) -> float:
+    """
+    Задержка перед повтором: экспоненциальная с полным jitter
+    Args:
+        attempt : номер повтора, начиная с 1
+        base : задержка первого повтора, секунды
+        cap : максимальная задержка, секунды
+    """
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+@dataclass
+class RetryStats:
+    """Счетчики повторов транзакций"""
+    retries : int = 0
+    exhausted : int = 0
+    succeeded_after_retry : int = 0
+    by_sqlstate : Dict[str, int] = field(default_factory=dict)
+
+    def record_retry(self, sqlstate : str) -> None:
+        self.retries += 1
+        name = TRANSIENT_SQLSTATES.get(sqlstate, sqlstate)
+        self.by_sqlstate[name] = self.by_sqlstate.get(name, 0) + 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+retry_stats = RetryStats()
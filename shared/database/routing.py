@@ -0,0 +1,238 @@
+import time
+import asyncio
+import itertools
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from ..logger.logger import logger
+from .pool import warmup_pool
+
+
+# Отставание реплики в секундах. Если реплика проиграла весь полученный WAL - отставания нет
+# (на простаивающем primary pg_last_xact_replay_timestamp() стареет и без реального лага).
+# Без WAL receiver (репликация оборвалась) LSN тоже равны, но реплика отстает сколько угодно - NULL.
+# Без pg_read_all_stats в pg_stat_wal_receiver виден только pid, status - NULL
+REPLICA_LAG_SQL = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN NOT EXISTS (
+            SELECT 1 FROM pg_stat_wal_receiver WHERE status IS NULL OR status = 'streaming'
+        ) THEN NULL
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """
+)
+
+STRATEGIES = ("round_robin", "least_connections")
+# Ключ session.info сессии реплики (имя узла): прочитанное из реплики не кладется в кеш
+REPLICA_KEY = "replica"
+
+
+async def probe_replica_lag(engine : AsyncEngine) -> Optional[float]:
+    """Отставание реплики от primary в секундах, None - реплика не получает WAL"""
+    async with engine.connect() as conn:
+        result = await conn.execute(REPLICA_LAG_SQL)
+        lag = result.scalar_one()
+        return float(lag) if lag is not None else None
+
+
+@dataclass
+class EngineNode:
+    """Движок с состоянием маршрутизации"""
+    name : str
+    engine : AsyncEngine
+    factory : async_sessionmaker
+    lag : Optional[float] = None
+    lag_checked_at : float = field(default=float("-inf"))
+    healthy : bool = True
+    sessions : int = 0
+
+    def checked_out(self) -> int:
+        checkedout = getattr(self.engine.pool, "checkedout", None)
+        return checkedout() if checkedout else 0
+
+    def stats(self) -> Dict[str, Any]:
+        pool = self.engine.pool
+        return {
+            "pool" : pool.__class__.__name__,
+            "size" : pool.size() if hasattr(pool, "size") else None,
+            "checked_out" : self.checked_out(),
+            "checked_in" : pool.checkedin() if hasattr(pool, "checkedin") else None,
+            "overflow" : pool.overflow() if hasattr(pool, "overflow") else None,
+            "max_overflow" : getattr(pool, "_max_overflow", None),
+            "wait" : pool.metrics.as_dict() if hasattr(pool, "metrics") else None,
+            "sessions" : self.sessions,
+            "lag" : self.lag,
+            "healthy" : self.healthy,
+        }
+
+
+class EngineRouter:
+    """
+    Маршрутизация сессий между primary и репликами.
+
+    Вызов router() возвращает сессию primary - роутер подставляется везде, 
+    где ожидается фабрика сессий (async_sessionmaker).
+    read_session() отдает сессию реплики, выбранной по стратегии; реплика, 
+    отставшая больше max_lag или недоступная, пропускается, 
+    если подходящих реплик нет - чтение идет в primary.
+
+    Отставание замеряется в фоне (start/stop, как PoolMonitor), выбор реплики 
+    только читает последний замер и не ждет запроса к реплике. Пока замера нет 
+    или он старше lag_max_age, реплика считается неподходящей.
+
+    Args:
+        primary : движок primary
+        replicas : движки реплик
+        strategy : round_robin | least_connections (меньше всего занятых соединений пула)
+        max_lag : допустимое отставание реплики в секундах
+        lag_check_interval : как часто перепроверять отставание реплики, секунды
+        lag_max_age : замер старше этого не используется, по умолчанию 3 * lag_check_interval
+        lag_probe : замер отставания (по умолчанию запрос к pg_last_xact_replay_timestamp), None - реплика неисправна
+        **session_kwargs : параметры async_sessionmaker
+
+    Example:
+        router = EngineRouter(primary_engine, [replica_engine], expire_on_commit=False)
+        router.start()
+        uow = BaseUnitOfWork(session_factory=router)
+        async with uow.readonly() as u:      # реплика
+            ...
+        async with uow.transaction() as u:   # всегда primary
+            ...
+    """
+
+    def __init__(
+            self, 
+            primary : AsyncEngine, 
+            replicas : Sequence[AsyncEngine] = (), 
+            strategy : str = "round_robin", 
+            max_lag : float = 5.0, 
+            lag_check_interval : float = 1.0, 
+            lag_max_age : Optional[float] = None,
+            lag_probe : Optional[Callable[[AsyncEngine], Awaitable[Optional[float]]]] = None,
+            **session_kwargs
+            ):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown routing strategy {strategy}, expected one of {STRATEGIES}")
+        session_kwargs.setdefault("class_", AsyncSession)
+        self.strategy = strategy
+        self.max_lag = max_lag
+        self.lag_check_interval = lag_check_interval
+        self.lag_max_age = 3 * lag_check_interval if lag_max_age is None else lag_max_age
+        self._lag_probe = lag_probe or probe_replica_lag
+        self.primary = self._node("primary", primary, session_kwargs)
+        self.replicas : List[EngineNode] = [
+            self._node(f"replica-{i}", engine, session_kwargs) for i, engine in enumerate(replicas)
+        ]
+        self._round_robin = itertools.count()
+        self._task : Optional[asyncio.Task] = None
+        self.fallbacks = 0
+
+    @staticmethod
+    def _node(name : str, engine : AsyncEngine, session_kwargs : Dict[str, Any]) -> EngineNode:
+        return EngineNode(name=name, engine=engine, factory=async_sessionmaker(bind=engine, **session_kwargs))
+
+    @property
+    def engines(self) -> List[AsyncEngine]:
+        return [self.primary.engine, *(node.engine for node in self.replicas)]
+
+    def __call__(self) -> AsyncSession:
+        """Сессия primary (запись, транзакции)"""
+        self.primary.sessions += 1
+        return self.primary.factory()
+
+    async def read_session(self) -> AsyncSession:
+        """Сессия для чтения: подходящая реплика или primary"""
+        node = await self._pick_replica()
+        if node is None:
+            return self()
+        node.sessions += 1
+        return node.factory(info={REPLICA_KEY : node.name})
+
+    async def _pick_replica(self) -> Optional[EngineNode]:
+        if not self.replicas:
+            return None
+        if self.strategy == "least_connections":
+            candidates = sorted(self.replicas, key=EngineNode.checked_out)
+        else:
+            start = next(self._round_robin) % len(self.replicas)
+            candidates = self.replicas[start:] + self.replicas[:start]
+        for node in candidates:
+            if self._is_fresh(node):
+                return node
+        self.fallbacks += 1
+        logger.debug("Нет реплики с допустимым отставанием, чтение из primary")
+        return None
+
+    def _is_fresh(self, node : EngineNode) -> bool:
+        if time.monotonic() - node.lag_checked_at > self.lag_max_age:
+            return False
+        return node.healthy and node.lag is not None and node.lag <= self.max_lag
+
+    async def check_replicas(self) -> None:
+        """Замерить отставание всех реплик один раз"""
+        await asyncio.gather(*(self._check(node) for node in self.replicas))
+
+    async def _check(self, node : EngineNode) -> None:
+        try:
+            node.lag = await self._lag_probe(node.engine)
+            node.healthy = node.lag is not None
+            if not node.healthy:
+                logger.warn(f"Реплика {node.name} не получает WAL от primary")
+        except Exception as e:
+            logger.warn(f"Реплика {node.name} недоступна: {e}")
+            node.lag = None
+            node.healthy = False
+        node.lag_checked_at = time.monotonic()
+
+    async def _run(self) -> None:
+        while True:
+            await self.check_replicas()
+            await asyncio.sleep(self.lag_check_interval)
+
+    def start(self) -> None:
+        """Запустить фоновый замер отставания реплик"""
+        if self._task is None and self.replicas:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Состояние пулов и реплик"""
+        return {
+            "strategy" : self.strategy,
+            "fallbacks" : self.fallbacks,
+            "engines" : {node.name: node.stats() for node in [self.primary, *self.replicas]},
+        }
+
+    async def warmup(self, connections : int) -> Dict[str, int]:
+        """Открыть заранее connections соединений в пуле каждого движка"""
+        nodes = [self.primary, *self.replicas]
+        opened = await asyncio.gather(
+            *(warmup_pool(node.engine, connections) for node in nodes), return_exceptions=True
+        )
+        result = {}
+        for node, count in zip(nodes, opened):
+            if isinstance(count, Exception):
+                logger.warn(f"Не удалось прогреть пул {node.name}: {count}")
+                count = 0
+            result[node.name] = count
+        return result
+
+    async def dispose(self) -> None:
+        await self.stop()
+        for engine in self.engines:
+            await engine.dispose()
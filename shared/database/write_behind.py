@@ -0,0 +1,202 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import DateTime, Float, cast, column, func, literal_column, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..logger.logger import logger
+from .bulk import chunked
+
+
+@dataclass
+class WriteBehindStats:
+    """
+    Счетчики буфера отложенной записи
+
+    Args:
+        touches : отметок активности
+        coalesced : отметок, склеенных с уже ожидающей записью того же id
+        flushes : сбросов буфера
+        statements : UPDATE запросов
+        rows : строк отправлено в БД
+        errors : неудачных сбросов (записи возвращаются в буфер)
+        max_staleness : наибольшая задержка записи отметки в БД, секунды
+    """
+    touches : int = 0
+    coalesced : int = 0
+    flushes : int = 0
+    statements : int = 0
+    rows : int = 0
+    errors : int = 0
+    max_staleness : float = 0.0
+
+    @property
+    def write_amplification(self) -> float:
+        """Строк записано на одну отметку: 1.0 - запись на каждый запрос, меньше - экономия"""
+        return self.rows / self.touches if self.touches else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "touches" : self.touches,
+            "coalesced" : self.coalesced,
+            "flushes" : self.flushes,
+            "statements" : self.statements,
+            "rows" : self.rows,
+            "errors" : self.errors,
+            "write_amplification" : round(self.write_amplification, 4),
+            "max_staleness_s" : round(self.max_staleness, 3),
+        }
+
+
+class ActivityBuffer:
+    """
+    Буфер отложенной записи отметок активности (write-behind).
+
+    touch(id) только запоминает момент отметки в словаре в памяти: повторные 
+    отметки одного id склеиваются, остается последняя. Буфер сбрасывается 
+    раз в max_staleness секунд или при max_pending ожидающих id одним запросом 
+    на пачку. Время считается по часам БД, как default/onupdate колонки (now()), 
+    из возраста отметки:
+        UPDATE table SET column = now() - v.age * interval '1 second' 
+        FROM (VALUES (:id, :age), ...) AS v(id, age)
+        WHERE table.id = v.id AND table.column < now() - v.age * interval '1 second'
+
+    Отметки, не дошедшие до БД из-за ошибки, возвращаются в буфер. 
+    При остановке процесса (stop) буфер сбрасывается, при падении - теряется 
+    не больше max_staleness секунд активности.
+
+    Args:
+        session_factory : фабрика сессий primary (async_sessionmaker или EngineRouter)
+        model : модель
+        column_name : колонка времени активности
+        max_staleness : максимальная задержка записи, секунды
+        max_pending : сбросить раньше, если ожидают столько id
+        chunk_size : строк в одном UPDATE
+
+    Usage:
+        activity = ActivityBuffer(router, UserSession, "last_activity", max_staleness=5)
+        activity.start()
+        activity.touch(session_id)
+        ...
+        await activity.stop()
+    """
+
+    def __init__(
+            self, 
+            session_factory : Callable[[], AsyncSession], 
+            model : Any, 
+            column_name : str, 
+            max_staleness : float = 5.0, 
+            max_pending : int = 1000, 
+            chunk_size : int = 1000
+            ):
+        self._session_factory = session_factory
+        self.model = model
+        self.column = getattr(model, column_name)
+        self.max_staleness = max_staleness
+        self.max_pending = max_pending
+        self.chunk_size = chunk_size
+        self.stats = WriteBehindStats()
+        # id -> (monotonic время последней отметки, monotonic время первой ожидающей отметки)
+        self._pending : Dict[Any, Tuple[float, float]] = {}
+        self._lock = asyncio.Lock()
+        self._stopping = asyncio.Event()
+        self._task : Optional[asyncio.Task] = None
+        self._flush_task : Optional[asyncio.Task] = None
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def touch(self, id : Any) -> None:
+        """Отметить активность сейчас (без запроса к БД)"""
+        now = time.monotonic()
+        self.stats.touches += 1
+        current = self._pending.get(id)
+        if current is not None:
+            self.stats.coalesced += 1
+            self._pending[id] = (now, current[1])
+            return
+        self._pending[id] = (now, now)
+        if len(self._pending) >= self.max_pending and (self._flush_task is None or self._flush_task.done()):
+            self._flush_task = asyncio.ensure_future(self.flush())
+
+    async def flush(self) -> int:
+        """
+        Записать ожидающие отметки
+        Returns:
+            количество отправленных строк
+        """
+        async with self._lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, {}
+            self.stats.flushes += 1
+            try:
+                await self._write(batch)
+            except asyncio.CancelledError:
+                self._restore(batch)
+                raise
+            except Exception as e:
+                self.stats.errors += 1
+                logger.warn(f"Не удалось записать {len(batch)} отметок {self.model.__name__}.{self.column.key}: {e}")
+                self._restore(batch)
+                return 0
+            now = time.monotonic()
+            self.stats.max_staleness = max(
+                self.stats.max_staleness, now - min(first_seen for _, first_seen in batch.values())
+            )
+            self.stats.rows += len(batch)
+            return len(batch)
+
+    def _restore(self, batch : Dict[Any, Tuple[float, float]]) -> None:
+        """Вернуть незаписанную пачку в буфер, не затирая более поздние отметки"""
+        for id, (touched, first_seen) in batch.items():
+            current = self._pending.get(id)
+            if current is None:
+                self._pending[id] = (touched, first_seen)
+            else:
+                self._pending[id] = (max(touched, current[0]), min(first_seen, current[1]))
+
+    async def _write(self, batch : Dict[Any, Tuple[float, float]]) -> None:
+        id_type = self.model.__table__.c.id.type
+        now = time.monotonic()
+        async with self._session_factory() as session:
+            async with session.begin():
+                for chunk in chunked(list(batch.items()), self.chunk_size):
+                    rows = values(column("id", id_type), column("age", Float), name="v").data(
+                        [(id, now - touched) for id, (touched, _) in chunk]
+                    )
+                    at = cast(func.now(), DateTime) - rows.c.age * literal_column("interval '1 second'")
+                    await session.execute(
+                        update(self.model)
+                        .where(self.model.id == rows.c.id, self.column < at)
+                        .values({self.column.key : at})
+                        .execution_options(synchronize_session=False)
+                    )
+                    self.stats.statements += 1
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.max_staleness)
+            except asyncio.TimeoutError:
+                await self.flush()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._stopping.clear()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Остановить фоновый сброс и записать все, что осталось в буфере"""
+        if self._task is not None:
+            # без cancel: сброс, который уже идет, дописывает свою пачку
+            self._stopping.set()
+            await self._task
+            self._task = None
+        if self._flush_task is not None:
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+        await self.flush()
@@ -0,0 +1,4 @@
+from .monitor import Dependency, HealthMonitor, ProbeResult
+from .probes import http_probe, redis_probe, sql_probe
+
+__all__ = ['Dependency', 'HealthMonitor', 'ProbeResult', 'http_probe', 'redis_probe', 'sql_probe']
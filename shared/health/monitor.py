@@ -0,0 +1,197 @@
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+from ..logger.logger import logger
+
+
+Probe = Callable[[], Awaitable[Any]]
+
+
+@dataclass
+class ProbeResult:
+    """
+    Результат одной проверки зависимости
+
+    Args:
+        ok : зависимость ответила без ошибки за timeout
+        latency_ms : время ответа
+        checked_at : время проверки (unix time)
+        error : текст ошибки
+    """
+    ok : bool
+    latency_ms : float
+    checked_at : float
+    error : Optional[str] = None
+
+
+@dataclass
+class Dependency:
+    """
+    Зависимость сервиса и история ее проверок
+
+    Args:
+        name : имя зависимости
+        probe : корутина проверки, ошибка или таймаут - зависимость недоступна
+        critical : влияет на readiness сервиса
+        history : последние результаты проверок
+    """
+    name : str
+    probe : Probe
+    critical : bool = True
+    history : Deque[ProbeResult] = field(default_factory=deque)
+    consecutive_failures : int = 0
+
+    @property
+    def last(self) -> Optional[ProbeResult]:
+        return self.history[-1] if self.history else None
+
+    def report(self) -> Dict[str, Any]:
+        last = self.last
+        latencies = sorted(result.latency_ms for result in self.history if result.ok)
+
+        def percentile(q : float) -> Optional[float]:
+            if not latencies:
+                return None
+            return latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+
+        return {
+            "status" : None if last is None else ("up" if last.ok else "down"),
+            "critical" : self.critical,
+            "latency_ms" : None if last is None else last.latency_ms,
+            "error" : None if last is None else last.error,
+            "checked_at" : None if last is None else last.checked_at,
+            "consecutive_failures" : self.consecutive_failures,
+            "availability" : round(sum(r.ok for r in self.history) / len(self.history), 4) if self.history else None,
+            "latency_p50_ms" : percentile(0.5),
+            "latency_p95_ms" : percentile(0.95),
+            "latency_max_ms" : latencies[-1] if latencies else None,
+            "history_ms" : [result.latency_ms if result.ok else None for result in self.history],
+        }
+
+
+class HealthMonitor:
+    """
+    Фоновая проверка зависимостей сервиса (Postgres, Redis, соседние сервисы).
+
+    Проверки идут раз в interval секунд с таймаутом timeout, 
+    эндпоинты отдают последний собранный отчет без обращения к зависимостям.
+    
+    liveness - процесс жив и цикл проверок не завис, зависимости не учитываются 
+    (иначе оркестратор перезапустит сервис из-за упавшей БД).
+    readiness - все критичные зависимости доступны по последней проверке.
+
+    Args:
+        interval : период проверок, секунды
+        timeout : таймаут одной проверки, секунды
+        history : сколько последних результатов хранить на зависимость
+
+    Usage:
+        monitor = HealthMonitor(interval=10, timeout=2)
+        monitor.add("postgres", sql_probe(engine))
+        monitor.add("redis", redis_probe(client), critical=False)
+        await monitor.start()
+        ...
+        monitor.readiness()
+        await monitor.stop()
+    """
+
+    def __init__(self, interval : float = 10, timeout : float = 2, history : int = 60):
+        self.interval = interval
+        self.timeout = timeout
+        self.history = history
+        self.dependencies : Dict[str, Dependency] = {}
+        self.rounds = 0
+        self._last_round_at : Optional[float] = None
+        self._report : Dict[str, Any] = {}
+        self._ready = False
+        self._task : Optional[asyncio.Task] = None
+
+    def add(self, name : str, probe : Probe, critical : bool = True) -> None:
+        """Зарегистрировать зависимость"""
+        self.dependencies[name] = Dependency(name, probe, critical, deque(maxlen=self.history))
+
+    async def _probe(self, dependency : Dependency) -> None:
+        started = time.perf_counter()
+        error = None
+        try:
+            await asyncio.wait_for(dependency.probe(), self.timeout)
+        except asyncio.TimeoutError:
+            error = f"timeout {self.timeout}s"
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        result = ProbeResult(
+            ok=error is None, 
+            latency_ms=round((time.perf_counter() - started) * 1000, 3), 
+            checked_at=time.time(), 
+            error=error
+            )
+        if not result.ok:
+            dependency.consecutive_failures += 1
+            if dependency.consecutive_failures == 1:
+                logger.warn(f"Зависимость {dependency.name} недоступна: {error}")
+        elif dependency.consecutive_failures:
+            dependency.consecutive_failures = 0
+            logger.info(f"Зависимость {dependency.name} снова доступна")
+        dependency.history.append(result)
+
+    async def check(self) -> Dict[str, Any]:
+        """Один раунд проверок всех зависимостей; обновляет кешированный отчет"""
+        await asyncio.gather(*(self._probe(dependency) for dependency in self.dependencies.values()))
+        self.rounds += 1
+        self._last_round_at = time.monotonic()
+        self._ready = all(
+            dependency.last.ok for dependency in self.dependencies.values() if dependency.critical
+        )
+        self._report = {name : dependency.report() for name, dependency in self.dependencies.items()}
+        return self._report
+
+    def liveness(self) -> Dict[str, Any]:
+        """Жив ли процесс: цикл проверок отработал не позже трех интервалов назад"""
+        alive = True
+        if self._task is not None and self._last_round_at is not None:
+            alive = time.monotonic() - self._last_round_at <= 3 * self.interval + self.timeout
+        return {"status" : "alive" if alive else "stalled", "alive" : alive, "rounds" : self.rounds}
+
+    def readiness(self) -> Dict[str, Any]:
+        """Готов ли сервис принимать трафик: доступны все критичные зависимости"""
+        return {
+            "status" : "ready" if self._ready else "not_ready",
+            "ready" : self._ready,
+            "dependencies" : {name : report["status"] for name, report in self._report.items()},
+        }
+
+    def report(self) -> Dict[str, Any]:
+        """Полный отчет по зависимостям с историей задержек"""
+        return self._report
+
+    def status(self, name : str) -> Optional[ProbeResult]:
+        """Последний результат проверки зависимости"""
+        return self.dependencies[name].last
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.check()
+            except Exception as e:
+                logger.error(f"Ошибка цикла проверок зависимостей: {e}")
+
+    async def start(self) -> None:
+        """Первая проверка сразу (readiness известна на старте), дальше - в фоне"""
+        if self._task is not None:
+            return
+        await self.check()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
@@ -0,0 +1,34 @@
+from typing import TYPE_CHECKING
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from .monitor import Probe
+
+if TYPE_CHECKING:
+    import httpx
+    from redis.asyncio import Redis
+
+
+def sql_probe(engine : AsyncEngine) -> Probe:
+    """SELECT 1 через пул движка"""
+    async def probe() -> None:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    return probe
+
+
+def redis_probe(client : "Redis") -> Probe:
+    """PING в Redis"""
+    async def probe() -> None:
+        await client.ping()
+    return probe
+
+
+def http_probe(client : "httpx.AsyncClient", url : str) -> Probe:
+    """GET на health эндпоинт соседнего сервиса, ответ 5xx - сервис недоступен"""
+    async def probe() -> None:
+        response = await client.get(url)
+        if response.status_code >= 500:
+            raise RuntimeError(f"{url} ответил {response.status_code}")
+    return probe
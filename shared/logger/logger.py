@@ -5,9 +5,8 @@ import logging
 from logging.handlers import RotatingFileHandler
 from pathlib import Path
 
-# Создаем папку для логов если её нет
+# Папка для логов (создается при настройке логгера с записью в файл)
 LOG_DIR = Path(__file__).parent.parent / "logs"
-LOG_DIR.mkdir(exist_ok=True)
 
 # Формат логов
 LOG_FORMAT = "%(levelname)s: %(asctime)s - %(message)s"
@@ -56,6 +55,7 @@ class AppLogger:
         
         # File handler (если включено)
         if log_to_file:
+            LOG_DIR.mkdir(exist_ok=True)
             log_file = LOG_DIR / f"{name}.log"
             file_handler = RotatingFileHandler(
                 log_file,
@@ -93,7 +93,7 @@ class AppLogger:
 
 # Создаем глобальный логгер по умолчанию
 def setup_default_logger():
-    """Настройка логгера по умолчанию при импорте"""
+    """Настройка логгера по умолчанию"""
     return AppLogger.setup_logger()
 
 def get_logger(name: str = None):
@@ -106,14 +106,44 @@ def get_logger(name: str = None):
     """
     return AppLogger.get_logger(name)
 
-# Автоматическая настройка при импорте
-setup_default_logger()
 
-# Экспортируем основные методы logging для удобства
-info = get_logger().info
-warning = get_logger().warning
-error = get_logger().error
-debug = get_logger().debug
-critical = get_logger().critical
+class LazyLogger:
+    """
+    Логгер, который настраивается (handlers, файл логов) при первой записи, 
+    а не при импорте модуля
+    
+    Args:
+        name: Имя модуля (обычно __name__)
+    """
+
+    def __init__(self, name: str = None):
+        self._name = name
+        self._logger = None
+
+    def __getattr__(self, attr):
+        if attr.startswith("__"):
+            raise AttributeError(attr)
+        if self._logger is None:
+            self._logger = get_logger(self._name)
+        return getattr(self._logger, attr)
+
+
+# Экспортируем основные методы logging для удобства (настройка - при первом вызове)
+_default = LazyLogger()
+
+def info(msg, *args, **kwargs):
+    _default.info(msg, *args, **kwargs)
+
+def warning(msg, *args, **kwargs):
+    _default.warning(msg, *args, **kwargs)
+
+def error(msg, *args, **kwargs):
+    _default.error(msg, *args, **kwargs)
+
+def debug(msg, *args, **kwargs):
+    _default.debug(msg, *args, **kwargs)
+
+def critical(msg, *args, **kwargs):
+    _default.critical(msg, *args, **kwargs)
 
-logger = get_logger(__name__)
\ No newline at end of file
+logger = LazyLogger(__name__)
@@ -0,0 +1,7 @@
+from .base import BaseRateLimiter, RateLimit, RateLimitResult, RateLimitStats
+from .memory import MemoryRateLimiter
+from .tiered import TieredRateLimiter
+from .factory import build_rate_limiter
+from .dependency import parse_rules, rate_limit, trust_proxies
+
+__all__ = ['BaseRateLimiter', 'RateLimit', 'RateLimitResult', 'RateLimitStats', 'MemoryRateLimiter', 'TieredRateLimiter', 'build_rate_limiter', 'parse_rules', 'rate_limit', 'trust_proxies']
@@ -0,0 +1,110 @@
+import abc
+import math
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, List, Sequence, Tuple
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """Не больше limit запросов за скользящее окно window секунд"""
+    limit : int
+    window : float
+
+    def __post_init__(self):
+        if self.limit <= 0 or self.window <= 0:
+            raise ValueError("limit and window must be positive")
+
+    @classmethod
+    def parse(cls, spec : str) -> "RateLimit":
+        """'10/60' -> RateLimit(limit=10, window=60)"""
+        limit, _, window = spec.partition("/")
+        return cls(int(limit), float(window or 1))
+
+
+@dataclass
+class RateLimitResult:
+    """Решение по одному ключу"""
+    key : str
+    allowed : bool
+    limit : int
+    remaining : int
+    retry_after : float = 0.0
+
+
+@dataclass
+class RateLimitStats:
+    """Счетчики ограничителя"""
+    allowed : int = 0
+    rejected : int = 0
+    errors : int = 0
+    rejected_by : Dict[str, int] = field(default_factory=dict)
+
+    def record(self, results : Sequence[RateLimitResult]) -> None:
+        if all(result.allowed for result in results):
+            self.allowed += 1
+            return
+        self.rejected += 1
+        for result in results:
+            if not result.allowed:
+                scope = result.key.rsplit(":", 1)[0]
+                self.rejected_by[scope] = self.rejected_by.get(scope, 0) + 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def window_position(now : float, window : float) -> Tuple[int, float, float]:
+    """
+    Положение момента в окнах
+    Returns:
+        (index, weight, offset) : номер текущего окна, вес предыдущего окна и время от начала текущего
+    """
+    index = int(now // window)
+    offset = now - index * window
+    return index, 1.0 - offset / window, offset
+
+
+def evaluate(key : str, rule : RateLimit, previous : int, current : int, cost : int, weight : float, offset : float) -> RateLimitResult:
+    """
+    Скользящее окно по двум счетчикам: предыдущее окно учитывается с весом 
+    оставшейся в нем доли, текущее - полностью
+    """
+    used = previous * weight + current
+    allowed = used + cost <= rule.limit
+    remaining = max(0, math.floor(rule.limit - used - (cost if allowed else 0)))
+    retry_after = 0.0
+    if not allowed:
+        if current + cost > rule.limit or previous <= 0:
+            retry_after = rule.window - offset
+        else:
+            # вес предыдущего окна, при котором запрос пройдет, и когда он наступит
+            weight_needed = (rule.limit - cost - current) / previous
+            retry_after = max(0.0, (1.0 - weight_needed) * rule.window - offset)
+    return RateLimitResult(key, allowed, rule.limit, remaining, retry_after)
+
+
+class BaseRateLimiter(abc.ABC):
+    """
+    Ограничитель частоты запросов со скользящим окном.
+
+    hit_many проверяет несколько ключей одного запроса (телефон, ip, устройство) 
+    разом: запрос засчитывается во все счетчики, только если проходит по всем, 
+    отклоненный запрос не расходует лимиты.
+    """
+
+    def __init__(self):
+        self.stats = RateLimitStats()
+
+    @abc.abstractmethod
+    async def hit_many(self, items : List[Tuple[str, RateLimit]], cost : int = 1) -> List[RateLimitResult]:
+        """Засчитать запрос по всем ключам, если он укладывается во все лимиты"""
+
+    async def hit(self, key : str, rule : RateLimit, cost : int = 1) -> RateLimitResult:
+        return (await self.hit_many([(key, rule)], cost))[0]
+
+    async def refund(self, items : List[Tuple[str, RateLimit]], cost : int = 1) -> None:
+        """Вернуть засчитанный запрос (если его отклонил следующий уровень)"""
+
+    async def aclose(self) -> None:
+        """Закрыть соединения ограничителя"""
+
@@ -0,0 +1,152 @@
+import inspect
+import math
+from ipaddress import IPv4Network, IPv6Network, ip_address, ip_network
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+from fastapi import Depends, HTTPException, Request, Response, status
+
+from .base import BaseRateLimiter, RateLimit
+from ..logger.logger import logger
+
+
+KeyFunc = Callable[[Request], Union[Optional[str], Awaitable[Optional[str]]]]
+
+
+# Сети прокси (nginx), которым доверяем заголовок X-Real-IP, см. trust_proxies
+_trusted_proxies : Tuple[Union[IPv4Network, IPv6Network], ...] = ()
+
+
+def trust_proxies(spec : str) -> None:
+    """
+    Доверять X-Real-IP от этих адресов
+    Args:
+        spec : "172.16.0.0/12,127.0.0.1" - сети или адреса через запятую, пустая строка - никому
+    """
+    global _trusted_proxies
+    _trusted_proxies = tuple(ip_network(item.strip(), strict=False) for item in spec.split(",") if item.strip())
+
+
+def _is_trusted_proxy(host : str) -> bool:
+    try:
+        address = ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in _trusted_proxies)
+
+
+def client_ip(request : Request) -> Optional[str]:
+    """Адрес клиента: за доверенным прокси - из X-Real-IP, иначе адрес соединения"""
+    if request.client is None:
+        return None
+    host = request.client.host
+    real_ip = request.headers.get("X-Real-IP", "").strip()
+    if real_ip and _is_trusted_proxy(host):
+        return real_ip
+    return host
+
+
+def device_id(request : Request) -> Optional[str]:
+    return request.headers.get("X-Device-ID")
+
+
+def json_field(name : str) -> KeyFunc:
+    """Ключ из поля JSON тела (тело кешируется Request - эндпоинт прочитает его повторно без затрат)"""
+    async def key(request : Request) -> Optional[str]:
+        try:
+            body = await request.json()
+        except ValueError:
+            return None
+        value = body.get(name) if isinstance(body, dict) else None
+        return str(value) if value is not None else None
+    return key
+
+
+KEY_FUNCS : Dict[str, KeyFunc] = {
+    "ip" : client_ip,
+    "device" : device_id,
+    "phone" : json_field("phone_number"),
+}
+
+
+def parse_rules(spec : str) -> List[Tuple[str, RateLimit]]:
+    """
+    Правила из строки настроек
+    Args:
+        spec : "ip=10/60,device=5/60,phone=3/600" - ключ=лимит/окно в секундах
+    Returns:
+        rules : [(ключ, RateLimit)]
+    """
+
+    rules = []
+    for item in filter(None, (item.strip() for item in spec.split(","))):
+        name, _, rule = item.partition("=")
+        name = name.strip()
+        if name not in KEY_FUNCS:
+            raise ValueError(f"Unknown rate limit key {name}, expected one of {tuple(KEY_FUNCS)}")
+        rules.append((name, RateLimit.parse(rule.strip())))
+    return rules
+
+
+def rate_limit(
+        limiter : Union[BaseRateLimiter, Callable[[], BaseRateLimiter]], 
+        scope : str, 
+        spec : Union[str, Callable[[], str]], 
+        enabled : Union[bool, Callable[[], bool]] = True
+        ):
+    """
+    Зависимость FastAPI: запрос сверх лимита отклоняется с 429 до работы эндпоинта (БД, SMS)
+    Args:
+        limiter : ограничитель или функция, возвращающая его
+        scope : имя группы лимитов (входит в ключ счетчиков)
+        spec : правила, см. parse_rules, или функция, возвращающая их
+        enabled : False - зависимость ничего не проверяет (или функция, возвращающая флаг)
+    Returns:
+        Depends : для dependencies=[...] эндпоинта
+    Usage:
+        @router.post("/login", dependencies=[rate_limit(limiter, "login", "ip=20/60,phone=5/300")])
+        # ограничитель и настройки читаются при первом запросе, а не при импорте
+        @router.post("/login", dependencies=[rate_limit(get_limiter, "login", lambda: config.RATE_LIMIT_LOGIN)])
+    """
+
+    resolved : List[List[Tuple[str, RateLimit]]] = []
+
+    def get_rules() -> List[Tuple[str, RateLimit]]:
+        if not resolved:
+            on = enabled() if callable(enabled) else enabled
+            resolved.append(parse_rules(spec() if callable(spec) else spec) if on else [])
+        return resolved[0]
+
+    if not callable(spec) and not callable(enabled):
+        get_rules()  # ошибка в правилах - при объявлении маршрута
+
+    def get_limiter() -> BaseRateLimiter:
+        return limiter if isinstance(limiter, BaseRateLimiter) else limiter()
+
+    async def dependency(request : Request, response : Response) -> None:
+        rules = get_rules()
+        if not rules:
+            return
+        items = []
+        for name, rule in rules:
+            value = KEY_FUNCS[name](request)
+            if inspect.isawaitable(value):
+                value = await value
+            if value:
+                items.append((f"{scope}:{name}:{value}", rule))
+        results = await get_limiter().hit_many(items)
+        if not results:
+            return
+        rejected = [result for result in results if not result.allowed]
+        if rejected:
+            retry_after = max(1, math.ceil(max(result.retry_after for result in rejected)))
+            logger.warn(f"Превышен лимит запросов {', '.join(result.key for result in rejected)}")
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS, 
+                detail="Слишком много запросов, попробуйте позже", 
+                headers={"Retry-After" : str(retry_after)}
+                )
+        tightest = min(results, key=lambda result: result.remaining)
+        response.headers["X-RateLimit-Limit"] = str(tightest.limit)
+        response.headers["X-RateLimit-Remaining"] = str(tightest.remaining)
+
+    return Depends(dependency)
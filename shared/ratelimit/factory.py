@@ -0,0 +1,29 @@
+from typing import Optional
+
+from .base import BaseRateLimiter
+from .memory import MemoryRateLimiter
+from .tiered import TieredRateLimiter
+
+
+def build_rate_limiter(
+        maxsize : int = 100_000, 
+        redis_url : Optional[str] = None, 
+        prefix : str = "ratelimit:"
+        ) -> BaseRateLimiter:
+    
+    """
+    Сборка ограничителя из настроек
+    Args:
+        maxsize : сколько ключей хранит локальный уровень
+        redis_url : адрес Redis, если задан - добавляется общий уровень
+        prefix : префикс ключей в Redis
+    Returns:
+        limiter : MemoryRateLimiter или TieredRateLimiter(MemoryRateLimiter, RedisRateLimiter)
+    """
+
+    local = MemoryRateLimiter(maxsize=maxsize)
+    if not redis_url:
+        return local
+    from redis.asyncio import Redis
+    from .redis import RedisRateLimiter
+    return TieredRateLimiter(local, RedisRateLimiter(Redis.from_url(redis_url), prefix=prefix))
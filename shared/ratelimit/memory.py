@@ -0,0 +1,64 @@
+import time
+from collections import OrderedDict
+from typing import List, Tuple
+
+from .base import BaseRateLimiter, RateLimit, RateLimitResult, evaluate, window_position
+
+
+class MemoryRateLimiter(BaseRateLimiter):
+    """
+    Счетчики в памяти процесса (свои у каждой реплики). Не потокобезопасен - 
+    рассчитан на один event loop. Окна считаются по time.time(), как в 
+    RedisRateLimiter: в TieredRateLimiter границы окон уровней совпадают.
+
+    Args:
+        maxsize : сколько ключей хранить, при переполнении вытесняются давно не использованные
+    """
+
+    def __init__(self, maxsize : int = 100_000):
+        super().__init__()
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        # key -> [номер окна, счетчик текущего окна, счетчик предыдущего окна]
+        self._counters : "OrderedDict[str, List[int]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._counters)
+
+    def _counter(self, key : str, index : int) -> List[int]:
+        counter = self._counters.get(key)
+        if counter is None:
+            counter = self._counters[key] = [index, 0, 0]
+        elif counter[0] != index:
+            counter[2] = counter[1] if counter[0] == index - 1 else 0
+            counter[0], counter[1] = index, 0
+        self._counters.move_to_end(key)
+        return counter
+
+    def hit_many_nowait(self, items : List[Tuple[str, RateLimit]], cost : int = 1) -> List[RateLimitResult]:
+        """Синхронная проверка (без await) для горячих путей"""
+        now = time.time()
+        counters, results = [], []
+        for key, rule in items:
+            index, weight, offset = window_position(now, rule.window)
+            counter = self._counter(key, index)
+            counters.append(counter)
+            results.append(evaluate(key, rule, counter[2], counter[1], cost, weight, offset))
+        if all(result.allowed for result in results):
+            for counter in counters:
+                counter[1] += cost
+        while len(self._counters) > self.maxsize:
+            self._counters.popitem(last=False)
+        self.stats.record(results)
+        return results
+
+    async def hit_many(self, items : List[Tuple[str, RateLimit]], cost : int = 1) -> List[RateLimitResult]:
+        return self.hit_many_nowait(items, cost)
+
+    async def refund(self, items : List[Tuple[str, RateLimit]], cost : int = 1) -> None:
+        now = time.time()
+        for key, rule in items:
+            counter = self._counters.get(key)
+            if counter is not None and counter[0] == window_position(now, rule.window)[0]:
+                counter[1] = max(0, counter[1] - cost)
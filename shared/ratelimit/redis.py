@@ -0,0 +1,88 @@
+import time
+from typing import List, Tuple
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from .base import BaseRateLimiter, RateLimit, RateLimitResult, evaluate, window_position
+from ..logger.logger import logger
+
+
+# На каждое правило два ключа: счетчик текущего и предыдущего окна.
+# ARGV[1] - cost, на правило i: ARGV[3i-1] - limit, ARGV[3i] - вес предыдущего окна, ARGV[3i+1] - TTL, мс.
+# Запрос засчитывается во все текущие окна, только если проходит по всем правилам.
+# Ответ: {allowed, current_1, previous_1, current_2, previous_2, ...}
+_SLIDING_WINDOW = """
+local cost = tonumber(ARGV[1])
+local allowed = 1
+local reply = {0}
+for i = 1, #KEYS / 2 do
+    local current = tonumber(redis.call('GET', KEYS[2 * i - 1]) or '0')
+    local previous = tonumber(redis.call('GET', KEYS[2 * i]) or '0')
+    if previous * tonumber(ARGV[3 * i]) + current + cost > tonumber(ARGV[3 * i - 1]) then
+        allowed = 0
+    end
+    reply[2 * i] = current
+    reply[2 * i + 1] = previous
+end
+if allowed == 1 then
+    for i = 1, #KEYS / 2 do
+        redis.call('INCRBY', KEYS[2 * i - 1], cost)
+        redis.call('PEXPIRE', KEYS[2 * i - 1], ARGV[3 * i + 1])
+    end
+end
+reply[1] = allowed
+return reply
+"""
+
+
+class RedisRateLimiter(BaseRateLimiter):
+    """
+    Счетчики в Redis, общие для всех реплик. Все ключи запроса проверяются 
+    и обновляются одним EVALSHA (Lua скрипт атомарен).
+    Ошибки Redis не пробрасываются: запрос пропускается (fail open) и 
+    считается в stats.errors - недоступный Redis не должен ронять вход.
+
+    Args:
+        client : клиент redis.asyncio
+        prefix : префикс ключей
+    """
+
+    def __init__(self, client : Redis, prefix : str = "ratelimit:"):
+        super().__init__()
+        self.client = client
+        self.prefix = prefix
+        self._sliding_window = client.register_script(_SLIDING_WINDOW)
+
+    async def hit_many(self, items : List[Tuple[str, RateLimit]], cost : int = 1) -> List[RateLimitResult]:
+        if not items:
+            return []
+        now = time.time()
+        keys, args, positions = [], [cost], []
+        for key, rule in items:
+            index, weight, offset = window_position(now, rule.window)
+            keys += [f"{self.prefix}{key}:{index}", f"{self.prefix}{key}:{index - 1}"]
+            args += [rule.limit, repr(weight), int(rule.window * 2000)]
+            positions.append((weight, offset))
+        try:
+            reply = await self._sliding_window(keys=keys, args=args)
+        except RedisError as e:
+            logger.warn(f"Redis ограничителя запросов недоступен: {e}")
+            self.stats.errors += 1
+            return [RateLimitResult(key, True, rule.limit, rule.limit) for key, rule in items]
+        results = [
+            evaluate(key, rule, int(reply[2 * i + 2]), int(reply[2 * i + 1]), cost, weight, offset)
+            for i, ((key, rule), (weight, offset)) in enumerate(zip(items, positions))
+        ]
+        # решение принято атомарно в Redis, пересчет лишь показывает, какой ключ превышен
+        if int(reply[0]) == 1:
+            for result in results:
+                result.allowed = True
+        elif all(result.allowed for result in results):
+            for result in results:
+                result.allowed = False
+        self.stats.record(results)
+        return results
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
@@ -0,0 +1,35 @@
+from typing import List, Tuple
+
+from .base import BaseRateLimiter, RateLimit, RateLimitResult
+
+
+class TieredRateLimiter(BaseRateLimiter):
+    """
+    Локальный уровень перед общим. Счетчик реплики не больше общего, поэтому 
+    отказ локального уровня всегда верен и обходится без запроса в Redis: 
+    поток от одного клиента в одну реплику отсекается локально. 
+    Прошедшие локальный уровень запросы проверяет общий; если он отказал - 
+    засчитанный локально запрос возвращается.
+
+    Args:
+        local : ограничитель процесса (MemoryRateLimiter)
+        remote : общий ограничитель (RedisRateLimiter)
+    """
+
+    def __init__(self, local : BaseRateLimiter, remote : BaseRateLimiter):
+        super().__init__()
+        self.local = local
+        self.remote = remote
+
+    async def hit_many(self, items : List[Tuple[str, RateLimit]], cost : int = 1) -> List[RateLimitResult]:
+        results = await self.local.hit_many(items, cost)
+        if all(result.allowed for result in results):
+            results = await self.remote.hit_many(items, cost)
+            if not all(result.allowed for result in results):
+                await self.local.refund(items, cost)
+        self.stats.record(results)
+        return results
+
+    async def aclose(self) -> None:
+        await self.local.aclose()
+        await self.remote.aclose()
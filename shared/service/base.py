@@ -1,12 +1,22 @@
 import abc 
+import asyncio
+from contextvars import ContextVar
 from functools import wraps
-from typing import Optional, Callable, TypeVar, Generic
+from typing import Any, Dict, Optional, Callable, TypeVar, Generic
 
 from ..database.base import BaseUnitOfWork
+from ..database.retry import transient_sqlstate, backoff_delay, retry_stats
+from ..logger.logger import logger
 
 
 U = TypeVar('U', bound='BaseUnitOfWork')  # UnitOfWork type
 
+# Активные unit of work текущей задачи: {uow_factory: uow}.
+# ContextVar изолирует конкурентные вызовы (каждая asyncio задача видит свою копию), 
+# поэтому один экземпляр сервиса можно использовать из многих запросов одновременно.
+_active_uows: ContextVar[Optional[Dict[Any, BaseUnitOfWork]]] = ContextVar("active_uows", default=None)
+
+
 class BaseService(abc.ABC, Generic[U]):
     """Абстрактный базовый класс сервиса с unit of worck"""
     def __init__(self, uow_factory : U):
@@ -14,30 +24,93 @@ class BaseService(abc.ABC, Generic[U]):
 
     @property
     def uow(self) -> U:
+        """UoW текущего transactional вызова, вне вызова - новый UoW"""
+        active = _active_uows.get()
+        if active is not None and self._uow_factory in active:
+            return active[self._uow_factory]
         return self._uow_factory()
     
     @classmethod
-    def transactional(cls, read_only: bool = False):
+    def transactional(
+            cls, 
+            read_only: bool = False, 
+            timeout: Optional[float] = None, 
+            lock_timeout: Optional[float] = None,
+            retries: int = 0,
+            isolation: Optional[str] = None
+            ):
         """
         Декоратор для автоматического управления транзакциями.
         Создает НОВЫЙ UoW для каждого вызова метода.
+        Вложенный вызов (метод из метода) переиспользует UoW внешнего вызова:
+        запись выполняется в SAVEPOINT - ошибка откатывает только вложенный вызов,
+        чтение - в текущей транзакции.
+
+        Args:
+            read_only : транзакция только для чтения (uow.readonly())
+            timeout : statement_timeout запросов метода, секунды
+            lock_timeout : максимальное ожидание блокировки, секунды
+            retries : сколько раз повторить весь unit of work при конфликте 
+                сериализации (40001) или deadlock (40P01), с экспоненциальной 
+                задержкой и jitter. Метод выполняется заново целиком - 
+                побочные эффекты вне БД должны быть идемпотентны
+            isolation : уровень изоляции транзакции (REPEATABLE READ, SERIALIZABLE)
 
         @BaseService.transactional()
         async def any_func(self, data : ServiceUserLoginRequest):
             self.uow.user_repository.create(...)
             ...
+
+        @BaseService.transactional(read_only=True, timeout=2)
+        async def get_user(self, user_id : int):
+            ...
+
+        @BaseService.transactional(retries=3, isolation="SERIALIZABLE")
+        async def register(self, data : ServiceUserRegisterRequest):
+            ...
         """
         def decorator(method):
             @wraps(method)
             async def wrapper(self: 'BaseService', *args, **kwargs):
-                uow = self._uow_factory()
-                context_manager = uow.readonly if read_only else uow.transaction
-                async with context_manager() as current_uow:
-                    original_factory = self._uow_factory
-                    self._uow_factory = lambda: current_uow
-                    try:
+                active = _active_uows.get() or {}
+                current_uow = active.get(self._uow_factory)
+                if current_uow is not None:
+                    if read_only:
+                        return await method(self, *args, **kwargs)
+                    async with current_uow.savepoint():
                         return await method(self, *args, **kwargs)
-                    finally:
-                        self._uow_factory = original_factory
+
+                attempt = 0
+                while True:
+                    uow = self._uow_factory()
+                    context_manager = uow.readonly if read_only else uow.transaction
+                    try:
+                        async with context_manager(
+                            statement_timeout=timeout, 
+                            lock_timeout=lock_timeout, 
+                            isolation_level=isolation
+                            ) as current_uow:
+                            token = _active_uows.set({**active, self._uow_factory: current_uow})
+                            try:
+                                result = await method(self, *args, **kwargs)
+                            finally:
+                                _active_uows.reset(token)
+                    except Exception as e:
+                        sqlstate = transient_sqlstate(e)
+                        if sqlstate is None:
+                            raise
+                        if attempt >= retries:
+                            if retries:
+                                retry_stats.exhausted += 1
+                            raise
+                        attempt += 1
+                        retry_stats.record_retry(sqlstate)
+                        delay = backoff_delay(attempt)
+                        logger.info(f"{method.__qualname__}: SQLSTATE {sqlstate}, повтор {attempt}/{retries} через {delay:.3f}с")
+                        await asyncio.sleep(delay)
+                        continue
+                    if attempt:
+                        retry_stats.succeeded_after_retry += 1
+                    return result
             return wrapper
-        return decorator
\ No newline at end of file
+        return decorator
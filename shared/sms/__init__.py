@@ -0,0 +1,4 @@
+from .provider import BaseSmsProvider, FakeSmsProvider, SmsMessage, SmsProviderError
+from .outbox import SmsOutbox, SmsOutboxFull, SmsOutboxStats
+
+__all__ = ['BaseSmsProvider', 'FakeSmsProvider', 'SmsMessage', 'SmsProviderError', 'SmsOutbox', 'SmsOutboxFull', 'SmsOutboxStats']
@@ -0,0 +1,238 @@
+import asyncio
+import random
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Set
+
+from .provider import BaseSmsProvider, SmsMessage, SmsProviderError
+from ..logger.logger import logger
+
+
+class SmsOutboxFull(Exception):
+    """Очередь отправки переполнена"""
+
+
+@dataclass
+class SmsOutboxStats:
+    """
+    Счетчики очереди отправки
+
+    Args:
+        enqueued : поставлено в очередь
+        sent : принято провайдером
+        failed : не отправлено после всех попыток или без права повтора
+        retries : повторных постановок после ошибки
+        rejected : не принято в переполненную очередь
+        batches : запросов к провайдеру
+        latency_ms : последние задержки от постановки до отправки
+    """
+    enqueued : int = 0
+    sent : int = 0
+    failed : int = 0
+    retries : int = 0
+    rejected : int = 0
+    batches : int = 0
+    latency_ms : Deque[float] = field(default_factory=lambda: deque(maxlen=1000))
+
+    def as_dict(self) -> Dict[str, Any]:
+        latencies = sorted(self.latency_ms)
+
+        def percentile(q : float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(q * len(latencies)))], 3)
+
+        return {
+            "enqueued" : self.enqueued,
+            "sent" : self.sent,
+            "failed" : self.failed,
+            "retries" : self.retries,
+            "rejected" : self.rejected,
+            "batches" : self.batches,
+            "avg_batch" : round(self.sent / self.batches, 2) if self.batches else 0.0,
+            "latency_p50_ms" : percentile(0.5),
+            "latency_p95_ms" : percentile(0.95),
+            "latency_max_ms" : round(latencies[-1], 3) if latencies else None,
+        }
+
+
+class SmsOutbox:
+    """
+    Очередь отправки SMS с пулом воркеров.
+
+    enqueue только кладет сообщение в очередь и не ждет провайдера - ответ 
+    на регистрацию не зависит от его скорости. workers воркеров забирают 
+    сообщения пачками до batch_size (сколько накопилось, без ожидания) 
+    и отправляют их провайдеру. Неотправленные сообщения возвращаются 
+    в очередь с экспоненциальной задержкой и jitter, после max_attempts 
+    попыток - отбрасываются с записью в лог.
+
+    Очередь в памяти процесса: коды верификации живут минуты и при потере 
+    запрашиваются повторно. stop дожидается отправки очереди (до drain_timeout).
+
+    Args:
+        provider : провайдер SMS
+        workers : число одновременных запросов к провайдеру
+        batch_size : сообщений в запросе (по умолчанию provider.max_batch)
+        max_queue : предел очереди, сверх него enqueue бросает SmsOutboxFull
+        max_attempts : попыток на сообщение
+        backoff : задержка первого повтора, секунды (удваивается)
+        max_backoff : предел задержки повтора
+        timeout : таймаут запроса к провайдеру
+
+    Usage:
+        outbox = SmsOutbox(FakeSmsProvider(), workers=4)
+        outbox.start()
+        outbox.enqueue(phone, f"Код подтверждения: {code}")
+        ...
+        await outbox.stop()
+    """
+
+    def __init__(
+            self, 
+            provider : BaseSmsProvider, 
+            workers : int = 4, 
+            batch_size : Optional[int] = None, 
+            max_queue : int = 10_000, 
+            max_attempts : int = 5, 
+            backoff : float = 0.5, 
+            max_backoff : float = 30.0, 
+            timeout : float = 10.0
+            ):
+        self.provider = provider
+        self.workers = workers
+        self.batch_size = max(1, min(batch_size or provider.max_batch, provider.max_batch))
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.stats = SmsOutboxStats()
+        self._queue : "asyncio.Queue[SmsMessage]" = asyncio.Queue(maxsize=max_queue)
+        self._tasks : List[asyncio.Task] = []
+        self._retries : Set[asyncio.TimerHandle] = set()
+        self._in_flight = 0
+
+    @property
+    def pending(self) -> int:
+        """Сообщений ждет отправки (в очереди и в отложенных повторах)"""
+        return self._queue.qsize() + len(self._retries)
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            **self.stats.as_dict(),
+            "provider" : type(self.provider).__name__,
+            "depth" : self._queue.qsize(),
+            "retry_pending" : len(self._retries),
+            "in_flight" : self._in_flight,
+            "workers" : len(self._tasks),
+        }
+
+    def enqueue(self, phone : str, text : str) -> SmsMessage:
+        message = SmsMessage(phone=phone, text=text)
+        try:
+            self._queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.stats.rejected += 1
+            raise SmsOutboxFull(f"Очередь SMS переполнена ({self._queue.maxsize})")
+        self.stats.enqueued += 1
+        return message
+
+    def _take_batch(self, first : SmsMessage) -> List[SmsMessage]:
+        batch = [first]
+        while len(batch) < self.batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    def _retry(self, message : SmsMessage, error : str) -> None:
+        message.attempts += 1
+        if message.attempts >= self.max_attempts:
+            self.stats.failed += 1
+            logger.error(f"SMS {message.id} не отправлено после {message.attempts} попыток: {error}")
+            return
+        self.stats.retries += 1
+        delay = min(self.max_backoff, self.backoff * 2 ** (message.attempts - 1)) * random.uniform(0.5, 1.0)
+        loop = asyncio.get_running_loop()
+
+        def requeue():
+            self._retries.discard(handle)
+            try:
+                self._queue.put_nowait(message)
+            except asyncio.QueueFull:
+                self.stats.failed += 1
+                logger.error(f"SMS {message.id} не возвращено в переполненную очередь")
+
+        handle = loop.call_later(delay, requeue)
+        self._retries.add(handle)
+
+    async def _send(self, batch : List[SmsMessage]) -> None:
+        self._in_flight += len(batch)
+        self.stats.batches += 1
+        try:
+            failed = await asyncio.wait_for(self.provider.send_batch(batch), self.timeout)
+        except SmsProviderError as e:
+            if not e.retryable:
+                self.stats.failed += len(batch)
+                logger.error(f"Провайдер отклонил {len(batch)} SMS: {e}")
+                return
+            failed, error = batch, str(e)
+        except (asyncio.TimeoutError, OSError) as e:
+            failed, error = batch, repr(e)
+        else:
+            error = "не принято провайдером"
+        finally:
+            self._in_flight -= len(batch)
+        now = time.monotonic()
+        failed_ids = {message.id for message in failed}
+        for message in batch:
+            if message.id in failed_ids:
+                self._retry(message, error)
+            else:
+                self.stats.sent += 1
+                self.stats.latency_ms.append((now - message.created_at) * 1000)
+
+    async def _worker(self) -> None:
+        while True:
+            batch = self._take_batch(await self._queue.get())
+            try:
+                await self._send(batch)
+            except Exception as e:
+                logger.error(f"Ошибка отправки SMS: {e}")
+                for message in batch:
+                    self._retry(message, repr(e))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def start(self) -> None:
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def drain(self, timeout : Optional[float] = None) -> bool:
+        """Дождаться отправки очереди и отложенных повторов; False - не успели за timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._queue.join(), 
+                    None if deadline is None else max(0.0, deadline - time.monotonic())
+                    )
+            except asyncio.TimeoutError:
+                return False
+            if not self._retries:
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(0.01)
+
+    async def stop(self, drain_timeout : float = 5.0) -> None:
+        if self._tasks and not await self.drain(drain_timeout):
+            logger.warn(f"Остановка очереди SMS: не отправлено {self.pending}")
+        for handle in self._retries:
+            handle.cancel()
+        self._retries.clear()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self.provider.aclose()
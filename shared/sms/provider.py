@@ -0,0 +1,99 @@
+import abc
+import asyncio
+import random
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, List, Optional
+
+
+@dataclass
+class SmsMessage:
+    """
+    Сообщение в очереди отправки
+
+    Args:
+        phone : номер телефона
+        text : текст
+        id : id сообщения (идемпотентность на стороне провайдера)
+        created_at : время постановки в очередь (time.monotonic)
+        attempts : неудачных попыток отправки
+    """
+    phone : str
+    text : str
+    id : str = field(default_factory=lambda: str(uuid.uuid4()))
+    created_at : float = field(default_factory=time.monotonic)
+    attempts : int = 0
+
+
+class SmsProviderError(Exception):
+    """Ошибка провайдера; retryable=False - повтор бесполезен (неверный номер и т.п.)"""
+
+    def __init__(self, message : str, retryable : bool = True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class BaseSmsProvider(abc.ABC):
+    """
+    Провайдер SMS. max_batch - сколько сообщений принимает один запрос к провайдеру 
+    (1 - пакетной отправки нет).
+    """
+
+    max_batch : int = 1
+
+    @abc.abstractmethod
+    async def send_batch(self, messages : List[SmsMessage]) -> List[SmsMessage]:
+        """
+        Отправить пачку (не больше max_batch)
+        Returns:
+            failed : сообщения, которые провайдер не принял (будут повторены)
+        Raises:
+            SmsProviderError : пачка не отправлена целиком
+        """
+
+    async def aclose(self) -> None:
+        """Закрыть соединения провайдера"""
+
+
+class FakeSmsProvider(BaseSmsProvider):
+    """
+    Провайдер без сети для разработки, тестов и бенчмарков: 
+    задержка на запрос, случайные отказы. Сообщения никуда не уходят, 
+    считаются в delivered; последние record сообщений хранятся в sent 
+    (по умолчанию не хранятся - в долгоживущем процессе список рос бы без предела).
+
+    Args:
+        latency : задержка одного запроса к "провайдеру", секунды
+        max_batch : размер пачки
+        failure_rate : доля сообщений, которые "провайдер" не примет
+        seed : seed генератора отказов
+        record : сколько последних отправленных сообщений хранить в sent
+    """
+
+    def __init__(
+            self, 
+            latency : float = 0.0, 
+            max_batch : int = 100, 
+            failure_rate : float = 0.0, 
+            seed : Optional[int] = None, 
+            record : int = 0
+            ):
+        self.latency = latency
+        self.max_batch = max_batch
+        self.failure_rate = failure_rate
+        self.requests = 0
+        self.delivered = 0
+        self.sent : Deque[SmsMessage] = deque(maxlen=record)
+        self._random = random.Random(seed)
+
+    async def send_batch(self, messages : List[SmsMessage]) -> List[SmsMessage]:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        failed = [message for message in messages if self._random.random() < self.failure_rate]
+        delivered = [message for message in messages if message not in failed]
+        self.delivered += len(delivered)
+        self.sent.extend(delivered)
+        return failed
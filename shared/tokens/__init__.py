@@ -0,0 +1,6 @@
+from .cache import VerifiedTokenCache
+from .keys import ASYMMETRIC_ALGORITHMS, KeyRing, SigningKey, generate_key
+from .verifier import JWKSVerifier, bearer_claims
+from .issuer import TokenIssuer, TokenPair
+
+__all__ = ['VerifiedTokenCache', 'ASYMMETRIC_ALGORITHMS', 'KeyRing', 'SigningKey', 'generate_key', 'JWKSVerifier', 'bearer_claims', 'TokenIssuer', 'TokenPair']
@@ -0,0 +1,106 @@
+import hashlib
+import heapq
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..cache.memory import MemoryCache
+
+
+class VerifiedTokenCache:
+    """
+    Кеш проверенных JWT: повторная проверка того же токена - поиск в словаре 
+    вместо разбора и проверки подписи.
+
+    Ключ - digest токена (сам токен в памяти кеша не хранится), запись живет 
+    до exp токена. revoke(jti) отзывает токен сразу: jti запоминается до exp 
+    и отклоняется и из кеша, и при новой проверке.
+    Кеш процесса: отзыв не распространяется на другие реплики.
+
+    Отозванные jti не вытесняются по размеру (вытесненный отзыв снова пропустил бы 
+    токен): запись удаляется только после exp, размер ограничен числом отзывов 
+    за срок жизни токена.
+
+    Args:
+        maxsize : максимум проверенных токенов
+        revoke_ttl : сколько помнить отозванный jti, если exp не передан, секунды
+
+    Usage:
+        claims = cache.get(token)
+        if claims is None:
+            claims = jwt.decode(token, ...)
+            cache.put(token, claims)
+        ...
+        cache.revoke(claims["jti"], claims["exp"])
+    """
+
+    def __init__(self, maxsize : int = 100_000, revoke_ttl : float = 86400):
+        self._claims = MemoryCache(maxsize=maxsize)
+        # jti -> unix время, до которого помним отзыв; куча (время, jti) для очистки
+        self._revoked : Dict[str, float] = {}
+        self._revoked_expiry : List[Tuple[float, str]] = []
+        self.revoke_ttl = revoke_ttl
+
+    @property
+    def stats(self):
+        return self._claims.stats
+
+    @staticmethod
+    def digest(token : str, namespace : str = "") -> str:
+        """
+        Ключ кеша. namespace отделяет токены, проверенные разными ключами 
+        (секрет HMAC, kid)
+        """
+        return hashlib.blake2b(f"{namespace}\x00{token}".encode(), digest_size=20).hexdigest()
+
+    def get(self, token : str, namespace : str = "") -> Optional[Dict[str, Any]]:
+        """Проверенные claims или None (нет в кеше, истек, отозван)"""
+        claims = self._claims.get_nowait(self.digest(token, namespace))
+        if claims is None:
+            return None
+        if self.is_revoked(claims.get("jti")):
+            return None
+        return dict(claims)
+
+    def put(self, token : str, claims : Dict[str, Any], namespace : str = "") -> None:
+        """Запомнить проверенный токен до его exp (токены без exp не кешируются)"""
+        exp = claims.get("exp")
+        if exp is None:
+            return
+        ttl = float(exp) - time.time()
+        if ttl > 0:
+            self._claims.set_nowait(self.digest(token, namespace), dict(claims), ttl)
+
+    def revoke(self, jti : Optional[str], exp : Optional[float] = None) -> None:
+        """Отозвать токен по jti (logout, ротация refresh токена)"""
+        if jti is None:
+            return
+        now = time.time()
+        expires_at = now + self.revoke_ttl if exp is None else float(exp)
+        self._prune(now)
+        jti = str(jti)
+        if expires_at > max(now, self._revoked.get(jti, 0.0)):
+            self._revoked[jti] = expires_at
+            heapq.heappush(self._revoked_expiry, (expires_at, jti))
+
+    def is_revoked(self, jti : Optional[str]) -> bool:
+        if jti is None:
+            return False
+        expires_at = self._revoked.get(str(jti))
+        return expires_at is not None and expires_at > time.time()
+
+    @property
+    def revoked(self) -> int:
+        """Сколько отзывов помним"""
+        return len(self._revoked)
+
+    def _prune(self, now : float) -> None:
+        """Забыть отзывы, токены которых уже истекли"""
+        while self._revoked_expiry and self._revoked_expiry[0][0] <= now:
+            expires_at, jti = heapq.heappop(self._revoked_expiry)
+            if self._revoked.get(jti) == expires_at:
+                del self._revoked[jti]
+
+    def clear(self) -> None:
+        self._claims.clear()
+        self._revoked.clear()
+        self._revoked_expiry.clear()
@@ -0,0 +1,130 @@
+import hashlib
+import hmac
+import json
+import time
+import uuid
+from base64 import urlsafe_b64encode
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from jwt.algorithms import get_default_algorithms
+
+from .keys import KeyRing
+
+
+_HMAC_DIGESTS = {"HS256" : hashlib.sha256, "HS384" : hashlib.sha384, "HS512" : hashlib.sha512}
+_ALGORITHMS = get_default_algorithms()
+
+
+def _b64(data : bytes) -> bytes:
+    return urlsafe_b64encode(data).rstrip(b"=")
+
+
+@dataclass
+class TokenPair:
+    """Пара токенов одного входа"""
+    access_token : str
+    refresh_token : str
+    access_jti : uuid.UUID
+    refresh_jti : uuid.UUID
+    access_exp : int
+    refresh_exp : int
+
+
+class _Signer:
+    """Подготовленный ключ и сериализованный заголовок одного kid"""
+
+    def __init__(self, kid : str, algorithm : str, key : Any):
+        self.kid = kid
+        header = json.dumps({"alg" : algorithm, "kid" : kid, "typ" : "JWT"}, separators=(",", ":")).encode()
+        self.header = _b64(header) + b"."
+        if algorithm in _HMAC_DIGESTS:
+            secret = key.encode() if isinstance(key, str) else key
+            self._hmac = hmac.new(secret, digestmod=_HMAC_DIGESTS[algorithm])
+            self.sign = self._sign_hmac
+        else:
+            self._algorithm = _ALGORITHMS[algorithm]
+            self._key = self._algorithm.prepare_key(key)
+            self.sign = self._sign_asymmetric
+
+    def _sign_hmac(self, message : bytes) -> bytes:
+        mac = self._hmac.copy()
+        mac.update(message)
+        return mac.digest()
+
+    def _sign_asymmetric(self, message : bytes) -> bytes:
+        return self._algorithm.sign(message, self._key)
+
+    def encode(self, payload : Dict[str, Any]) -> str:
+        signing_input = self.header + _b64(json.dumps(payload, separators=(",", ":")).encode())
+        return (signing_input + b"." + _b64(self.sign(signing_input))).decode()
+
+
+class TokenIssuer:
+    """
+    Выпуск JWT без повторной подготовки ключа и заголовка на каждый токен.
+
+    Создается один раз при старте: ключ подписи подготавливается (HMAC - 
+    предвычисленное состояние hmac, EdDSA/RS256 - объект ключа cryptography), 
+    заголовок сериализуется в base64 один раз на kid. С KeyRing подписывает 
+    текущим ключом кольца и пересобирает подписанта только после ротации.
+    Токены совместимы с jwt.decode.
+
+    Args:
+        access_ttl : время жизни access токена, секунды
+        refresh_ttl : время жизни refresh токена, секунды
+        key_ring : кольцо ключей EdDSA / RS256
+        secret, algorithm, kid : общий секрет HS256/384/512, если кольца нет
+
+    Usage:
+        issuer = TokenIssuer(900, 86400, secret=config.JWT_SECRET_KEY, algorithm="HS256", kid=config.JWT_KID)
+        pair = issuer.issue_pair(user_id)
+        pair.access_token, pair.refresh_token
+    """
+
+    def __init__(
+            self, 
+            access_ttl : float, 
+            refresh_ttl : float, 
+            key_ring : Optional[KeyRing] = None, 
+            secret : Optional[str] = None, 
+            algorithm : str = "HS256", 
+            kid : str = "default"
+            ):
+        if key_ring is None and secret is None:
+            raise ValueError("TokenIssuer needs a key ring or a secret")
+        if key_ring is None and algorithm not in _HMAC_DIGESTS:
+            raise ValueError(f"Secret signing supports {tuple(_HMAC_DIGESTS)}, use a KeyRing for {algorithm}")
+        self.access_ttl = int(access_ttl)
+        self.refresh_ttl = int(refresh_ttl)
+        self.key_ring = key_ring
+        self._signer : Optional[_Signer] = None if key_ring is not None else _Signer(kid, algorithm, secret)
+
+    def signer(self) -> _Signer:
+        if self.key_ring is None:
+            return self._signer
+        key = self.key_ring.signing_key()
+        if self._signer is None or self._signer.kid != key.kid:
+            self._signer = _Signer(key.kid, key.algorithm, key.private_key)
+        return self._signer
+
+    def issue(self, user_id : int, type : str, now : Optional[int] = None, **claims) -> Tuple[uuid.UUID, str, int]:
+        """
+        Один токен
+        Returns:
+            (jti, token, exp)
+        """
+        now = int(time.time()) if now is None else now
+        exp = now + (self.access_ttl if type == "access" else self.refresh_ttl)
+        jti = uuid.uuid4()
+        payload = {"user_id" : user_id, "jti" : str(jti), "type" : type, "exp" : exp, "iat" : now}
+        if claims:
+            payload.update(claims)
+        return jti, self.signer().encode(payload), exp
+
+    def issue_pair(self, user_id : int, **claims) -> TokenPair:
+        """access и refresh токены одним вызовом (общие iat и подписант)"""
+        now = int(time.time())
+        access_jti, access_token, access_exp = self.issue(user_id, "access", now, **claims)
+        refresh_jti, refresh_token, refresh_exp = self.issue(user_id, "refresh", now, **claims)
+        return TokenPair(access_token, refresh_token, access_jti, refresh_jti, access_exp, refresh_exp)
@@ -0,0 +1,214 @@
+import fcntl
+import os
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+from jwt.algorithms import OKPAlgorithm, RSAAlgorithm
+
+from ..logger.logger import logger
+
+
+ASYMMETRIC_ALGORITHMS = ("EdDSA", "RS256")
+
+PrivateKey = Union[ed25519.Ed25519PrivateKey, rsa.RSAPrivateKey]
+
+
+@dataclass
+class SigningKey:
+    """
+    Ключ подписи токенов
+
+    Args:
+        kid : id ключа (заголовок kid токена)
+        algorithm : EdDSA | RS256
+        private_key : закрытый ключ (cryptography)
+        created_at : время создания (unix time)
+    """
+    kid : str
+    algorithm : str
+    private_key : PrivateKey
+    created_at : float
+
+    @property
+    def public_key(self):
+        return self.private_key.public_key()
+
+    def jwk(self) -> Dict[str, Any]:
+        """Открытый ключ в формате JWK"""
+        algorithm = OKPAlgorithm if self.algorithm == "EdDSA" else RSAAlgorithm
+        jwk = algorithm.to_jwk(self.public_key, as_dict=True)
+        jwk.update(kid=self.kid, alg=self.algorithm, use="sig")
+        return jwk
+
+    def private_pem(self) -> bytes:
+        return self.private_key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+
+
+def generate_key(algorithm : str, kid : Optional[str] = None) -> SigningKey:
+    """Новый ключ: Ed25519 для EdDSA, RSA 2048 для RS256"""
+    if algorithm == "EdDSA":
+        private_key = ed25519.Ed25519PrivateKey.generate()
+    elif algorithm == "RS256":
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    else:
+        raise ValueError(f"Unsupported signing algorithm {algorithm}, expected one of {ASYMMETRIC_ALGORITHMS}")
+    now = time.time()
+    return SigningKey(kid=kid or f"{algorithm.lower()}-{int(now)}", algorithm=algorithm, private_key=private_key, created_at=now)
+
+
+class KeyRing:
+    """
+    Набор ключей подписи с ротацией.
+
+    Токены подписываются самым новым ключом, в JWKS публикуются все ключи, 
+    которыми могли быть подписаны еще живые токены. Раз в rotation_interval 
+    добавляется новый ключ; ключ удаляется, когда после его замены прошло 
+    больше retire_after (срок жизни самого долгого токена).
+
+    С directory ключи хранятся в PEM файлах <kid>.pem (общий том для всех реплик 
+    auth сервиса): реплики перечитывают каталог при rotate() и при get() 
+    неизвестного kid (не чаще min_reload_interval), ключ, созданный одной 
+    репликой, подхватывают остальные. rotate() выполняется под блокировкой 
+    файла .rotate.lock: реплики, стартующие одновременно, не создают по ключу каждая.
+
+    Args:
+        algorithm : EdDSA | RS256
+        rotation_interval : период ротации, секунды
+        retire_after : сколько держать замененный ключ в JWKS, секунды
+        directory : каталог PEM файлов (None - ключи только в памяти)
+        min_reload_interval : минимальный интервал перечитывания каталога из-за неизвестного kid, секунды
+
+    Usage:
+        ring = KeyRing("EdDSA", rotation_interval=30 * 86400, retire_after=86400, directory="/keys")
+        ring.rotate()                       # создать первый ключ или перевыпустить по сроку
+        key = ring.signing_key()            # подписать: jwt.encode(..., key.private_key, key.algorithm, {"kid": key.kid})
+        ring.jwks()                         # {"keys": [...]} для /.well-known/jwks.json
+    """
+
+    def __init__(
+            self, 
+            algorithm : str = "EdDSA", 
+            rotation_interval : float = 30 * 86400, 
+            retire_after : float = 86400, 
+            directory : Optional[str] = None,
+            min_reload_interval : float = 10
+            ):
+        if algorithm not in ASYMMETRIC_ALGORITHMS:
+            raise ValueError(f"Unsupported signing algorithm {algorithm}, expected one of {ASYMMETRIC_ALGORITHMS}")
+        self.algorithm = algorithm
+        self.rotation_interval = rotation_interval
+        self.retire_after = retire_after
+        self.directory = Path(directory) if directory else None
+        self.min_reload_interval = min_reload_interval
+        self._loaded_at = float("-inf")
+        self._keys : Dict[str, SigningKey] = {}
+        self._jwks : Optional[Dict[str, Any]] = None
+        self._current : Optional[SigningKey] = None
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @property
+    def keys(self) -> List[SigningKey]:
+        """Ключи от старых к новым"""
+        return sorted(self._keys.values(), key=lambda key: key.created_at)
+
+    def add(self, key : SigningKey) -> None:
+        self._keys[key.kid] = key
+        self._jwks = self._current = None
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # пишем во временный файл и переименовываем: load() другой реплики 
+            # не прочитает недописанный PEM
+            tmp = self.directory / f"{key.kid}.pem.tmp"
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(fd, "wb") as file:
+                file.write(key.private_pem())
+            os.utime(tmp, (key.created_at, key.created_at))
+            os.replace(tmp, self.directory / f"{key.kid}.pem")
+
+    def load(self) -> None:
+        """Перечитать ключи из каталога"""
+        if self.directory is None or not self.directory.exists():
+            return
+        self._loaded_at = time.monotonic()
+        keys = {}
+        for path in self.directory.glob("*.pem"):
+            private_key = serialization.load_pem_private_key(path.read_bytes(), password=None)
+            algorithm = "EdDSA" if isinstance(private_key, ed25519.Ed25519PrivateKey) else "RS256"
+            keys[path.stem] = SigningKey(path.stem, algorithm, private_key, path.stat().st_mtime)
+        self._keys = keys
+        self._jwks = self._current = None
+
+    def signing_key(self) -> SigningKey:
+        """Ключ для подписи новых токенов - самый новый"""
+        if self._current is None:
+            if not self._keys:
+                raise RuntimeError("Key ring is empty, call rotate() first")
+            self._current = self.keys[-1]
+        return self._current
+
+    def get(self, kid : str) -> Optional[SigningKey]:
+        """Ключ по kid; неизвестный kid (ключ создан другой репликой) перечитывает каталог"""
+        key = self._keys.get(kid)
+        if key is None and self.directory is not None and time.monotonic() - self._loaded_at >= self.min_reload_interval:
+            self.load()
+            key = self._keys.get(kid)
+        return key
+
+    def rotate(self, force : bool = False) -> bool:
+        """
+        Добавить новый ключ, если текущему больше rotation_interval (или force), 
+        и убрать ключи, замененные раньше чем retire_after назад.
+        Returns:
+            True, если создан новый ключ
+        """
+        with self._directory_lock():
+            self.load()
+            now = time.time()
+            rotated = False
+            if force or not self._keys or now - self.signing_key().created_at >= self.rotation_interval:
+                self.add(generate_key(self.algorithm, kid=f"{self.algorithm.lower()}-{int(now * 1000)}-{os.urandom(3).hex()}"))
+                logger.info(f"Новый ключ подписи токенов {self.signing_key().kid}")
+                rotated = True
+            keys = self.keys
+            for key, successor in zip(keys, keys[1:]):
+                if now - successor.created_at > self.retire_after:
+                    self._retire(key)
+            return rotated
+
+    @contextmanager
+    def _directory_lock(self) -> Iterator[None]:
+        """Блокировка каталога ключей между процессами на время rotate()"""
+        if self.directory is None:
+            yield
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / ".rotate.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _retire(self, key : SigningKey) -> None:
+        self._keys.pop(key.kid, None)
+        self._jwks = self._current = None
+        if self.directory is not None:
+            (self.directory / f"{key.kid}.pem").unlink(missing_ok=True)
+        logger.info(f"Ключ подписи токенов {key.kid} выведен из JWKS")
+
+    def jwks(self) -> Dict[str, Any]:
+        """JWKS с открытыми ключами (собирается один раз на набор ключей)"""
+        if self._jwks is None:
+            self._jwks = {"keys" : [key.jwk() for key in self.keys]}
+        return self._jwks
@@ -0,0 +1,130 @@
+import asyncio
+import time
+from typing import Any, Dict, Optional, Sequence
+
+import httpx
+import jwt
+from fastapi import HTTPException, Request, status
+
+from ..logger.logger import logger
+from .cache import VerifiedTokenCache
+from .keys import ASYMMETRIC_ALGORITHMS
+
+
+class JWKSVerifier:
+    """
+    Локальная проверка JWT по открытым ключам auth сервиса (JWKS).
+
+    JWKS запрашивается при старте и обновляется раз в refresh_interval; 
+    токен с неизвестным kid (ключ только что ротирован) вызывает внеочередное 
+    обновление, но не чаще раза в min_refresh_interval. Проверенные токены 
+    кешируются до exp (VerifiedTokenCache).
+
+    Проверка без обращения к auth сервису - отозванные до exp токены 
+    здесь не видны (нужен auth сервис / общий список отзыва). 
+    Только для асимметричных алгоритмов: с HS256 auth публикует пустой JWKS.
+
+    Args:
+        jwks_url : адрес /.well-known/jwks.json
+        algorithms : допустимые алгоритмы подписи
+        refresh_interval : плановое обновление JWKS, секунды
+        min_refresh_interval : минимальный интервал внеочередных обновлений, секунды
+        client : httpx.AsyncClient (по умолчанию создается свой)
+        cache : кеш проверенных токенов
+
+    Usage:
+        verifier = JWKSVerifier("http://auth-service:8001/.well-known/jwks.json")
+        await verifier.refresh()
+        claims = await verifier.verify(token)
+    """
+
+    def __init__(
+            self, 
+            jwks_url : str, 
+            algorithms : Sequence[str] = ASYMMETRIC_ALGORITHMS, 
+            refresh_interval : float = 300, 
+            min_refresh_interval : float = 10, 
+            client : Optional[httpx.AsyncClient] = None, 
+            cache : Optional[VerifiedTokenCache] = None
+            ):
+        self.jwks_url = jwks_url
+        self.algorithms = list(algorithms)
+        self.refresh_interval = refresh_interval
+        self.min_refresh_interval = min_refresh_interval
+        self.cache = cache or VerifiedTokenCache()
+        self._client = client
+        self._own_client = client is None
+        self._keys : Dict[str, jwt.PyJWK] = {}
+        self._fetched_at = float("-inf")
+        self._lock = asyncio.Lock()
+
+    async def refresh(self, force : bool = False) -> bool:
+        """
+        Обновить JWKS, если истек refresh_interval (force - не чаще min_refresh_interval)
+        Returns:
+            True, если JWKS запрошен
+        """
+        async with self._lock:
+            age = time.monotonic() - self._fetched_at
+            if age < (self.min_refresh_interval if force else self.refresh_interval):
+                return False
+            if self._client is None:
+                self._client = httpx.AsyncClient(timeout=5)
+            self._fetched_at = time.monotonic()
+            try:
+                response = await self._client.get(self.jwks_url)
+                response.raise_for_status()
+                keys = {}
+                for jwk in response.json()["keys"]:
+                    if jwk.get("alg") in self.algorithms:
+                        keys[jwk["kid"]] = jwt.PyJWK(jwk)
+            except Exception as e:
+                logger.warn(f"Не удалось обновить JWKS {self.jwks_url}: {e}")
+                return False
+            self._keys = keys
+            return True
+
+    async def verify(self, token : str) -> Optional[Dict[str, Any]]:
+        """Claims проверенного токена или None"""
+        claims = self.cache.get(token)
+        if claims is not None:
+            return claims
+        try:
+            kid = jwt.get_unverified_header(token).get("kid")
+        except jwt.PyJWTError:
+            return None
+        await self.refresh()
+        key = self._keys.get(kid)
+        if key is None and await self.refresh(force=True):
+            key = self._keys.get(kid)
+        if key is None:
+            logger.warn(f"Неизвестный kid токена: {kid}")
+            return None
+        try:
+            claims = jwt.decode(token, key=key, algorithms=self.algorithms)
+        except jwt.PyJWTError as e:
+            logger.warn(f"Ошибка проверки токена: {e}")
+            return None
+        self.cache.put(token, claims)
+        return claims
+
+    async def aclose(self) -> None:
+        if self._own_client and self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def bearer_claims(verifier : JWKSVerifier, token_type : str = "access"):
+    """
+    FastAPI зависимость: claims из заголовка Authorization: Bearer <token>, иначе 401
+
+    Usage:
+        Claims = Annotated[dict, Depends(bearer_claims(verifier))]
+    """
+    async def dependency(request : Request) -> Dict[str, Any]:
+        scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+        claims = await verifier.verify(token) if scheme.lower() == "bearer" and token else None
+        if claims is None or claims.get("type") != token_type:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or missing authentication token")
+        return claims
+    return dependency
@@ -0,0 +1,5 @@
+from .base import BaseVerificationStore, VerificationStats, VerifyResult, VerifyStatus
+from .memory import MemoryVerificationStore
+from .factory import build_verification_store
+
+__all__ = ['BaseVerificationStore', 'VerificationStats', 'VerifyResult', 'VerifyStatus', 'MemoryVerificationStore', 'build_verification_store']
@@ -0,0 +1,85 @@
+import abc
+import enum
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Optional
+
+
+class VerifyStatus(str, enum.Enum):
+    """Итог проверки кода"""
+    OK = "ok"
+    INVALID = "invalid"
+    LOCKED = "locked"
+    NOT_FOUND = "not_found"
+
+
+@dataclass
+class VerifyResult:
+    """Результат check_and_consume"""
+    status : VerifyStatus
+    phone : Optional[str] = None
+    attempts_left : int = 0
+
+    @property
+    def ok(self) -> bool:
+        return self.status is VerifyStatus.OK
+
+
+@dataclass
+class VerificationStats:
+    """Счетчики хранилища"""
+    created : int = 0
+    verified : int = 0
+    invalid : int = 0
+    locked : int = 0
+    not_found : int = 0
+
+    def record(self, result : VerifyResult) -> None:
+        if result.status is VerifyStatus.OK:
+            self.verified += 1
+        elif result.status is VerifyStatus.INVALID:
+            self.invalid += 1
+        elif result.status is VerifyStatus.LOCKED:
+            self.locked += 1
+        else:
+            self.not_found += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class BaseVerificationStore(abc.ABC):
+    """
+    Хранилище сессий верификации по SMS.
+
+    Сессия живет ttl секунд (истекает само хранилище). Проверка кода - 
+    атомарная операция: подпись совпала - сессия удаляется (код одноразовый), 
+    не совпала - растет счетчик попыток, на max_attempts сессия удаляется.
+
+    Args:
+        max_attempts : сколько неверных кодов допускается на одну сессию
+    """
+
+    def __init__(self, max_attempts : int = 5):
+        if max_attempts <= 0:
+            raise ValueError("max_attempts must be positive")
+        self.max_attempts = max_attempts
+        self.stats = VerificationStats()
+
+    @abc.abstractmethod
+    async def save(self, session : Dict[str, Any], ttl : float) -> None:
+        """Сохранить сессию (id, phone, sign, hash_code) на ttl секунд"""
+
+    @abc.abstractmethod
+    async def check_and_consume(self, session_id : str, sign : str) -> VerifyResult:
+        """Сверить подпись введенного кода с сохраненной и погасить сессию при совпадении"""
+
+    @abc.abstractmethod
+    async def get(self, session_id : str) -> Optional[Dict[str, Any]]:
+        """Данные сессии (с attempts), None если сессии нет или она истекла"""
+
+    @abc.abstractmethod
+    async def delete(self, session_id : str) -> None:
+        """Удалить сессию"""
+
+    async def aclose(self) -> None:
+        """Закрыть соединения хранилища"""
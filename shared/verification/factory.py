@@ -0,0 +1,27 @@
+from typing import Optional
+
+from .base import BaseVerificationStore
+from .memory import MemoryVerificationStore
+
+
+def build_verification_store(
+        redis_url : Optional[str] = None, 
+        max_attempts : int = 5, 
+        prefix : str = "sms:session:"
+        ) -> BaseVerificationStore:
+    
+    """
+    Сборка хранилища сессий верификации из настроек
+    Args:
+        redis_url : адрес Redis, если не задан - хранилище в памяти процесса
+        max_attempts : сколько неверных кодов допускается на одну сессию
+        prefix : префикс ключей в Redis
+    Returns:
+        store : RedisVerificationStore или MemoryVerificationStore
+    """
+
+    if not redis_url:
+        return MemoryVerificationStore(max_attempts=max_attempts)
+    from redis.asyncio import Redis
+    from .redis import RedisVerificationStore
+    return RedisVerificationStore(Redis.from_url(redis_url), max_attempts=max_attempts, prefix=prefix)
@@ -0,0 +1,71 @@
+import hmac
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from .base import BaseVerificationStore, VerifyResult, VerifyStatus
+
+
+class MemoryVerificationStore(BaseVerificationStore):
+    """
+    Сессии верификации в памяти процесса - для тестов и одной реплики.
+    Истекшие сессии удаляются при обращении и при сохранении новых.
+
+    Args:
+        max_attempts : сколько неверных кодов допускается на одну сессию
+    """
+
+    def __init__(self, max_attempts : int = 5):
+        super().__init__(max_attempts)
+        self._data : Dict[str, Tuple[float, Dict[str, Any]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _get(self, session_id : str) -> Optional[Dict[str, Any]]:
+        item = self._data.get(session_id)
+        if item is None:
+            return None
+        expires_at, session = item
+        if expires_at <= time.monotonic():
+            del self._data[session_id]
+            return None
+        return session
+
+    def _sweep(self) -> None:
+        now = time.monotonic()
+        for session_id in [key for key, (expires_at, _) in self._data.items() if expires_at <= now]:
+            del self._data[session_id]
+
+    async def save(self, session : Dict[str, Any], ttl : float) -> None:
+        self._sweep()
+        self._data[session["id"]] = (time.monotonic() + ttl, {
+            "phone" : session["phone"],
+            "sign" : session["sign"],
+            "hash_code" : session["hash_code"],
+            "attempts" : 0,
+        })
+        self.stats.created += 1
+
+    async def check_and_consume(self, session_id : str, sign : str) -> VerifyResult:
+        session = self._get(session_id)
+        if session is None:
+            result = VerifyResult(VerifyStatus.NOT_FOUND)
+        elif hmac.compare_digest(session["sign"].encode(), sign.encode()):
+            del self._data[session_id]
+            result = VerifyResult(VerifyStatus.OK, phone=session["phone"])
+        else:
+            session["attempts"] += 1
+            if session["attempts"] >= self.max_attempts:
+                del self._data[session_id]
+                result = VerifyResult(VerifyStatus.LOCKED)
+            else:
+                result = VerifyResult(VerifyStatus.INVALID, attempts_left=self.max_attempts - session["attempts"])
+        self.stats.record(result)
+        return result
+
+    async def get(self, session_id : str) -> Optional[Dict[str, Any]]:
+        session = self._get(session_id)
+        return dict(session) if session is not None else None
+
+    async def delete(self, session_id : str) -> None:
+        self._data.pop(session_id, None)
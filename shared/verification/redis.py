@@ -0,0 +1,94 @@
+from typing import Any, Dict, Optional
+
+from redis.asyncio import Redis
+
+from .base import BaseVerificationStore, VerifyResult, VerifyStatus
+
+
+# KEYS[1] - ключ сессии, ARGV[1] - подпись введенного кода, ARGV[2] - max_attempts.
+# Ответ {код, phone, attempts_left}: 0 - нет сессии, 1 - ok, 2 - неверный код, 3 - попытки исчерпаны
+_CHECK_AND_CONSUME = """
+local stored = redis.call('HMGET', KEYS[1], 'sign', 'phone')
+if not stored[1] then
+    return {0, '', 0}
+end
+if stored[1] == ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    return {1, stored[2], 0}
+end
+local attempts = redis.call('HINCRBY', KEYS[1], 'attempts', 1)
+local max_attempts = tonumber(ARGV[2])
+if attempts >= max_attempts then
+    redis.call('DEL', KEYS[1])
+    return {3, '', 0}
+end
+return {2, '', max_attempts - attempts}
+"""
+
+_STATUSES = {0 : VerifyStatus.NOT_FOUND, 1 : VerifyStatus.OK, 2 : VerifyStatus.INVALID, 3 : VerifyStatus.LOCKED}
+
+
+class RedisVerificationStore(BaseVerificationStore):
+    """
+    Сессии верификации в Redis, общие для всех реплик auth.
+    Сессия - hash с PEXPIRE, проверка кода - один EVALSHA (Lua скрипт 
+    атомарно сверяет подпись, гасит сессию или увеличивает счетчик попыток).
+    Ошибки Redis пробрасываются: без хранилища проверить код нельзя.
+
+    Args:
+        client : клиент redis.asyncio
+        max_attempts : сколько неверных кодов допускается на одну сессию
+        prefix : префикс ключей
+
+    Usage:
+        store = RedisVerificationStore(Redis.from_url(config.RedisUrl))
+        await store.save(session, ttl=300)
+        result = await store.check_and_consume(session_id, sign)
+    """
+
+    def __init__(self, client : Redis, max_attempts : int = 5, prefix : str = "sms:session:"):
+        super().__init__(max_attempts)
+        self.client = client
+        self.prefix = prefix
+        self._check_and_consume = client.register_script(_CHECK_AND_CONSUME)
+
+    async def save(self, session : Dict[str, Any], ttl : float) -> None:
+        key = self.prefix + session["id"]
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping={
+                "phone" : session["phone"],
+                "sign" : session["sign"],
+                "hash_code" : session["hash_code"],
+                "attempts" : 0,
+            })
+            pipe.pexpire(key, int(ttl * 1000))
+            await pipe.execute()
+        self.stats.created += 1
+
+    async def check_and_consume(self, session_id : str, sign : str) -> VerifyResult:
+        code, phone, attempts_left = await self._check_and_consume(
+            keys=[self.prefix + session_id], 
+            args=[sign, self.max_attempts]
+            )
+        if isinstance(phone, bytes):
+            phone = phone.decode()
+        result = VerifyResult(_STATUSES[int(code)], phone=phone or None, attempts_left=int(attempts_left))
+        self.stats.record(result)
+        return result
+
+    async def get(self, session_id : str) -> Optional[Dict[str, Any]]:
+        raw = await self.client.hgetall(self.prefix + session_id)
+        if not raw:
+            return None
+        session = {
+            (key.decode() if isinstance(key, bytes) else key) : (value.decode() if isinstance(value, bytes) else value)
+            for key, value in raw.items()
+        }
+        session["attempts"] = int(session.get("attempts", 0))
+        return session
+
+    async def delete(self, session_id : str) -> None:
+        await self.client.delete(self.prefix + session_id)
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
@@ -0,0 +1,157 @@
+import time
+import pytest
+
+from sqlalchemy import update
+
+from db.models import User
+from db.repository import UserRepository
+from shared.cache import MemoryCache, TieredCache
+from shared.database.base import BaseUnitOfWork
+from shared.database.cache import EntityCache
+
+
+@pytest.mark.anyio
+async def test_memory_cache_lru_ttl(monkeypatch):
+    """LRU вытесняет самый старый по доступу ключ, TTL истекает"""
+    cache = MemoryCache(maxsize=2, ttl=10)
+    await cache.set("a", 1)
+    await cache.set("b", 2)
+    assert await cache.get("a") == 1
+    await cache.set("c", 3)
+    assert await cache.get("b") is None
+    assert await cache.get_many(["a", "c"]) == [1, 3]
+    assert cache.stats.evictions == 1
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 11)
+    assert await cache.get("a") is None
+    assert cache.stats.evictions == 2
+    assert cache.stats.hits == 3 and cache.stats.misses == 2
+
+
+@pytest.mark.anyio
+async def test_tiered_cache_backfill():
+    """Промах локального уровня дозаписывается из общего"""
+    local, remote = MemoryCache(), MemoryCache()
+    cache = TieredCache(local, remote)
+    await remote.set("a", {"x": 1})
+    assert await cache.get("a") == {"x": 1}
+    assert await local.get("a") == {"x": 1}
+    await cache.delete("a")
+    assert await cache.get("a") is None
+
+
+@pytest.mark.anyio
+async def test_tiered_cache_ttl_and_evictions(monkeypatch):
+    """Короткий TTL вызывающего действует и на локальный уровень, вытеснения локального видны в stats"""
+    local, remote = MemoryCache(maxsize=1, ttl=60), MemoryCache()
+    cache = TieredCache(local, remote)
+    await cache.set("a", 1, ttl=5)
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 6)
+    assert await local.get("a") is None
+    await cache.set("b", 2)
+    await cache.set("c", 3)
+    assert cache.stats.evictions == local.stats.evictions == 2
+
+
+class CachedUserRepository(UserRepository):
+    cache = EntityCache(MemoryCache(), fields=("phone_number",))
+
+
+@pytest.mark.anyio
+async def test_entity_cache_invalidation(session_factory):
+    """Кеш сбрасывается после коммита транзакции, в которой менялась сущность"""
+    CachedUserRepository.cache.backend.clear()
+    uow = BaseUnitOfWork(session_factory)
+    uow.add_repo("user", CachedUserRepository)
+    async with uow.transaction() as u:
+        user = await u.user_repository.create(phone_number="79000000001")
+
+    async with uow.readonly() as u:
+        assert (await u.user_repository.get_by_field("phone_number", "79000000001")).id == user.id
+    stats = CachedUserRepository.cache.stats
+    hits = stats.hits
+    async with uow.readonly() as u:
+        cached = await u.user_repository.get_by_field("phone_number", "79000000001")
+        assert cached.id == user.id and cached.created_at == user.created_at
+        assert (await u.user_repository.get_by_id(user.id)) is cached
+    assert stats.hits > hits
+
+    async with uow.transaction() as u:
+        await u.user_repository.update(user.id, phone_number="79000000002")
+        # Внутри транзакции измененная сущность читается мимо кеша
+        assert (await u.user_repository.get_by_id(user.id)).phone_number == "79000000002"
+
+    async with uow.readonly() as u:
+        assert await u.user_repository.get_by_field("phone_number", "79000000001") is None
+        assert (await u.user_repository.get_by_id(user.id)).phone_number == "79000000002"
+
+    with pytest.raises(RuntimeError):
+        async with uow.transaction() as u:
+            await u.user_repository.delete(user.id)
+            raise RuntimeError("rollback")
+    async with uow.readonly() as u:
+        assert await u.user_repository.get_by_id(user.id) is not None
+
+
+@pytest.mark.anyio
+async def test_entity_cache_savepoint_rollback(session_factory):
+    """Откат savepoint не забывает изменения внешней транзакции - после коммита кеш сброшен"""
+    CachedUserRepository.cache.backend.clear()
+    uow = BaseUnitOfWork(session_factory)
+    uow.add_repo("user", CachedUserRepository)
+    async with uow.transaction() as u:
+        user = await u.user_repository.create(phone_number="79000000021")
+    async with uow.readonly() as u:
+        await u.user_repository.get_by_id(user.id)
+    key = CachedUserRepository.cache.key(User, "id", user.id)
+    assert await CachedUserRepository.cache.backend.get(key) is not None
+
+    async with uow.transaction() as u:
+        await u.user_repository.update(user.id, phone_number="79000000022")
+        with pytest.raises(RuntimeError):
+            async with u.savepoint():
+                await u.user_repository.create(phone_number="79000000023")
+                raise RuntimeError("rollback savepoint")
+    assert await CachedUserRepository.cache.backend.get(key) is None
+    async with uow.readonly() as u:
+        assert (await u.user_repository.get_by_id(user.id)).phone_number == "79000000022"
+
+
+class SecretUserRepository(UserRepository):
+    cache = EntityCache(MemoryCache(), fields=("phone_number",), exclude=("hash_password",))
+
+
+@pytest.mark.anyio
+async def test_entity_cache_commit_hook(session_factory):
+    """Запись мимо репозитория сбрасывает кеш после коммита, хеш пароля в кеш не попадает"""
+    backend = SecretUserRepository.cache.backend
+    backend.clear()
+    uow = BaseUnitOfWork(session_factory)
+    uow.add_repo("user", SecretUserRepository)
+    async with uow.transaction() as u:
+        user = await u.user_repository.create(phone_number="79000000011", hash_password="secret")
+    async with uow.readonly() as u:
+        await u.user_repository.get_by_id(user.id)
+    key = SecretUserRepository.cache.key(User, "id", user.id)
+    assert "hash_password" not in await backend.get(key)
+
+    async with uow.readonly() as u:
+        cached = await u.user_repository.get_by_id(user.id)
+        assert await cached.awaitable_attrs.hash_password == "secret"
+
+    # UPDATE через голую сессию
+    async with session_factory() as session:
+        await session.execute(update(User).where(User.id == user.id).values(phone_number="79000000012"))
+        await session.commit()
+    assert await backend.get(key) is None
+
+    # ORM объект через голую сессию
+    async with uow.readonly() as u:
+        await u.user_repository.get_by_id(user.id)
+    async with session_factory() as session:
+        entity = await session.get(User, user.id)
+        entity.phone_number = "79000000013"
+        await session.commit()
+    assert await backend.get(key) is None
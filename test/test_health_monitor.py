@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from shared.health import HealthMonitor, sql_probe
+
+
+class FlakyProbe:
+    """Проверка-заглушка: падает, пока fail=True"""
+
+    def __init__(self):
+        self.fail = False
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError("refused")
+
+
+@pytest.mark.anyio
+async def test_readiness_and_history():
+    """Readiness зависит только от критичных зависимостей, история копится"""
+    db, cache = FlakyProbe(), FlakyProbe()
+    monitor = HealthMonitor(interval=60, timeout=0.5, history=3)
+    monitor.add("postgres", db)
+    monitor.add("redis", cache, critical=False)
+    assert not monitor.readiness()["ready"]
+
+    await monitor.check()
+    assert monitor.readiness()["ready"]
+    cache.fail = True
+    await monitor.check()
+    assert monitor.readiness() == {"status" : "ready", "ready" : True, "dependencies" : {"postgres" : "up", "redis" : "down"}}
+    db.fail = True
+    await monitor.check()
+    await monitor.check()
+    report = monitor.report()
+    assert not monitor.readiness()["ready"]
+    assert report["postgres"]["consecutive_failures"] == 2
+    assert report["postgres"]["history_ms"][1:] == [None, None]
+    assert len(report["postgres"]["history_ms"]) == 3
+    assert "refused" in report["postgres"]["error"]
+    assert monitor.liveness()["alive"]
+
+
+@pytest.mark.anyio
+async def test_endpoints_do_not_probe():
+    """Отчет берется из кеша: опрос эндпоинтов не вызывает проверок"""
+    probe = FlakyProbe()
+    monitor = HealthMonitor(interval=60)
+    monitor.add("postgres", probe)
+    await monitor.start()
+    try:
+        for _ in range(100):
+            monitor.readiness()
+            monitor.report()
+        assert probe.calls == 1
+    finally:
+        await monitor.stop()
+
+
+@pytest.mark.anyio
+async def test_timeout():
+    """Зависшая зависимость помечается недоступной по таймауту"""
+    async def hang():
+        await asyncio.sleep(10)
+
+    monitor = HealthMonitor(timeout=0.05)
+    monitor.add("sibling", hang)
+    await monitor.check()
+    result = monitor.status("sibling")
+    assert not result.ok and result.error.startswith("timeout")
+    assert result.latency_ms < 1000
+
+
+@pytest.mark.anyio
+async def test_background_loop(engine):
+    """Фоновый цикл проверяет Postgres через пул движка"""
+    monitor = HealthMonitor(interval=0.02, timeout=1)
+    monitor.add("postgres", sql_probe(engine))
+    await monitor.start()
+    await asyncio.sleep(0.15)
+    await monitor.stop()
+    assert monitor.rounds >= 3
+    assert monitor.readiness()["ready"]
+    assert monitor.report()["postgres"]["latency_p95_ms"] is not None
@@ -0,0 +1,79 @@
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from db.repository import UserRepository
+from shared.database import instrumentation
+from shared.database.base import BaseUnitOfWork
+from shared.database.instrumentation import NPlusOneError, QueryStatsMiddleware, instrument_engine, normalize_statement, query_scope
+
+
+@pytest.fixture
+def detector():
+    """Детектор N+1 в строгом режиме на время теста"""
+    instrumentation.configure(detect_n_plus_one=True, n_plus_one_threshold=3, n_plus_one_raise=True)
+    yield
+    instrumentation.configure()
+
+
+def test_normalize_statement():
+    """Литералы и списки параметров не различают повторы одного запроса"""
+    assert normalize_statement("SELECT * FROM t WHERE id = 5 AND name = 'a''b'") == "SELECT * FROM t WHERE id = ? AND name = ?"
+    assert normalize_statement("SELECT *\n  FROM t WHERE id IN ($1, $2, $3)") == normalize_statement("SELECT * FROM t WHERE id IN ($1)")
+
+
+@pytest.mark.anyio
+async def test_uow_query_stats(engine, session_factory):
+    """Статистика собирается на каждый unit of work, вложенные скоупы видят те же запросы"""
+    instrument_engine(engine)
+    uow = BaseUnitOfWork(session_factory)
+    uow.add_repo("user", UserRepository)
+    with query_scope("request") as outer:
+        async with uow.transaction() as u:
+            for i in range(3):
+                await u.user_repository.create(phone_number=f"7900000000{i}")
+        async with uow.readonly() as u:
+            users = await u.user_repository.get_all(limit=10)
+    assert len(users) == 3
+    assert uow.query_stats.name == "BaseUnitOfWork.readonly"
+    assert uow.query_stats.statements >= 1 and uow.query_stats.rows == 3
+    assert outer.statements > uow.query_stats.statements
+    assert outer.slowest_statement is not None and outer.total_time > 0
+    # без детектора N+1 запросы не нормализуются
+    assert not outer.repeated
+    assert instrumentation.current_scopes() == ()
+
+
+@pytest.mark.anyio
+async def test_n_plus_one_detector(engine, session_factory, detector):
+    """Повтор одного запроса больше порога в скоупе - ошибка в строгом режиме"""
+    instrument_engine(engine)
+    uow = BaseUnitOfWork(session_factory)
+    uow.add_repo("user", UserRepository)
+    async with uow.readonly() as u:
+        for i in range(3):
+            await u.user_repository.exists(i)
+    with pytest.raises(NPlusOneError):
+        async with uow.readonly() as u:
+            for i in range(5):
+                await u.user_repository.exists(i)
+    assert uow.query_stats.n_plus_one
+
+
+@pytest.mark.anyio
+async def test_middleware_headers(engine, session_factory):
+    """Middleware отдает количество запросов HTTP запроса в заголовках"""
+    instrument_engine(engine)
+    app = FastAPI()
+    app.add_middleware(QueryStatsMiddleware)
+
+    @app.get("/users/count")
+    async def users_count():
+        async with session_factory() as session:
+            return {"count": await UserRepository(session).count()}
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/users/count")
+    assert response.json() == {"count": 0}
+    assert response.headers["x-db-queries"] == "1"
+    assert float(response.headers["x-db-time-ms"]) > 0
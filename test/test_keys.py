@@ -0,0 +1,124 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import jwt
+import pytest
+from fastapi import FastAPI, Depends
+
+from shared.tokens import JWKSVerifier, KeyRing, bearer_claims
+
+
+def _sign(ring : KeyRing, **claims) -> str:
+    key = ring.signing_key()
+    payload = {"user_id" : 1, "type" : "access", "exp" : int(time.time()) + 60, **claims}
+    return jwt.encode(payload, key.private_key, algorithm=key.algorithm, headers={"kid" : key.kid})
+
+
+def _verifier(ring : KeyRing, requests : list, **kwargs) -> JWKSVerifier:
+    def handler(request):
+        requests.append(request.url.path)
+        return httpx.Response(200, json=ring.jwks())
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return JWKSVerifier("http://auth/.well-known/jwks.json", client=client, **kwargs)
+
+
+@pytest.mark.parametrize("algorithm", ["EdDSA", "RS256"])
+def test_rotation_and_retirement(algorithm):
+    """Подпись новым ключом, старый остается в JWKS до retire_after"""
+    ring = KeyRing(algorithm, rotation_interval=3600, retire_after=3600)
+    assert ring.rotate() and not ring.rotate()
+    first = ring.signing_key()
+    assert ring.rotate(force=True)
+    assert ring.signing_key() is not first
+    assert [jwk["kid"] for jwk in ring.jwks()["keys"]] == [first.kid, ring.signing_key().kid]
+    assert {jwk["alg"] for jwk in ring.jwks()["keys"]} == {algorithm}
+
+    ring.retire_after = 0
+    ring.rotate()
+    assert len(ring) == 1 and ring.get(first.kid) is None
+
+
+def test_shared_directory(tmp_path):
+    """Реплики с общим каталогом подписывают одним ключом"""
+    first = KeyRing("EdDSA", directory=str(tmp_path))
+    second = KeyRing("EdDSA", directory=str(tmp_path))
+    first.rotate()
+    assert not second.rotate()
+    assert second.signing_key().kid == first.signing_key().kid
+    token = _sign(first)
+    key = second.get(first.signing_key().kid)
+    assert jwt.decode(token, key.public_key, algorithms=["EdDSA"])["user_id"] == 1
+
+
+def test_unknown_kid_reloads_directory(tmp_path, monkeypatch):
+    """Ключ, созданный другой репликой, находится по kid; каталог перечитывается не чаще min_reload_interval"""
+    first = KeyRing("EdDSA", directory=str(tmp_path))
+    second = KeyRing("EdDSA", directory=str(tmp_path), min_reload_interval=60)
+    first.rotate()
+    second.rotate()
+    first.rotate(force=True)
+    assert second.get(first.signing_key().kid) is None
+    loads = []
+    monkeypatch.setattr(second, "load", lambda: loads.append(1))
+    assert second.get("unknown") is None
+    assert loads == []
+    monkeypatch.undo()
+    second.min_reload_interval = 0
+    assert second.get(first.signing_key().kid).kid == first.signing_key().kid
+
+
+def test_concurrent_first_rotate(tmp_path):
+    """Реплики, стартующие одновременно с пустым каталогом, создают один ключ"""
+    rings = [KeyRing("RS256", directory=str(tmp_path)) for _ in range(4)]
+    with ThreadPoolExecutor(len(rings)) as pool:
+        created = list(pool.map(lambda ring: ring.rotate(), rings))
+    assert created.count(True) == 1
+    assert [path.name for path in tmp_path.glob("*.pem")] == [f"{rings[0].signing_key().kid}.pem"]
+    assert {ring.signing_key().kid for ring in rings} == {rings[0].signing_key().kid}
+
+
+@pytest.mark.anyio
+async def test_verifier_refreshes_on_new_kid():
+    """Неизвестный kid - внеочередное обновление JWKS, но не чаще min_refresh_interval"""
+    ring = KeyRing("EdDSA")
+    ring.rotate()
+    requests = []
+    verifier = _verifier(ring, requests, min_refresh_interval=0)
+    token = _sign(ring)
+    assert (await verifier.verify(token))["user_id"] == 1
+    assert (await verifier.verify(token))["user_id"] == 1
+    assert len(requests) == 1
+
+    ring.rotate(force=True)
+    assert (await verifier.verify(_sign(ring, user_id=2)))["user_id"] == 2
+    assert len(requests) == 2
+
+    verifier.min_refresh_interval = 60
+    foreign = KeyRing("EdDSA")
+    foreign.rotate()
+    for _ in range(3):
+        assert await verifier.verify(_sign(foreign)) is None
+    assert len(requests) == 2
+    await verifier._client.aclose()
+
+
+@pytest.mark.anyio
+async def test_bearer_dependency():
+    """Зависимость отдает claims access токена, иначе 401"""
+    ring = KeyRing("EdDSA")
+    ring.rotate()
+    verifier = _verifier(ring, [])
+    app = FastAPI()
+
+    @app.get("/me")
+    async def me(claims : dict = Depends(bearer_claims(verifier))):
+        return {"user_id" : claims["user_id"]}
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://vpn") as client:
+        ok = await client.get("/me", headers={"Authorization" : f"Bearer {_sign(ring, user_id=5)}"})
+        refresh = await client.get("/me", headers={"Authorization" : f"Bearer {_sign(ring, type='refresh')}"})
+        missing = await client.get("/me")
+    assert ok.json() == {"user_id" : 5}
+    assert refresh.status_code == 401 and missing.status_code == 401
+    await verifier._client.aclose()
@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import DateTime, cast, func, select, text
+
+from db.models import UserSession
+from db.repository import UserRepository, UserSessionRepository
+from shared.database.maintenance import PeriodicTask, advisory_lock_key, purge_in_batches
+
+
+EXPIRED = datetime.now() - timedelta(days=60)
+
+
+async def _sessions(session_factory, expired : int, active : int) -> None:
+    async with session_factory() as session:
+        user = await UserRepository(session).create(phone_number="79000000001")
+        await UserSessionRepository(session).bulk_create([
+            {
+                "user_id" : user.id, 
+                "ip_addres" : "127.0.0.1", 
+                "refresh_jti" : f"00000000-0000-0000-0000-{i:012d}",
+                "last_activity" : EXPIRED if i < expired else datetime.now(),
+            }
+            for i in range(expired + active)
+        ])
+        await session.commit()
+
+
+async def _remaining(session_factory) -> int:
+    async with session_factory() as session:
+        return await UserSessionRepository(session).count()
+
+
+@pytest.mark.anyio
+async def test_purge_in_batches(session_factory):
+    """Истекшие сессии удаляются ограниченными пачками, активные остаются"""
+    await _sessions(session_factory, expired=20, active=5)
+    report = await purge_in_batches(
+        session_factory, UserSessionRepository, [UserSession.last_activity < cast(func.now(), DateTime) - timedelta(days=1)],
+        name="test.purge", batch_size=7, pause=0,
+        )
+    assert report.locked
+    assert [batch.rows for batch in report.batches] == [7, 7, 6]
+    assert report.as_dict()["rows"] == 20
+    assert await _remaining(session_factory) == 5
+
+
+@pytest.mark.anyio
+async def test_purge_skips_when_locked(session_factory):
+    """Пока другая реплика держит advisory lock, очистка пропускается"""
+    await _sessions(session_factory, expired=3, active=0)
+    async with session_factory() as other:
+        async with other.begin():
+            await other.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key" : advisory_lock_key("test.purge")})
+            report = await purge_in_batches(
+                session_factory, UserSessionRepository, [UserSession.last_activity < datetime.now()], name="test.purge",
+                )
+    assert not report.locked and report.rows == 0
+    assert await _remaining(session_factory) == 3
+
+    task = PeriodicTask("test.purge", lambda: purge_in_batches(
+        session_factory, UserSessionRepository, [UserSession.last_activity < datetime.now()], name="test.purge",
+        ), interval=3600)
+    assert (await task.run_once()).rows == 3
+    assert task.runs == 1
+
+
+@pytest.mark.anyio
+async def test_delete_batch_skips_locked_rows(session_factory):
+    """delete_batch не ждет строки, заблокированные другой транзакцией"""
+    await _sessions(session_factory, expired=4, active=0)
+    async with session_factory() as other:
+        async with other.begin():
+            locked = await other.scalar(select(UserSession.id).order_by(UserSession.id).limit(1).with_for_update())
+            async with session_factory() as session:
+                async with session.begin():
+                    await session.execute(text("SET LOCAL lock_timeout = '1s'"))
+                    assert await UserSessionRepository(session).delete_batch(UserSession.user_id > 0, limit=10) == 3
+    async with session_factory() as session:
+        assert (await session.scalars(select(UserSession.id))).all() == [locked]
@@ -0,0 +1,125 @@
+import time
+import asyncio
+import os
+
+import pytest
+from sqlalchemy import exc, text
+
+from shared.database.pool import PoolMonitor, build_engine, warmup_pool
+from shared.database.routing import EngineRouter
+
+
+@pytest.fixture
+def database_url():
+    url = os.environ.get("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL не задан")
+    return url
+
+
+@pytest.mark.anyio
+async def test_warmup(database_url):
+    """Прогрев открывает соединения заранее, но не больше размера пула"""
+    engine = build_engine(database_url, pool_size=3)
+    try:
+        assert await warmup_pool(engine, 5) == 3
+        assert engine.pool.checkedin() == 3
+        router = EngineRouter(engine)
+        assert await router.warmup(2) == {"primary" : 2}
+        assert router.pool_stats()["engines"]["primary"]["wait"]["checkouts"] == 5
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.anyio
+async def test_wait_metrics(database_url):
+    """Ожидание свободного соединения и таймауты пула попадают в метрики"""
+    engine = build_engine(database_url, pool_size=1, max_overflow=0, pool_timeout=0.2)
+
+    async def release_later(conn):
+        await asyncio.sleep(0.05)
+        await conn.close()
+
+    try:
+        async with engine.connect():
+            with pytest.raises(exc.TimeoutError):
+                async with engine.connect():
+                    pass
+        conn = await engine.connect()
+        task = asyncio.create_task(release_later(conn))
+        async with engine.connect() as second:
+            await second.execute(text("SELECT 1"))
+        await task
+        metrics = engine.pool.metrics
+        assert metrics.timeouts == 1
+        assert metrics.waits >= 2 and metrics.max_wait >= 0.04
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.anyio
+async def test_connect_time_is_not_wait(database_url, monkeypatch):
+    """Медленное подключение нового соединения не считается ожиданием пула"""
+    engine = build_engine(database_url, pool_size=1, max_overflow=1)
+    create_connection = engine.pool._create_connection
+    monkeypatch.setattr(engine.pool, "_create_connection", lambda: time.sleep(0.05) or create_connection())
+    try:
+        async with engine.connect(), engine.connect():
+            pass
+        metrics = engine.pool.metrics
+        assert metrics.checkouts == 2 and metrics.waits == 0 and metrics.max_wait == 0
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.anyio
+async def test_pgbouncer_mode(database_url):
+    """В режиме PgBouncer кеш подготовленных запросов выключен"""
+    engine = build_engine(database_url, pgbouncer=True)
+    try:
+        async with engine.connect() as conn:
+            for _ in range(3):
+                assert (await conn.execute(text("SELECT 1"))).scalar() == 1
+            raw = await conn.get_raw_connection()
+            assert raw.driver_connection._stmt_cache.get_max_size() == 0
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.anyio
+async def test_pool_monitor(database_url):
+    """Фоновая проверка отмечает живые и недоступные движки"""
+    alive = build_engine(database_url)
+    dead = build_engine("postgresql+asyncpg://postgres@127.0.0.1:1/postgres", pool_timeout=1)
+    monitor = PoolMonitor({"alive" : alive, "dead" : dead}, interval=0.01)
+    try:
+        monitor.start()
+        await asyncio.sleep(0.1)
+        await monitor.stop()
+        assert monitor.state["alive"]["alive"] is True
+        assert monitor.state["dead"]["alive"] is False
+        assert monitor.state["dead"]["failures"] >= 1
+    finally:
+        await alive.dispose()
+        await dead.dispose()
+
+
+@pytest.mark.anyio
+async def test_pool_monitor_shared_probe(database_url):
+    """Движок, отданный HealthMonitor, проверяется только его раундами"""
+    alive = build_engine(database_url)
+    dead = build_engine("postgresql+asyncpg://postgres@127.0.0.1:1/postgres", pool_timeout=1)
+    monitor = PoolMonitor({"alive" : alive, "dead" : dead}, interval=0.01)
+    probe = monitor.probe("dead")
+    try:
+        monitor.start()
+        await asyncio.sleep(0.1)
+        await monitor.stop()
+        assert monitor.state["alive"]["alive"] is True
+        assert monitor.state["dead"]["alive"] is None
+        with pytest.raises(Exception):
+            await probe()
+        assert monitor.state["dead"] == {"alive" : False, "latency_ms" : None, "failures" : 1}
+    finally:
+        await alive.dispose()
+        await dead.dispose()
@@ -0,0 +1,135 @@
+import time
+import pytest
+
+from fastapi import FastAPI, Request
+from httpx import ASGITransport, AsyncClient
+
+from shared.ratelimit import MemoryRateLimiter, RateLimit, TieredRateLimiter, parse_rules, rate_limit, trust_proxies
+from shared.ratelimit.dependency import client_ip
+from shared.ratelimit.redis import RedisRateLimiter
+
+
+@pytest.mark.anyio
+async def test_sliding_window(monkeypatch):
+    """Лимит на окно, предыдущее окно учитывается с убывающим весом"""
+    now = 1000.0
+    monkeypatch.setattr(time, "time", lambda: now)
+    limiter = MemoryRateLimiter()
+    rule = RateLimit(limit=3, window=10)
+    assert [(await limiter.hit("k", rule)).allowed for _ in range(4)] == [True, True, True, False]
+    rejected = await limiter.hit("k", rule)
+    assert rejected.remaining == 0 and rejected.retry_after == 10
+
+    # 3 запроса в прошлом окне, прошло 40% нового: весят 3 * 0.6 = 1.8
+    now = 1014.0
+    assert (await limiter.hit("k", rule)).allowed
+    assert not (await limiter.hit("k", rule)).allowed
+    now = 1020.0
+    assert (await limiter.hit("k", rule)).allowed
+    assert limiter.stats.allowed == 5 and limiter.stats.rejected == 3
+
+
+@pytest.mark.anyio
+async def test_rejected_request_is_not_counted():
+    """Запрос, отклоненный по одному ключу, не расходует остальные"""
+    limiter = MemoryRateLimiter()
+    tight, loose = RateLimit(1, 60), RateLimit(10, 60)
+    assert (await limiter.hit("phone:1", tight)).allowed
+    results = await limiter.hit_many([("phone:1", tight), ("ip:1", loose)])
+    assert [result.allowed for result in results] == [False, True]
+    assert (await limiter.hit("ip:1", loose)).remaining == 9
+    assert limiter.stats.rejected_by == {"phone" : 1}
+
+
+@pytest.mark.anyio
+async def test_tiered_refunds_local():
+    """Отказ общего уровня возвращает запрос локальному, отказ локального не доходит до общего"""
+    local, remote = MemoryRateLimiter(), MemoryRateLimiter()
+    limiter = TieredRateLimiter(local, remote)
+    rule = RateLimit(2, 60)
+    await remote.hit("k", rule)
+    await remote.hit("k", rule)
+    assert not (await limiter.hit("k", rule)).allowed
+    assert (await local.hit("k", rule)).remaining == 1
+
+    rule = RateLimit(1, 60)
+    await local.hit("x", rule)
+    assert not (await limiter.hit("x", rule)).allowed
+    assert remote.stats.allowed + remote.stats.rejected == 3
+
+
+@pytest.mark.anyio
+async def test_dependency_rejects_before_endpoint():
+    """429 с Retry-After до вызова эндпоинта, ключ телефона берется из тела"""
+    calls = []
+    app = FastAPI()
+
+    @app.post("/sms", dependencies=[rate_limit(MemoryRateLimiter(), "sms", "phone=2/60,device=5/60")])
+    async def send_sms(data : dict):
+        calls.append(data["phone_number"])
+        return {"ok" : True}
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        statuses = []
+        for phone in ("79990000001", "79990000001", "79990000001", "79990000002"):
+            response = await client.post("/sms", json={"phone_number" : phone}, headers={"X-Device-ID" : "d1"})
+            statuses.append(response.status_code)
+        assert statuses == [200, 200, 429, 200]
+        assert response.headers["X-RateLimit-Remaining"] == "1"
+        assert (await client.post("/sms", json={"phone_number" : "79990000002"}, headers={"X-Device-ID" : "d1"})).status_code == 200
+        rejected = await client.post("/sms", json={"phone_number" : "79990000002"}, headers={"X-Device-ID" : "d1"})
+        assert rejected.status_code == 429 and int(rejected.headers["Retry-After"]) >= 1
+    assert calls == ["79990000001", "79990000001", "79990000002", "79990000002"]
+
+
+def test_parse_rules():
+    assert parse_rules("ip=10/60, phone=3/600") == [("ip", RateLimit(10, 60)), ("phone", RateLimit(3, 600))]
+    with pytest.raises(ValueError):
+        parse_rules("email=1/60")
+
+
+def _request(host : str, headers : dict) -> Request:
+    return Request({
+        "type" : "http",
+        "client" : (host, 50000),
+        "headers" : [(name.lower().encode(), value.encode()) for name, value in headers.items()],
+    })
+
+
+def test_client_ip_behind_proxy():
+    """X-Real-IP учитывается только от доверенного прокси"""
+    trust_proxies("172.16.0.0/12")
+    try:
+        assert client_ip(_request("172.18.0.5", {"X-Real-IP" : "203.0.113.7"})) == "203.0.113.7"
+        assert client_ip(_request("172.18.0.5", {})) == "172.18.0.5"
+        assert client_ip(_request("198.51.100.1", {"X-Real-IP" : "203.0.113.7"})) == "198.51.100.1"
+    finally:
+        trust_proxies("")
+    assert client_ip(_request("172.18.0.5", {"X-Real-IP" : "203.0.113.7"})) == "172.18.0.5"
+
+
+@pytest.mark.anyio
+async def test_redis_sliding_window(monkeypatch):
+    """Lua скрипт: лимит по всем ключам атомарно, отклоненный запрос не засчитывается"""
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    now = 1000.0
+    monkeypatch.setattr(time, "time", lambda: now)
+    client = fakeredis.FakeAsyncRedis()
+    limiter = RedisRateLimiter(client)
+    tight, loose = RateLimit(2, 10), RateLimit(10, 10)
+    items = [("phone:1", tight), ("ip:1", loose)]
+    assert [result.allowed for result in await limiter.hit_many(items)] == [True, True]
+    assert [result.allowed for result in await limiter.hit_many(items)] == [True, True]
+    results = await limiter.hit_many(items)
+    assert [result.allowed for result in results] == [False, True]
+    assert results[0].retry_after == 10
+    assert (await limiter.hit("ip:1", loose)).remaining == 7
+    assert await client.pttl("ratelimit:phone:1:100") == 20_000
+
+    # половина нового окна: 2 запроса прошлого окна весят 1
+    now = 1015.0
+    assert (await limiter.hit("phone:1", tight)).allowed
+    assert not (await limiter.hit("phone:1", tight)).allowed
+    assert limiter.stats.errors == 0
+    await limiter.aclose()
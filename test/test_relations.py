@@ -0,0 +1,80 @@
+import pytest
+from sqlalchemy.exc import InvalidRequestError
+
+from db.repository import UserRepository, UserSessionRepository
+from shared.database.base import BaseUnitOfWork
+from shared.database.instrumentation import instrument_engine, query_scope
+
+
+SESSIONS = 120
+
+
+async def _user_with_sessions(session_factory) -> int:
+    async with session_factory() as session:
+        user = await UserRepository(session).create(phone_number="79000000001", telegram_id="100")
+        await UserSessionRepository(session).bulk_create([
+            {"user_id" : user.id, "ip_addres" : "127.0.0.1", "device_id" : f"device-{i}", "refresh_jti" : f"00000000-0000-0000-0000-{i:012d}"}
+            for i in range(SESSIONS)
+        ])
+        await session.commit()
+        return user.id
+
+
+def _uow(session_factory) -> BaseUnitOfWork:
+    uow = BaseUnitOfWork(session_factory)
+    uow.add_repo("user", UserRepository)
+    uow.add_repo("session", UserSessionRepository)
+    return uow
+
+
+@pytest.mark.anyio
+async def test_user_read_does_not_load_sessions(engine, session_factory):
+    """Чтение пользователя - один запрос, сессии не грузятся и не подгружаются скрыто"""
+    instrument_engine(engine)
+    user_id = await _user_with_sessions(session_factory)
+    async with session_factory() as session:
+        repository = UserRepository(session)
+        with query_scope("login") as stats:
+            user = await repository.get_by_field("phone_number", "79000000001")
+            same = await repository.get_by_field("telegram_id", "100")
+        assert stats.statements == 2 and stats.rows == 2
+        assert user is same and user.id == user_id
+        with pytest.raises(InvalidRequestError):
+            user.sessions
+
+
+@pytest.mark.anyio
+async def test_with_relations(engine, session_factory):
+    """Профиль загрузки: связи одним доп. запросом, не зависящим от числа сессий"""
+    instrument_engine(engine)
+    user_id = await _user_with_sessions(session_factory)
+    async with session_factory() as session:
+        repository = UserRepository(session)
+        with query_scope("profile") as stats:
+            user = await repository.get_by_id(user_id, with_relations="with_sessions")
+        assert stats.statements == 2
+        assert len(user.sessions) == SESSIONS
+        with pytest.raises(ValueError):
+            await repository.get_by_id(user_id, with_relations="unknown")
+        with pytest.raises(ValueError):
+            await repository.get_by_id(user_id, with_relations=["phone_number"])
+
+
+@pytest.mark.anyio
+async def test_sessions_page_query_count(engine, session_factory):
+    """Сессии пользователя постранично: один запрос на страницу"""
+    instrument_engine(engine)
+    user_id = await _user_with_sessions(session_factory)
+    uow = _uow(session_factory)
+    async with uow.readonly() as u:
+        user = await u.user_repository.get_by_id(user_id)
+        page = await u.session_repository.get_user_sessions(user.id, limit=50)
+        seen = len(page.items)
+        while page.has_next:
+            page = await u.session_repository.get_user_sessions(user.id, cursor=page.next_cursor, limit=50)
+            seen += len(page.items)
+    assert seen == SESSIONS
+    assert uow.query_stats.statements == 1 + 3
+    # Страница с продолжением читает на строку больше, чтобы узнать has_next
+    assert uow.query_stats.rows == 1 + SESSIONS + 2
+
@@ -0,0 +1,273 @@
+import asyncio
+import uuid
+import pytest
+from datetime import date, datetime
+from decimal import Decimal
+from fastapi import HTTPException
+from sqlalchemy import Integer, String, event
+from sqlalchemy.orm import Mapped, mapped_column
+
+from db.base import AuthBase
+from db.repository import UserRepository
+from shared.database.base import BaseRepository, BaseUnitOfWork
+from shared.database.bulk import bind_safe_chunk_size
+from shared.database.loader import EntityLoader
+from shared.database.pagination import decode_cursor, encode_cursor
+
+
+class VersionedNote(AuthBase):
+    """Тестовая модель с колонкой версии"""
+    __tablename__ = "test_versioned_notes"
+
+    text : Mapped[str] = mapped_column(String(50), nullable=False)
+    version : Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+
+
+class VersionedNoteRepository(BaseRepository[VersionedNote]):
+    version_field = "version"
+
+    def __init__(self, session):
+        super().__init__(session=session, model=VersionedNote)
+
+
+async def _create_users(repository: UserRepository, count: int) -> None:
+    for i in range(count):
+        await repository.create(phone_number=f"7900{i:07d}")
+
+
+@pytest.mark.anyio
+async def test_count(session_factory):
+    """count() и count_by_field() считают на стороне БД"""
+    async with session_factory() as session:
+        repository = UserRepository(session)
+        await _create_users(repository, 5)
+        assert await repository.count() == 5
+        assert await repository.count_by_field("is_active", False) == 5
+        assert await repository.count_by_field("is_active", True) == 0
+        assert await repository.count(approximate=True) >= 0
+
+
+@pytest.mark.anyio
+async def test_exists(session_factory):
+    """exists_by_field() не падает, если совпадений несколько"""
+    async with session_factory() as session:
+        repository = UserRepository(session)
+        await _create_users(repository, 3)
+        user = await repository.get_by_field("phone_number", "79000000000")
+        assert await repository.exists(user.id)
+        assert not await repository.exists(-1)
+        assert await repository.exists_by_field("is_active", False)
+        assert not await repository.exists_by_field("phone_number", "70000000000")
+
+
+@pytest.mark.anyio
+async def test_get_page(session_factory):
+    """Keyset-пагинация проходит все строки без повторов"""
+    async with session_factory() as session:
+        repository = UserRepository(session)
+        await _create_users(repository, 7)
+        seen, cursor = [], None
+        while True:
+            page = await repository.get_page(cursor=cursor, limit=3)
+            seen.extend(user.id for user in page.items)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        assert seen == sorted(seen)
+        assert len(seen) == 7
+
+        first = await repository.get_page_by_field("is_active", False, limit=4, order_by="created_at")
+        second = await repository.get_page_by_field(
+            "is_active", False, cursor=first.next_cursor, limit=4, order_by="created_at"
+            )
+        assert len(first.items) == 4 and len(second.items) == 3
+        assert second.next_cursor is None
+        assert not {u.id for u in first.items} & {u.id for u in second.items}
+
+        with pytest.raises(ValueError):
+            await repository.get_page(cursor=first.next_cursor)
+        with pytest.raises(ValueError):
+            await repository.get_page(order_by="phone_number")
+
+
+def test_cursor_value_types():
+    """UUID, Decimal, даты переживают курсор с исходным типом, NULL не кодируется"""
+    for value in (uuid.uuid4(), Decimal("10.50"), datetime(2025, 1, 2, 3, 4, 5), date(2025, 1, 2), "x", 7):
+        decoded, id = decode_cursor(encode_cursor("f", value, 3), "f")
+        assert decoded == value and type(decoded) is type(value) and id == 3
+    with pytest.raises(ValueError):
+        encode_cursor("f", None, 3)
+
+
+@pytest.mark.anyio
+async def test_stream(session_factory):
+    """Потоковое чтение через серверный курсор"""
+    async with session_factory() as session:
+        repository = UserRepository(session)
+        await _create_users(repository, 5)
+        ids = [user.id async for user in repository.stream(batch_size=2)]
+        assert len(ids) == 5
+        phones = [user.phone_number async for user in repository.stream_by_field("is_active", False, batch_size=2)]
+        assert len(phones) == 5
+
+
+@pytest.mark.anyio
+async def test_bulk_create(session_factory):
+    """Конфликтные строки не валят пачку, а возвращаются отдельно"""
+    async with session_factory() as session:
+        repository = UserRepository(session)
+        await repository.create(phone_number="79000000001")
+        rows = [{"phone_number": f"7900000000{i}"} for i in range(5)]
+        result = await repository.bulk_create(rows, chunk_size=2)
+        assert len(result.created) == 4
+        assert result.conflicts == [{"phone_number": "79000000001"}]
+        assert await repository.count() == 5
+
+        result = await repository.bulk_create(
+            [{"phone_number": "79000000009", "telegram_id": "1"}, {"phone_number": "79000000010", "telegram_id": "1"}],
+            conflict_on=["telegram_id"],
+            )
+        assert [u.phone_number for u in result.created] == ["79000000009"]
+        assert len(result.conflicts) == 1
+
+    # без уникальных колонок пропущенные строки не сопоставить - ошибка, а не догадка по позиции
+    with pytest.raises(ValueError):
+        BaseRepository._missing_rows([{"text": "a"}, {"text": "b"}], [], [])
+
+
+@pytest.mark.anyio
+async def test_bulk_upsert(session_factory):
+    """Upsert разделяет созданные и обновленные строки"""
+    async with session_factory() as session:
+        repository = UserRepository(session)
+        await repository.create(phone_number="79000000001", telegram_id="1")
+        rows = [
+            {"telegram_id": "1", "phone_number": "79000000011"},
+            {"telegram_id": "2", "phone_number": "79000000002"},
+            {"telegram_id": "2", "phone_number": "79000000022"},
+        ]
+        result = await repository.bulk_upsert(rows, conflict_on=["telegram_id"])
+        assert [u.phone_number for u in result.updated] == ["79000000011"]
+        assert [u.phone_number for u in result.created] == ["79000000022"]
+        assert result.conflicts == [rows[1]]
+        user = await repository.get_by_field("telegram_id", "1")
+        assert user.phone_number == "79000000011"
+
+        # без полей для обновления - DO NOTHING, существующая строка - конфликт
+        rows = [{"telegram_id": "1"}, {"telegram_id": "3"}]
+        result = await repository.bulk_upsert(rows, conflict_on=["telegram_id"])
+        assert [u.telegram_id for u in result.created] == ["3"]
+        assert result.conflicts == [rows[0]]
+
+
+def test_bind_safe_chunk_size():
+    """Пачка многострочного VALUES не превышает лимит параметров Postgres"""
+    assert bind_safe_chunk_size(1000, 10) == 1000
+    assert bind_safe_chunk_size(1000, 100) == 327
+    assert bind_safe_chunk_size(1000, 40000) == 1
+
+
+@pytest.mark.anyio
+async def test_update_delete_returning(session_factory):
+    """update()/delete() - один запрос с RETURNING"""
+    async with session_factory() as session:
+        repository = UserRepository(session)
+        user = await repository.create(phone_number="79000000001")
+        updated = await repository.update(user.id, telegram_id="42", unknown_field=1)
+        assert updated.telegram_id == "42"
+        assert await repository.update(-1, telegram_id="1") is None
+        assert await repository.delete(user.id)
+        assert not await repository.delete(user.id)
+        assert not await repository.exists(user.id)
+
+
+@pytest.mark.anyio
+async def test_optimistic_version(session_factory):
+    """Обновление устаревшей версии отклоняется с 409"""
+    async with session_factory() as session:
+        repository = VersionedNoteRepository(session)
+        note = await repository.create(text="a")
+        assert note.version == 1
+        note = await repository.update(note.id, expected_version=1, text="b")
+        assert note.version == 2 and note.text == "b"
+        with pytest.raises(HTTPException) as error:
+            await repository.update(note.id, expected_version=1, text="c")
+        assert error.value.status_code == 409
+        with pytest.raises(HTTPException):
+            await repository.delete(note.id, expected_version=1)
+        assert await repository.delete(note.id, expected_version=2)
+        assert await repository.update(note.id, expected_version=2, text="d") is None
+
+
+@pytest.mark.anyio
+async def test_get_many_by_ids(session_factory):
+    """Один запрос WHERE id = ANY(:ids), порядок входных id сохраняется"""
+    async with session_factory() as session:
+        repository = UserRepository(session)
+        await _create_users(repository, 3)
+        ids = [user.id async for user in repository.stream()]
+        users = await repository.get_many_by_ids([ids[2], -1, ids[0], ids[2]])
+        assert [user.id for user in users] == [ids[2], ids[0]]
+        assert await repository.get_many_by_ids([]) == []
+
+
+@pytest.mark.anyio
+async def test_loader_coalesces_get_by_id(engine, session_factory):
+    """Конкурентные get_by_id внутри unit of work - один запрос"""
+    uow = BaseUnitOfWork(session_factory)
+    uow.add_repo("user", UserRepository)
+    async with uow.transaction() as u:
+        await _create_users(u.user_repository, 3)
+    async with uow.readonly() as u:
+        ids = [user.id async for user in u.user_repository.stream()]
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(engine.sync_engine, "before_cursor_execute", listener)
+    try:
+        async with uow.readonly() as u:
+            users = await asyncio.gather(*(u.user_repository.get_by_id(id) for id in [*ids, -1, ids[0]]))
+            assert u.user_repository.loader.batches == 1
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", listener)
+    assert [user.id if user else None for user in users] == [*ids, None, ids[0]]
+    assert len([s for s in statements if "FROM auth.users" in s]) == 1
+
+
+@pytest.mark.anyio
+async def test_loader_cancelled_batch_releases_waiters():
+    """Отмена запроса пачки не оставляет get_by_id висеть"""
+    started = asyncio.Event()
+
+    class SlowRepository:
+        async def get_many_by_ids(self, ids):
+            started.set()
+            await asyncio.sleep(10)
+
+    loader = EntityLoader(SlowRepository())
+    waiters = asyncio.gather(loader.load(1), loader.load(2), return_exceptions=True)
+    await started.wait()
+    (task,) = loader._tasks
+    task.cancel()
+    results = await asyncio.wait_for(waiters, 1)
+    assert all(isinstance(result, asyncio.CancelledError) for result in results)
+    await asyncio.sleep(0)
+    assert not loader._tasks
+
+
+@pytest.mark.anyio
+async def test_projection(session_factory):
+    """columns=[...] возвращает строки без ORM-объектов"""
+    async with session_factory() as session:
+        repository = UserRepository(session)
+        await _create_users(repository, 3)
+        session.expunge_all()
+        row = await repository.get_by_field("phone_number", "79000000001", columns=["id", "hash_password"])
+        assert row.hash_password is None and isinstance(row.id, int)
+        assert (await repository.get_by_id(row.id, columns=["phone_number"])) == ("79000000001",)
+        rows = await repository.get_many_by_field("is_active", False, columns=["phone_number"])
+        assert [r.phone_number for r in rows] == ["79000000000", "79000000001", "79000000002"]
+        assert len(await repository.get_all(limit=2, columns=["id"])) == 2
+        assert len(session.identity_map) == 0
+        with pytest.raises(ValueError):
+            await repository.get_by_id(row.id, columns=["sessions"])
@@ -0,0 +1,154 @@
+import asyncio
+import os
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from db.repository import UserRepository
+from shared.cache import MemoryCache
+from shared.database.base import BaseUnitOfWork
+from shared.database.cache import EntityCache
+from shared.database.routing import EngineRouter, probe_replica_lag
+
+
+@pytest.fixture
+async def router(engine):
+    """primary + две "реплики" - отдельные движки к той же тестовой БД"""
+    url = os.environ["TEST_DATABASE_URL"]
+    replicas = [create_async_engine(url), create_async_engine(url)]
+    lags = {replica: 0.0 for replica in replicas}
+
+    async def lag_probe(replica):
+        if isinstance(lags[replica], Exception):
+            raise lags[replica]
+        return lags[replica]
+
+    router = EngineRouter(engine, replicas, max_lag=1.0, lag_check_interval=60, lag_probe=lag_probe, expire_on_commit=False)
+    router.lags = lags
+    await router.check_replicas()
+    yield router
+    for replica in replicas:
+        await replica.dispose()
+
+
+def _uow(router):
+    uow = BaseUnitOfWork(router)
+    uow.add_repo("user", UserRepository)
+    return uow
+
+
+@pytest.mark.anyio
+async def test_readonly_round_robin(router):
+    """readonly() по очереди ходит в реплики, transaction() - в primary"""
+    uow = _uow(router)
+    binds = []
+    for _ in range(4):
+        async with uow.readonly() as u:
+            binds.append(u._session.bind)
+            await u.user_repository.count()
+    assert binds == [router.replicas[0].engine, router.replicas[1].engine] * 2
+    async with uow.transaction() as u:
+        assert u._session.bind is router.primary.engine
+        await u.user_repository.create(phone_number="79000000001")
+    stats = router.pool_stats()["engines"]
+    assert stats["replica-0"]["sessions"] == 2 and stats["primary"]["sessions"] == 1
+
+
+@pytest.mark.anyio
+async def test_readonly_lag_fallback(router):
+    """Отставшие и недоступные реплики пропускаются, без реплик - primary"""
+    uow = _uow(router)
+    replica_0, replica_1 = (node.engine for node in router.replicas)
+    router.lags[replica_0] = 10.0
+    await router.check_replicas()
+    async with uow.readonly() as u:
+        assert u._session.bind is replica_1
+    router.lags[replica_1] = ConnectionError("down")
+    await router.check_replicas()
+    async with uow.readonly() as u:
+        assert u._session.bind is router.primary.engine
+    assert router.fallbacks == 1
+    assert router.pool_stats()["engines"]["replica-1"]["healthy"] is False
+
+    # WAL receiver отключен: замер без отставания, но реплика не годится
+    router.lags[replica_0] = None
+    router.lags[replica_1] = 0.0
+    await router.check_replicas()
+    for _ in range(2):
+        async with uow.readonly() as u:
+            assert u._session.bind is replica_1
+    assert router.pool_stats()["engines"]["replica-0"]["healthy"] is False
+
+
+@pytest.mark.anyio
+async def test_probe_replica_lag_on_primary(engine):
+    """Запрос замера выполняется; на primary отставание 0"""
+    assert await probe_replica_lag(engine) == 0
+
+
+@pytest.mark.anyio
+async def test_least_connections(engine):
+    """least_connections выбирает реплику с меньшим числом занятых соединений"""
+    url = os.environ["TEST_DATABASE_URL"]
+    replicas = [create_async_engine(url), create_async_engine(url)]
+
+    async def lag_probe(replica):
+        return 0.0
+
+    router = EngineRouter(engine, replicas, strategy="least_connections", lag_probe=lag_probe)
+    await router.check_replicas()
+    try:
+        async with replicas[0].connect() as conn:
+            session = await router.read_session()
+            assert session.bind is replicas[1]
+            await session.close()
+    finally:
+        for replica in replicas:
+            await replica.dispose()
+
+
+@pytest.mark.anyio
+async def test_lag_is_probed_in_background(router):
+    """Выбор реплики не ждет замера; без свежего замера чтение идет в primary"""
+    calls = []
+
+    async def slow_probe(replica):
+        calls.append(replica)
+        await asyncio.sleep(10)
+
+    router._lag_probe = slow_probe
+    router.lag_max_age = 0
+    router.start()
+    session = await asyncio.wait_for(router.read_session(), 1)
+    assert session.bind is router.primary.engine
+    await session.close()
+    await router.stop()
+    assert len(calls) == 2
+
+
+class ReplicaUserRepository(UserRepository):
+    cache = EntityCache(MemoryCache())
+
+
+@pytest.mark.anyio
+async def test_replica_reads_are_not_cached(router):
+    """Прочитанное из реплики не попадает в кеш сущностей"""
+    uow = BaseUnitOfWork(router)
+    uow.add_repo("user", ReplicaUserRepository)
+    async with uow.transaction() as u:
+        user = await u.user_repository.create(phone_number="79000000001")
+    async with uow.readonly() as u:
+        assert u._session.bind is not router.primary.engine
+        await u.user_repository.get_by_id(user.id)
+    assert len(ReplicaUserRepository.cache.backend) == 0
+
+
+@pytest.mark.anyio
+async def test_serializable_reads_use_primary(router):
+    """SERIALIZABLE (в том числе deferrable) чтение не уходит в реплику - hot standby его отклоняет"""
+    uow = _uow(router)
+    async with uow.readonly(deferrable=True) as u:
+        assert u._session.bind is router.primary.engine
+    async with uow.readonly(isolation_level="serializable") as u:
+        assert u._session.bind is router.primary.engine
+    async with uow.readonly(isolation_level="REPEATABLE READ") as u:
+        assert u._session.bind is not router.primary.engine
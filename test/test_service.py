@@ -0,0 +1,165 @@
+import asyncio
+import random
+from contextlib import asynccontextmanager
+
+import pytest
+from sqlalchemy.exc import DBAPIError
+
+from db.repository import UserRepository
+from shared.database.base import BaseUnitOfWork
+from shared.database.retry import transient_sqlstate, backoff_delay, retry_stats
+from shared.service.base import BaseService
+
+
+class FakeUoW:
+    """UoW без БД: считает открытые транзакции и savepoint"""
+    opened = 0
+
+    def __init__(self):
+        FakeUoW.opened += 1
+        self.id = FakeUoW.opened
+        self.savepoints = 0
+
+    @asynccontextmanager
+    async def transaction(self, **kwargs):
+        yield self
+
+    @asynccontextmanager
+    async def readonly(self, **kwargs):
+        yield self
+
+    @asynccontextmanager
+    async def savepoint(self):
+        self.savepoints += 1
+        yield self
+
+
+class FakeService(BaseService[FakeUoW]):
+
+    @BaseService.transactional()
+    async def handle(self, request_id: int):
+        uow = self.uow
+        for _ in range(5):
+            await asyncio.sleep(random.random() / 1000)
+            assert self.uow is uow
+        inner = await self.nested()
+        assert inner is uow
+        return request_id, uow
+
+    @BaseService.transactional()
+    async def nested(self):
+        await asyncio.sleep(0)
+        return self.uow
+
+    @BaseService.transactional(read_only=True)
+    async def read(self):
+        return self.uow
+
+
+@pytest.mark.anyio
+async def test_concurrent_calls_on_singleton_service():
+    """Конкурентные вызовы одного экземпляра сервиса не делят UoW"""
+    service = FakeService(FakeUoW)
+    results = await asyncio.gather(*(service.handle(i) for i in range(200)))
+    uows = [uow for _, uow in results]
+    assert [request_id for request_id, _ in results] == list(range(200))
+    assert len({id(uow) for uow in uows}) == 200
+    assert all(uow.savepoints == 1 for uow in uows)
+    # Вне вызова uow - новый объект, состояние вызовов не протекает
+    assert service.uow not in uows
+
+
+@pytest.mark.anyio
+async def test_nested_read_only_reuses_outer():
+    service = FakeService(FakeUoW)
+    uow = await service.read()
+    assert uow.savepoints == 0
+
+
+class UserService(BaseService):
+
+    @BaseService.transactional()
+    async def register(self, phone: str, fail_inner: bool = False):
+        await self.uow.user_repository.create(phone_number=phone)
+        try:
+            await self.register_telegram(phone, fail_inner)
+        except RuntimeError:
+            pass
+
+    @BaseService.transactional()
+    async def register_telegram(self, phone: str, fail: bool):
+        await self.uow.user_repository.update_by_field("phone_number", phone, telegram_id=phone)
+        if fail:
+            raise RuntimeError("inner failure")
+
+    @BaseService.transactional(read_only=True)
+    async def get(self, phone: str):
+        return await self.uow.user_repository.get_by_field("phone_number", phone)
+
+
+@pytest.mark.anyio
+async def test_nested_savepoint(session_factory):
+    """Ошибка вложенного вызова откатывает только его savepoint"""
+    def uow_factory():
+        uow = BaseUnitOfWork(session_factory)
+        uow.add_repo("user", UserRepository)
+        return uow
+
+    service = UserService(uow_factory)
+    await service.register("79000000001")
+    await service.register("79000000002", fail_inner=True)
+    assert (await service.get("79000000001")).telegram_id == "79000000001"
+    user = await service.get("79000000002")
+    assert user is not None and user.telegram_id is None
+
+    await asyncio.gather(*(service.register(f"7910000{i:04d}") for i in range(20)))
+    assert all([await service.get(f"7910000{i:04d}") for i in range(20)])
+
+
+class RegistrationService(BaseService):
+    """Запись по результату чтения - конфликт сериализации при параллельных вызовах"""
+
+    def __init__(self, uow_factory, barrier: asyncio.Barrier):
+        super().__init__(uow_factory)
+        self.barrier = barrier
+        self.calls = 0
+
+    @BaseService.transactional(retries=5, isolation="SERIALIZABLE")
+    async def register(self, phone: str):
+        self.calls += 1
+        total = await self.uow.user_repository.count()
+        if self.calls <= 2:
+            await self.barrier.wait()
+        await self.uow.user_repository.create(phone_number=phone, telegram_id=str(total))
+
+
+@pytest.mark.anyio
+async def test_retry_serialization_failure(session_factory):
+    """40001 повторяется с задержкой, оба вызова завершаются успешно"""
+    def uow_factory():
+        uow = BaseUnitOfWork(session_factory)
+        uow.add_repo("user", UserRepository)
+        return uow
+
+    retries = retry_stats.retries
+    service = RegistrationService(uow_factory, asyncio.Barrier(2))
+    await asyncio.gather(service.register("79000000001"), service.register("79000000002"))
+    assert service.calls == 3
+    assert retry_stats.retries == retries + 1
+    assert retry_stats.by_sqlstate["serialization_failure"] >= 1
+
+    service = UserService(uow_factory)
+    assert {(await service.get(p)).telegram_id for p in ("79000000001", "79000000002")} == {"0", "1"}
+
+
+def test_transient_sqlstate():
+    """Временными считаются только 40001 и 40P01"""
+    class Orig(Exception):
+        def __init__(self, sqlstate):
+            self.sqlstate = sqlstate
+
+    assert transient_sqlstate(DBAPIError("stmt", {}, Orig("40001"))) == "40001"
+    assert transient_sqlstate(DBAPIError("stmt", {}, Orig("40P01"))) == "40P01"
+    assert transient_sqlstate(DBAPIError("stmt", {}, Orig("23505"))) is None
+    assert transient_sqlstate(ValueError()) is None
+    assert all(0 <= backoff_delay(attempt) <= 1.0 for attempt in range(1, 20))
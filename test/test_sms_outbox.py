@@ -0,0 +1,62 @@
+import asyncio
+import pytest
+
+from shared.sms import FakeSmsProvider, SmsOutbox, SmsOutboxFull, SmsProviderError
+from shared.verification import MemoryVerificationStore
+from utils.sms import start_verification
+
+
+@pytest.mark.anyio
+async def test_batches_and_metrics():
+    """Воркеры забирают накопившиеся сообщения пачками до batch_size"""
+    provider = FakeSmsProvider(latency=0.01, max_batch=10, record=20)
+    outbox = SmsOutbox(provider, workers=2)
+    for i in range(50):
+        outbox.enqueue(f"7999000{i:04d}", "code")
+    assert outbox.report()["depth"] == 50
+    outbox.start()
+    assert await outbox.drain(timeout=5)
+    await outbox.stop()
+    report = outbox.report()
+    assert provider.delivered == report["sent"] == 50
+    # хранятся только последние record сообщений
+    assert len(provider.sent) == 20
+    assert provider.requests == report["batches"] <= 10
+    assert report["depth"] == 0 and report["latency_p95_ms"] is not None
+
+
+@pytest.mark.anyio
+async def test_retry_with_backoff():
+    """Непринятые сообщения повторяются, после max_attempts отбрасываются"""
+    provider = FakeSmsProvider(max_batch=5, failure_rate=0.5, seed=1)
+    outbox = SmsOutbox(provider, workers=1, max_attempts=10, backoff=0.001, max_backoff=0.005)
+    outbox.start()
+    for i in range(20):
+        outbox.enqueue(f"7999000{i:04d}", "code")
+    assert await outbox.drain(timeout=5)
+    assert outbox.stats.sent == 20 and outbox.stats.retries > 0
+    await outbox.stop()
+
+    class Broken(FakeSmsProvider):
+        async def send_batch(self, messages):
+            raise SmsProviderError("down")
+
+    outbox = SmsOutbox(Broken(), workers=1, max_attempts=3, backoff=0.001)
+    outbox.start()
+    outbox.enqueue("79990000000", "code")
+    assert await outbox.drain(timeout=5)
+    assert (outbox.stats.sent, outbox.stats.failed, outbox.stats.retries) == (0, 1, 2)
+    await outbox.stop()
+
+
+@pytest.mark.anyio
+async def test_enqueue_does_not_wait_provider():
+    """Постановка в очередь не ждет провайдера, переполненная очередь отказывает сразу"""
+    outbox = SmsOutbox(FakeSmsProvider(latency=10), workers=1, max_queue=2)
+    store = MemoryVerificationStore()
+    response = await asyncio.wait_for(start_verification(store, "79990000000", ttl=5, outbox=outbox), 0.5)
+    assert outbox.report()["depth"] == 1 and response["code"]
+    outbox.enqueue("79990000001", "code")
+    with pytest.raises(SmsOutboxFull):
+        outbox.enqueue("79990000002", "code")
+    assert outbox.stats.rejected == 1
@@ -0,0 +1,46 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+
+ROOT = Path(__file__).parent.parent
+
+
+def test_imports_have_no_side_effects():
+    """Импорт config, logger и sms ничего не печатает, не читает настройки и не настраивает логгер"""
+    code = (
+        "import logging, shared.config, shared.logger.logger, utils.sms;"
+        "assert shared.config.config._settings is None;"
+        "assert not logging.getLogger('app').handlers"
+    )
+    # без переменных окружения Settings() не прошел бы валидацию
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT / "services" / "auth",
+        env={"PYTHONPATH" : str(ROOT)},
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout == ""
+
+
+@pytest.mark.parametrize("service", ["auth", "vpn", "telegram_bot"])
+def test_import_main_builds_nothing(service):
+    """Импорт приложения не создает настройки, логгер, движки и клиенты - это делает lifespan"""
+    code = (
+        "import logging, shared.config, main;"
+        "assert shared.config.config._settings is None;"
+        "assert not logging.getLogger('app').handlers"
+    )
+    result = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", code],
+        cwd=ROOT / "services" / service,
+        env={"PYTHONPATH" : str(ROOT)},
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout == ""
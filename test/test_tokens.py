@@ -0,0 +1,116 @@
+import time
+
+import jwt
+
+import pytest
+
+from shared.tokens import KeyRing, TokenIssuer, VerifiedTokenCache
+from utils import jwt as auth_jwt
+
+
+def _token(secret : str = "secret", exp : float = 60, jti : str = "jti-1") -> str:
+    return jwt.encode({"user_id" : 1, "jti" : jti, "exp" : int(time.time() + exp)}, secret, algorithm="HS256")
+
+
+def test_cache_expires_at_exp():
+    """Запись живет до exp токена, токен без exp не кешируется"""
+    cache = VerifiedTokenCache(maxsize=10)
+    token = _token()
+    claims = jwt.decode(token, "secret", algorithms=["HS256"])
+    cache.put(token, claims)
+    assert cache.get(token) == claims
+    assert cache.get(token, namespace="other-key") is None
+    cache.put("expired", {**claims, "exp" : time.time() - 1})
+    cache.put("eternal", {"user_id" : 1})
+    assert cache.get("expired") is None and cache.get("eternal") is None
+    assert cache.stats.hits == 1
+
+
+def test_cache_revoke():
+    """Отзыв по jti действует сразу, в том числе на уже закешированный токен"""
+    cache = VerifiedTokenCache(maxsize=10)
+    token = _token()
+    claims = jwt.decode(token, "secret", algorithms=["HS256"])
+    cache.put(token, claims)
+    cache.revoke("jti-1", claims["exp"])
+    assert cache.get(token) is None
+    assert cache.is_revoked("jti-1") and not cache.is_revoked("jti-2")
+
+
+def test_revocations_are_not_evicted(monkeypatch):
+    """Отзывы не вытесняются по размеру и забываются только после exp токена"""
+    now = time.time()
+    cache = VerifiedTokenCache(maxsize=10)
+    for i in range(1000):
+        cache.revoke(f"jti-{i}", now + 60 + i)
+    assert cache.revoked == 1000 and cache.is_revoked("jti-0")
+    monkeypatch.setattr(time, "time", lambda: now + 560)
+    cache.revoke("jti-new", now + 600)
+    assert cache.revoked == 500
+    assert not cache.is_revoked("jti-0") and cache.is_revoked("jti-999")
+
+
+def test_verefy_token_uses_cache(monkeypatch):
+    """verefy_token проверяет подпись один раз, отозванный токен отклоняется"""
+    auth_jwt.get_token_cache().clear()
+    secret = auth_jwt.config.JWT_SECRET_KEY
+    _, token = auth_jwt.create_access_token(user_id=7)
+    decode_calls = []
+    original_decode = jwt.decode
+    monkeypatch.setattr(auth_jwt.jwt, "decode", lambda *a, **kw: decode_calls.append(1) or original_decode(*a, **kw))
+
+    first = auth_jwt.verefy_token(token, secret)
+    assert first["user_id"] == 7
+    assert auth_jwt.verefy_token(token, secret) == first
+    assert len(decode_calls) == 1
+    assert auth_jwt.verefy_token(token, "wrong-secret") is None
+
+    auth_jwt.revoke_token(first["jti"], first["exp"])
+    assert auth_jwt.verefy_token(token, secret) is None
+
+
+def test_key_ring_signing(monkeypatch):
+    """С KeyRing токены подписываются текущим ключом и проверяются по kid"""
+    ring = KeyRing("EdDSA")
+    monkeypatch.setattr(auth_jwt, "get_key_ring", lambda: ring)
+    monkeypatch.setattr(auth_jwt, "get_issuer", lambda: TokenIssuer(60, 120, key_ring=ring))
+    auth_jwt.get_token_cache().clear()
+    _, token = auth_jwt.create_access_token(user_id=3)
+    assert jwt.get_unverified_header(token)["kid"] == ring.signing_key().kid
+    assert auth_jwt.verefy_token(token)["user_id"] == 3
+
+    ring.rotate(force=True)
+    auth_jwt.get_token_cache().clear()
+    assert auth_jwt.verefy_token(token)["user_id"] == 3
+    assert auth_jwt.verefy_token(_token()) is None
+
+
+@pytest.mark.parametrize("algorithm", ["HS256", "EdDSA", "RS256"])
+def test_issuer_tokens_decode(algorithm):
+    """Токены TokenIssuer читаются обычным jwt.decode"""
+    if algorithm == "HS256":
+        issuer, key = TokenIssuer(60, 120, secret="secret", kid="k1"), "secret"
+    else:
+        ring = KeyRing(algorithm)
+        ring.rotate()
+        issuer, key = TokenIssuer(60, 120, key_ring=ring), ring.signing_key().public_key
+    pair = issuer.issue_pair(5, role="admin")
+    access = jwt.decode(pair.access_token, key, algorithms=[algorithm])
+    refresh = jwt.decode(pair.refresh_token, key, algorithms=[algorithm])
+    assert access["user_id"] == refresh["user_id"] == 5 and access["role"] == "admin"
+    assert (access["type"], refresh["type"]) == ("access", "refresh")
+    assert access["jti"] == str(pair.access_jti) != refresh["jti"]
+    assert refresh["exp"] - access["exp"] == 60 == pair.refresh_exp - pair.access_exp
+    assert jwt.get_unverified_header(pair.access_token)["kid"] == issuer.signer().kid
+
+
+def test_issuer_follows_rotation():
+    """После ротации кольца TokenIssuer подписывает новым ключом"""
+    ring = KeyRing("EdDSA")
+    ring.rotate()
+    issuer = TokenIssuer(60, 120, key_ring=ring)
+    first = issuer.signer()
+    assert issuer.signer() is first
+    ring.rotate(force=True)
+    _, token, _ = issuer.issue(1, "access")
+    assert jwt.get_unverified_header(token)["kid"] == ring.signing_key().kid != first.kid
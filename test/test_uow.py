@@ -0,0 +1,84 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from db.repository import UserRepository
+from shared.database.base import BaseUnitOfWork
+
+
+def _uow(session_factory):
+    uow = BaseUnitOfWork(session_factory)
+    uow.add_repo("user", UserRepository)
+    return uow
+
+
+@pytest.mark.anyio
+async def test_readonly_transaction(session_factory):
+    """readonly() открывает READ ONLY транзакцию, запись отклоняется"""
+    uow = _uow(session_factory)
+    async with uow.readonly() as u:
+        assert (await u._session.execute(text("SHOW transaction_read_only"))).scalar() == "on"
+    with pytest.raises(DBAPIError):
+        async with uow.readonly() as u:
+            await u._session.execute(text("INSERT INTO auth.users (phone_number, is_active, last_login, created_at) VALUES ('1', false, now(), now())"))
+    async with uow.readonly(deferrable=True) as u:
+        assert (await u._session.execute(text("SHOW transaction_deferrable"))).scalar() == "on"
+        assert (await u._session.execute(text("SHOW transaction_isolation"))).scalar() == "serializable"
+    # Характеристики не протекают в следующее использование соединения из пула
+    async with uow.transaction() as u:
+        assert (await u._session.execute(text("SHOW transaction_read_only"))).scalar() == "off"
+        await u.user_repository.create(phone_number="79000000001")
+
+
+@pytest.mark.anyio
+async def test_statement_timeout(session_factory):
+    """statement_timeout прерывает долгий запрос и действует только внутри транзакции"""
+    uow = _uow(session_factory)
+    with pytest.raises(DBAPIError):
+        async with uow.readonly(statement_timeout=0.05) as u:
+            await u._session.execute(text("SELECT pg_sleep(1)"))
+    async with uow.transaction(statement_timeout=1.5, lock_timeout=0.25) as u:
+        assert (await u._session.execute(text("SHOW statement_timeout"))).scalar() == "1500ms"
+        assert (await u._session.execute(text("SHOW lock_timeout"))).scalar() == "250ms"
+    async with uow.readonly() as u:
+        assert (await u._session.execute(text("SHOW lock_timeout"))).scalar() == "0"
+
+
+class StubSession:
+    """Сессия-заглушка для проверки жизненного цикла репозиториев без БД"""
+    info = {}
+
+    async def connection(self, **kwargs):
+        pass
+
+    async def begin(self):
+        pass
+
+    async def commit(self):
+        pass
+
+    async def aclose(self):
+        pass
+
+    def in_transaction(self):
+        return False
+
+
+@pytest.mark.anyio
+async def test_lazy_repositories():
+    """Репозиторий создается при первом обращении и удаляется на выходе"""
+    uow = BaseUnitOfWork(StubSession)
+    uow.add_repo("user", UserRepository)
+    uow.add_repo("other", UserRepository)
+    async with uow.transaction() as u:
+        assert "user_repository" not in u.__dict__
+        repository = u.user_repository
+        assert u.user_repository is repository
+        assert "other_repository" not in u.__dict__
+    assert "user_repository" not in uow.__dict__
+    with pytest.raises(AttributeError):
+        uow.user_repository
+
+    first, second = uow.get_repository("user"), uow.get_repository("user")
+    assert type(first) is type(second)
+    assert isinstance(first, UserRepository)
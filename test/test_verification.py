@@ -0,0 +1,56 @@
+import time
+import pytest
+
+from redis.asyncio import Redis
+
+from shared.verification import MemoryVerificationStore, VerifyStatus
+from shared.verification.redis import RedisVerificationStore
+from utils.sms import check_verification, start_verification
+
+
+@pytest.mark.anyio
+async def test_code_is_single_use():
+    """Верный код гасит сессию, повторная проверка ее уже не находит"""
+    store = MemoryVerificationStore()
+    response = await start_verification(store, "79990000000", ttl=5)
+    result = await check_verification(store, response)
+    assert result.ok and result.phone == "79990000000"
+    assert (await check_verification(store, response)).status is VerifyStatus.NOT_FOUND
+    assert store.stats.as_dict() == {"created" : 1, "verified" : 1, "invalid" : 0, "locked" : 0, "not_found" : 1}
+
+
+@pytest.mark.anyio
+async def test_attempts_and_expiry(monkeypatch):
+    """Неверные коды расходуют попытки, на последней сессия удаляется; сессия истекает по ttl"""
+    store = MemoryVerificationStore(max_attempts=3)
+    response = await start_verification(store, "79990000000", ttl=5)
+    wrong = {**response, "code" : "0000"}
+    assert (await check_verification(store, wrong)).attempts_left == 2
+    assert (await check_verification(store, {**response, "phone" : "70000000000"})).attempts_left == 1
+    assert (await store.get(response["id"]))["attempts"] == 2
+    assert (await check_verification(store, wrong)).status is VerifyStatus.LOCKED
+    assert (await check_verification(store, response)).status is VerifyStatus.NOT_FOUND
+
+    response = await start_verification(store, "79990000000", ttl=5)
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 301)
+    assert (await check_verification(store, response)).status is VerifyStatus.NOT_FOUND
+    assert len(store) == 0
+
+
+@pytest.mark.anyio
+async def test_redis_check_is_one_call(monkeypatch):
+    """Проверка кода в Redis - один вызов Lua скрипта"""
+    calls = []
+
+    async def script(keys, args):
+        calls.append((keys, args))
+        return [2, b"", 4]
+
+    client = Redis()
+    monkeypatch.setattr(client, "register_script", lambda source: script)
+    store = RedisVerificationStore(client, max_attempts=5)
+    result = await store.check_and_consume("abc", "sign")
+    assert calls == [(["sms:session:abc"], ["sign", 5])]
+    assert result.status is VerifyStatus.INVALID and result.attempts_left == 4 and result.phone is None
+    await client.aclose()
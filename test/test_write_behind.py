@@ -0,0 +1,121 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import DateTime, func, select, update
+
+from db.models import UserSession
+from db.repository import UserRepository, UserSessionRepository
+from shared.database.instrumentation import instrument_engine, query_scope
+from shared.database.write_behind import ActivityBuffer
+
+
+async def _sessions(session_factory, count : int):
+    async with session_factory() as session:
+        user = await UserRepository(session).create(phone_number="79000000001")
+        result = await UserSessionRepository(session).bulk_create([
+            {"user_id" : user.id, "ip_addres" : "127.0.0.1", "refresh_jti" : f"00000000-0000-0000-0000-{i:012d}"}
+            for i in range(count)
+        ])
+        await session.commit()
+        return [entity.id for entity in result.created]
+
+
+async def _activity(session_factory):
+    async with session_factory() as session:
+        result = await session.execute(select(UserSession.id, UserSession.last_activity))
+        return dict(result.all())
+
+
+async def _db_now(session_factory):
+    async with session_factory() as session:
+        return (await session.execute(select(func.now().cast(DateTime)))).scalar_one()
+
+
+@pytest.mark.anyio
+async def test_coalesced_batched_flush(engine, session_factory):
+    """Отметки склеиваются по id и пишутся одним UPDATE на пачку по часам БД"""
+    instrument_engine(engine)
+    ids = await _sessions(session_factory, 10)
+    buffer = ActivityBuffer(session_factory, UserSession, "last_activity", chunk_size=4)
+    for _ in range(5):
+        for id in ids:
+            buffer.touch(id)
+    before = await _db_now(session_factory)
+    with query_scope("flush") as stats:
+        assert await buffer.flush() == 10
+    assert stats.statements == 3
+    assert buffer.stats.coalesced == 40
+    assert buffer.stats.write_amplification == pytest.approx(10 / 50)
+    for at in (await _activity(session_factory)).values():
+        assert abs(at - before) < timedelta(seconds=5)
+    assert await buffer.flush() == 0
+
+    # Отметка не перезаписывает более позднюю активность в БД
+    later = before + timedelta(hours=1)
+    async with session_factory() as session:
+        await session.execute(update(UserSession).where(UserSession.id == ids[1]).values(last_activity=later))
+        await session.commit()
+    buffer.touch(ids[1])
+    await buffer.flush()
+    assert (await _activity(session_factory))[ids[1]] == later
+
+
+@pytest.mark.anyio
+async def test_threshold_and_stop(session_factory):
+    """Сброс по порогу размера и финальный сброс при остановке"""
+    ids = await _sessions(session_factory, 3)
+    buffer = ActivityBuffer(session_factory, UserSession, "last_activity", max_staleness=60, max_pending=2)
+    buffer.start()
+    buffer.touch(ids[0])
+    buffer.touch(ids[1])
+    await buffer._flush_task
+    assert buffer.pending == 0 and buffer.stats.rows == 2
+    buffer.touch(ids[2])
+    await buffer.stop()
+    assert buffer.pending == 0 and buffer.stats.rows == 3
+    assert buffer.stats.max_staleness < 60
+
+
+@pytest.mark.anyio
+async def test_stop_during_flush_keeps_batch():
+    """Остановка во время фонового сброса дожидается записи пачки, отмена возвращает ее в буфер"""
+    written = []
+    release = asyncio.Event()
+
+    class SlowBuffer(ActivityBuffer):
+        async def _write(self, batch):
+            await release.wait()
+            written.append(sorted(batch))
+
+    buffer = SlowBuffer(None, UserSession, "last_activity", max_staleness=0.01)
+    buffer.start()
+    buffer.touch(1)
+    await asyncio.sleep(0.05)
+    assert buffer.pending == 0
+    stopping = asyncio.create_task(buffer.stop())
+    await asyncio.sleep(0.01)
+    release.set()
+    await stopping
+    assert written == [[1]]
+
+    release.clear()
+    buffer.touch(2)
+    flush = asyncio.create_task(buffer.flush())
+    await asyncio.sleep(0.01)
+    flush.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await flush
+    assert buffer.pending == 1
+
+
+@pytest.mark.anyio
+async def test_failed_flush_keeps_pending():
+    """Ошибка записи возвращает отметки в буфер"""
+    def broken_factory():
+        raise ConnectionError("db is down")
+
+    buffer = ActivityBuffer(broken_factory, UserSession, "last_activity")
+    buffer.touch(1)
+    assert await buffer.flush() == 0
+    assert buffer.pending == 1 and buffer.stats.errors == 1